@@ -3,9 +3,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from datetime import datetime
 from app.core.config import settings
+from app.core.middleware import UploadLimitMiddleware
 from app.modules.curriculum.presentation.routers import router as curriculum_router
 from app.modules.curriculum.presentation.routers import misc 
 from app.core.database import dynamodb_client
+from app.modules.curriculum.infrastructure.ocr_executor import ocr_executor
+from app.modules.curriculum.infrastructure.llm_client import llm_client_manager
 
 def create_app() -> FastAPI:
     """Cria e configura a aplicação FastAPI"""
@@ -28,6 +31,9 @@ def create_app() -> FastAPI:
         }
     )
     
+    # Registrado antes do CORS para ficar por dentro dele: as recusas 413/415
+    # também levam os cabeçalhos CORS e o navegador consegue ler o status
+    app.add_middleware(UploadLimitMiddleware)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -47,6 +53,24 @@ def create_app() -> FastAPI:
             print("✅ Database inicializado com sucesso!")
         except Exception as e:
             print(f"⚠️ Aviso: Não foi possível inicializar o database: {e}")
+        
+        ocr_executor.start()
+        print(f"✅ Pool de OCR iniciado com {ocr_executor.max_workers} workers")
+        
+        try:
+            llm_client_manager.start()
+            if llm_client_manager.http_client is not None:
+                print(f"✅ Cliente LLM compartilhado iniciado (até {llm_client_manager.max_connections} conexões)")
+            else:
+                print("⚠️ OpenAI API key não configurada. Usando análise simples...")
+        except Exception as e:
+            print(f"⚠️ Erro ao configurar Instructor LLM: {e}")
+    
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        """Evento executado no encerramento da aplicação"""
+        await ocr_executor.shutdown()
+        await llm_client_manager.shutdown()
     
     @app.get("/", include_in_schema=False)
     async def root():
@@ -0,0 +1,262 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+# Resultados da consulta à memória que não são um valor
+_MISS = object()
+_EXPIRED = object()
+
+
+class TwoTierCache:
+    """
+    Cache LRU em memória com camada persistente em disco.
+
+    Entradas gravadas com `ttl` (segundos) expiram nas duas camadas; sem
+    `ttl` valem até serem removidas pela evicção.
+
+    A memória e o disco têm travas separadas, e nenhuma delas é mantida
+    durante a leitura ou a escrita de arquivos: acertos em memória não
+    esperam fsync nem evicção, e `aget`/`aset` tocam a memória direto no
+    event loop, deixando só o disco para a thread.
+    """
+
+    def __init__(
+        self,
+        memory_items: int,
+        directory: Optional[str] = None,
+        max_disk_bytes: int = 0
+    ):
+        self.memory_items = memory_items
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        # Valor e instante de expiração (None = sem expiração)
+        self._memory: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Contabilidade do disco e evicção
+        self._disk_lock = threading.Lock()
+        self._disk_bytes: Optional[int] = None
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._evictions = 0
+        self._expired = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Busca um valor na memória e, em seguida, no disco"""
+        value = self._get_memory(key)
+        if value is _EXPIRED:
+            self._discard_disk(key)
+            return None
+        if value is _MISS:
+            return self._get_disk(key)
+        return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """Armazena um valor nas duas camadas, expirando após `ttl` segundos"""
+        expires_at = time.time() + ttl if ttl else None
+        self._set_memory(key, value, expires_at)
+        self._write_disk(key, value, expires_at)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Versão assíncrona de get; só o acesso a disco roda em thread"""
+        value = self._get_memory(key)
+        if value is _EXPIRED:
+            if self.directory is not None:
+                await asyncio.to_thread(self._discard_disk, key)
+            return None
+        if value is not _MISS:
+            return value
+        if self.directory is None:
+            return self._get_disk(key)
+        return await asyncio.to_thread(self._get_disk, key)
+
+    async def aset(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """Versão assíncrona de set; só a escrita em disco roda em thread"""
+        expires_at = time.time() + ttl if ttl else None
+        self._set_memory(key, value, expires_at)
+        if self.directory is not None:
+            await asyncio.to_thread(self._write_disk, key, value, expires_at)
+
+    def clear_memory(self) -> None:
+        """Esvazia apenas a camada em memória"""
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de acerto e falha do cache"""
+        lookups = self._memory_hits + self._disk_hits + self._misses
+        hits = self._memory_hits + self._disk_hits
+        return {
+            "memory_hits": self._memory_hits,
+            "disk_hits": self._disk_hits,
+            "misses": self._misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "writes": self._writes,
+            "evictions": self._evictions,
+            "expired": self._expired,
+            "memory_items": len(self._memory),
+            "disk_bytes": self._disk_bytes or 0
+        }
+
+    @staticmethod
+    def _expired_at(expires_at: Optional[float]) -> bool:
+        return expires_at is not None and time.time() >= expires_at
+
+    def _get_memory(self, key: str) -> Any:
+        """Valor em memória, `_MISS` se não estiver lá ou `_EXPIRED` se acabou de expirar"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return _MISS
+            if self._expired_at(entry[1]):
+                del self._memory[key]
+                self._expired += 1
+                self._misses += 1
+                return _EXPIRED
+            self._memory.move_to_end(key)
+            self._memory_hits += 1
+            return entry[0]
+
+    def _get_disk(self, key: str) -> Optional[str]:
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+            self._store_memory(key, *entry)
+        return entry[0]
+
+    def _set_memory(self, key: str, value: str, expires_at: Optional[float]) -> None:
+        with self._lock:
+            self._store_memory(key, value, expires_at)
+            self._writes += 1
+
+    def _store_memory(self, key: str, value: str, expires_at: Optional[float] = None) -> None:
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _discard_disk(self, key: str) -> None:
+        # A cópia em disco expira junto com a da memória
+        if self.directory is not None:
+            self._remove_entry(self._path(key))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _read_disk(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            expires_at = entry.get("expires_at")
+            if self._expired_at(expires_at):
+                self._remove_entry(path)
+                with self._lock:
+                    self._expired += 1
+                return None
+            # O mtime marca o último acesso para a evicção LRU
+            os.utime(path)
+            return entry["value"], expires_at
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError):
+            self._remove_entry(path)
+            return None
+
+    def _write_disk(self, key: str, value: str, expires_at: Optional[float] = None) -> None:
+        if self.directory is None:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            # Escrita atômica: arquivo temporário no mesmo diretório + rename
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    entry = {"value": value}
+                    if expires_at is not None:
+                        entry["expires_at"] = expires_at
+                    json.dump(entry, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                # Só o rename e a contabilidade do tamanho ficam sob a trava do disco
+                with self._disk_lock:
+                    current = self._current_disk_bytes()
+                    previous = os.path.getsize(path) if os.path.exists(path) else 0
+                    os.replace(tmp_path, path)
+                    self._disk_bytes = current - previous + os.path.getsize(path)
+                    if self.max_disk_bytes and self._disk_bytes > self.max_disk_bytes:
+                        self._evict_disk()
+            except BaseException:
+                self._remove(tmp_path)
+                raise
+        except OSError as e:
+            print(f"⚠️ Erro ao gravar cache em disco: {e}")
+
+    def _current_disk_bytes(self) -> int:
+        if self._disk_bytes is None:
+            self._disk_bytes = sum(size for _, _, size in self._scan_disk())
+        return self._disk_bytes
+
+    def _scan_disk(self):
+        """Lista (mtime, caminho, tamanho) das entradas, limpando temporários órfãos"""
+        entries = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith(".tmp"):
+                    # Restos de escritas interrompidas; outros processos podem estar gravando agora
+                    if time.time() - stat.st_mtime > 3600:
+                        self._remove(path)
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def _evict_disk(self) -> None:
+        entries = sorted(self._scan_disk())
+        total = sum(size for _, _, size in entries)
+        # Remove os menos usados até ficar abaixo de 90% do limite
+        target = int(self.max_disk_bytes * 0.9)
+        for _, path, size in entries:
+            if total <= target:
+                break
+            self._remove(path)
+            total -= size
+            self._evictions += 1
+        self._disk_bytes = total
+
+    def _remove_entry(self, path: str) -> None:
+        """Remove uma entrada fora da evicção, descontando seu tamanho do total em disco"""
+        with self._disk_lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                return
+            if self._disk_bytes is not None:
+                self._disk_bytes = max(self._disk_bytes - size, 0)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
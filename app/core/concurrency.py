@@ -0,0 +1,402 @@
+import asyncio
+import math
+import time
+import weakref
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Dict, Iterable, List, Optional
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+class ConcurrencyLimiter:
+    """Limite de concorrência compartilhado por todas as requisições do processo"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        # Um semáforo por event loop, já que asyncio.Semaphore fica preso ao loop em uso
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limit)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def __aenter__(self):
+        await self._semaphore().acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaphore().release()
+
+
+async def gather_limited(
+    aws: Iterable[Awaitable[Any]],
+    limit: int,
+    limiter: Optional[ConcurrencyLimiter] = None
+) -> List[Any]:
+    """
+    Executa awaitables concorrentemente, no máximo `limit` por vez,
+    preservando a ordem. Se um deles falhar, os demais são cancelados
+    antes de a exceção chegar a quem chamou.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(aw):
+        async with semaphore:
+            if limiter is None:
+                return await aw
+            async with limiter:
+                return await aw
+
+    tasks = [asyncio.ensure_future(run(aw)) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        # Uma falha (ou cancelamento) interrompe as demais tarefas e espera
+        # que terminem, para que quem chamou só libere recursos depois delas
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+class ClientDisconnectedError(Exception):
+    """O cliente encerrou a conexão antes da resposta"""
+
+
+async def cancel_on_disconnect(request, aw: Awaitable[Any], poll_interval: float = 0.5) -> Any:
+    """
+    Executa `aw` verificando periodicamente se o cliente desconectou; nesse
+    caso cancela a tarefa (OCR e chamadas ao LLM em andamento) e levanta
+    ClientDisconnectedError.
+    """
+    task = asyncio.ensure_future(aw)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                raise ClientDisconnectedError("Cliente desconectou antes do fim da análise")
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+class MemoryBudget:
+    """Orçamento de memória (em bytes) compartilhado pelas tarefas em andamento no processo"""
+
+    def __init__(self, limit_bytes: int):
+        self.limit = limit_bytes
+        self.in_use = 0
+        self.peak = 0
+        self.waiting = 0
+        self.queued = 0
+        # Uma condição por event loop, como em ConcurrencyLimiter
+        self._conditions = weakref.WeakKeyDictionary()
+
+    def _condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        condition = self._conditions.get(loop)
+        if condition is None:
+            condition = asyncio.Condition()
+            self._conditions[loop] = condition
+        return condition
+
+    async def acquire(self, amount: int, timeout: Optional[float] = None) -> None:
+        """Reserva `amount` bytes, aguardando até haver espaço (ou até o timeout)"""
+        if amount > self.limit:
+            raise ValueError(f"Reserva de {amount} bytes excede o orçamento de {self.limit} bytes")
+
+        condition = self._condition()
+        async with condition:
+            if self.in_use + amount > self.limit:
+                self.waiting += 1
+                self.queued += 1
+                try:
+                    await asyncio.wait_for(
+                        condition.wait_for(lambda: self.in_use + amount <= self.limit),
+                        timeout
+                    )
+                finally:
+                    self.waiting -= 1
+            self.in_use += amount
+            self.peak = max(self.peak, self.in_use)
+
+    async def release(self, amount: int) -> None:
+        """Devolve uma reserva e acorda quem está aguardando"""
+        condition = self._condition()
+        async with condition:
+            self.in_use -= amount
+            condition.notify_all()
+
+    @asynccontextmanager
+    async def reserve(self, amount: int, timeout: Optional[float] = None):
+        await self.acquire(amount, timeout)
+        try:
+            yield
+        finally:
+            await self.release(amount)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_use": self.in_use,
+            "peak": self.peak,
+            "waiting": self.waiting,
+            "queued": self.queued
+        }
+
+
+class RateLimiter:
+    """
+    Orçamentos de requisições e de tokens por minuto (token bucket),
+    compartilhados por todas as requisições do processo. Os baldes enchem
+    continuamente até o limite por minuto; quem não cabe aguarda, em ordem
+    de chegada. Limite 0 desativa o balde correspondente.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, clock=time.monotonic):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.requests = float(requests_per_minute)
+        self.tokens = float(tokens_per_minute)
+        self.clock = clock
+        self._updated = clock()
+        self.waits = 0
+        self.wait_seconds = 0.0
+        # Um lock por event loop, como em ConcurrencyLimiter; garante a ordem de chegada
+        self._locks = weakref.WeakKeyDictionary()
+
+    def _lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[loop] = lock
+        return lock
+
+    def _refill(self) -> None:
+        now = self.clock()
+        elapsed = now - self._updated
+        self._updated = now
+        self.requests = min(self.requests_per_minute, self.requests + elapsed * self.requests_per_minute / 60)
+        self.tokens = min(self.tokens_per_minute, self.tokens + elapsed * self.tokens_per_minute / 60)
+
+    def _wait_time(self, tokens: int) -> float:
+        """Segundos até os dois baldes comportarem a chamada"""
+        wait = 0.0
+        if self.requests_per_minute and self.requests < 1:
+            wait = max(wait, (1 - self.requests) * 60 / self.requests_per_minute)
+        if self.tokens_per_minute and self.tokens < tokens:
+            wait = max(wait, (tokens - self.tokens) * 60 / self.tokens_per_minute)
+        return wait
+
+    async def acquire(self, tokens: int) -> None:
+        """Reserva uma requisição e `tokens` tokens, aguardando os baldes encherem"""
+        if self.tokens_per_minute:
+            # Uma chamada maior que o orçamento inteiro espera o balde cheio, não para sempre
+            tokens = min(tokens, self.tokens_per_minute)
+
+        async with self._lock():
+            self._refill()
+            wait = self._wait_time(tokens)
+            if wait > 0:
+                self.waits += 1
+                self.wait_seconds += wait
+            while wait > 0:
+                await asyncio.sleep(wait)
+                self._refill()
+                wait = self._wait_time(tokens)
+
+            if self.requests_per_minute:
+                self.requests -= 1
+            if self.tokens_per_minute:
+                self.tokens -= tokens
+
+    def settle(self, reserved_tokens: int, used_tokens: int) -> None:
+        """Ajusta o balde com o consumo real informado pela API (pode ficar negativo)"""
+        if self.tokens_per_minute:
+            self.tokens = min(self.tokens_per_minute, self.tokens + reserved_tokens - used_tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "requests_available": round(self.requests, 2),
+            "tokens_available": round(self.tokens, 2),
+            "waits": self.waits,
+            "wait_seconds": round(self.wait_seconds, 3)
+        }
+
+
+
+class CircuitOpenError(Exception):
+    """O circuito está aberto: a dependência está falhando ou lenta demais"""
+
+
+class CircuitBreaker:
+    """
+    Circuito por taxa de erro e latência das últimas chamadas.
+
+    Fechado, registra o resultado e a duração das últimas `window_size`
+    chamadas; com pelo menos `min_calls`, abre quando a taxa de erro chega a
+    `error_rate_threshold`. A latência só é julgada com amostras suficientes
+    para que uma chamada lenta isolada não seja o p95 (20 para o p95): abre
+    quando o p95 (nearest-rank) passa de `latency_slo` segundos, medido
+    numa janela própria de pelo menos essas 20 chamadas (a da taxa de erro
+    continua com `window_size`). Aberto, recusa chamadas por `open_seconds`;
+    depois fica semiaberto e deixa passar até `half_open_probes` chamadas
+    de teste. Um teste bem-sucedido e dentro do SLO fecha o circuito; uma
+    falha reabre.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    LATENCY_PERCENTILE = 95
+    # Com menos amostras, o p95 é a própria chamada mais lenta
+    LATENCY_MIN_SAMPLES = math.ceil(100 / (100 - LATENCY_PERCENTILE))
+
+    def __init__(
+        self,
+        window_size: int = 20,
+        min_calls: int = 5,
+        error_rate_threshold: float = 0.5,
+        latency_slo: float = 20.0,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+        clock=time.monotonic
+    ):
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.latency_slo = latency_slo
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+        self.state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        # Sucesso das últimas `window_size` chamadas, para a taxa de erro
+        self._calls = deque(maxlen=window_size)
+        # Duração das últimas chamadas; a janela comporta a amostra mínima da latência
+        self._latencies = deque(maxlen=max(window_size, self.LATENCY_MIN_SAMPLES))
+        self.counters = Counter()
+
+    @property
+    def available(self) -> bool:
+        """Aceitaria uma chamada agora (sem reservar um teste do estado semiaberto)"""
+        if self.state == self.OPEN:
+            return self.clock() - self._opened_at >= self.open_seconds
+        if self.state == self.HALF_OPEN:
+            return self._probes < self.half_open_probes
+        return True
+
+    def before_call(self) -> None:
+        """Autoriza uma chamada ou levanta CircuitOpenError"""
+        if self.state == self.OPEN and self.clock() - self._opened_at >= self.open_seconds:
+            self.state = self.HALF_OPEN
+            self._probes = 0
+        if self.state == self.OPEN or (self.state == self.HALF_OPEN and self._probes >= self.half_open_probes):
+            self.counters["rejected"] += 1
+            raise CircuitOpenError("Circuito do LLM aberto: usando o fallback local")
+        if self.state == self.HALF_OPEN:
+            self._probes += 1
+            self.counters["probes"] += 1
+
+    def record_success(self, seconds: float) -> None:
+        self._record(True, seconds)
+
+    def record_failure(self, seconds: float) -> None:
+        self._record(False, seconds)
+
+    def record_cancelled(self, seconds: float) -> None:
+        """Chamada cancelada (fallback antecipado, cliente desconectado): só a duração conta"""
+        if self.state == self.HALF_OPEN:
+            self._probes = max(self._probes - 1, 0)
+        elif self.state == self.CLOSED and seconds > self.latency_slo:
+            self._record(True, seconds)
+
+    def _record(self, success: bool, seconds: float) -> None:
+        self.counters["successes" if success else "failures"] += 1
+        if self.state == self.HALF_OPEN:
+            self._probes = max(self._probes - 1, 0)
+            if success and seconds <= self.latency_slo:
+                self._close()
+            else:
+                self._open()
+            return
+        if self.state == self.OPEN:
+            # Chamada iniciada antes de o circuito abrir
+            return
+
+        self._calls.append(success)
+        self._latencies.append(seconds)
+        if len(self._calls) < self.min_calls:
+            return
+        if self.error_rate() >= self.error_rate_threshold or self._latency_exceeded():
+            self._open()
+
+    def _latency_exceeded(self) -> bool:
+        return (
+            len(self._latencies) >= self.LATENCY_MIN_SAMPLES
+            and self.latency_percentile(self.LATENCY_PERCENTILE) > self.latency_slo
+        )
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self._opened_at = self.clock()
+        self.counters["opened"] += 1
+
+    def _close(self) -> None:
+        self.state = self.CLOSED
+        self._calls.clear()
+        self._latencies.clear()
+        self.counters["closed"] += 1
+
+    def error_rate(self) -> float:
+        if not self._calls:
+            return 0.0
+        return sum(1 for success in self._calls if not success) / len(self._calls)
+
+    def latency_percentile(self, pct: float) -> float:
+        if not self._latencies:
+            return 0.0
+        ordered = sorted(self._latencies)
+        # Nearest-rank: menor valor com pelo menos pct% das amostras até ele
+        return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "state": self.state,
+            "error_rate": round(self.error_rate(), 4),
+            "p50_seconds": round(self.latency_percentile(50), 3),
+            "p95_seconds": round(self.latency_percentile(self.LATENCY_PERCENTILE), 3),
+            "p99_seconds": round(self.latency_percentile(99), 3),
+            "latency_slo_seconds": self.latency_slo
+        }
+
+
+ocr_global_limiter = ConcurrencyLimiter(settings.ocr_global_concurrency)
+llm_global_limiter = ConcurrencyLimiter(settings.llm_global_concurrency)
+llm_rate_limiter = RateLimiter(settings.llm_requests_per_minute, settings.llm_tokens_per_minute)
+
+llm_circuit_breaker = CircuitBreaker(
+    window_size=settings.llm_circuit_window,
+    min_calls=settings.llm_circuit_min_calls,
+    error_rate_threshold=settings.llm_circuit_error_rate,
+    latency_slo=settings.llm_circuit_latency_slo,
+    open_seconds=settings.llm_circuit_open_seconds,
+    half_open_probes=settings.llm_circuit_half_open_probes
+)
+
+metrics.register("llm_rate_limit", llm_rate_limiter.stats)
+metrics.register("llm_circuit", llm_circuit_breaker.stats)
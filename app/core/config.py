@@ -16,12 +16,79 @@ class Settings(BaseSettings):
     dynamodb_table_name: str = os.getenv("DYNAMODB_TABLE_NAME", "cv_analysis_logs")
     
     # OCR
-    ocr_provider: str = os.getenv("OCR_PROVIDER", "tesseract")
+    ocr_provider: str = os.getenv("OCR_PROVIDER", "auto")
+    ocr_min_quality: float = float(os.getenv("OCR_MIN_QUALITY", "0.8"))
     ocr_languages: str = os.getenv("OCR_LANGUAGES", "por+eng")
+    ocr_max_workers: int = int(os.getenv("OCR_MAX_WORKERS", str(os.cpu_count() or 1)))
+    ocr_max_tasks_per_child: int = int(os.getenv("OCR_MAX_TASKS_PER_CHILD", "50"))
+    ocr_queue_size: int = int(os.getenv("OCR_QUEUE_SIZE", "32"))
+    ocr_queue_timeout: float = float(os.getenv("OCR_QUEUE_TIMEOUT", "30"))
+    ocr_request_concurrency: int = int(os.getenv("OCR_REQUEST_CONCURRENCY", "4"))
+    ocr_global_concurrency: int = int(os.getenv("OCR_GLOBAL_CONCURRENCY", "16"))
+    ocr_file_timeout: float = float(os.getenv("OCR_FILE_TIMEOUT", "60"))
+    ocr_request_timeout: float = float(os.getenv("OCR_REQUEST_TIMEOUT", "120"))
+    ocr_memory_budget: int = int(os.getenv("OCR_MEMORY_BUDGET", str(1024 * 1024 * 1024)))
+    ocr_max_image_pixels: int = int(os.getenv("OCR_MAX_IMAGE_PIXELS", str(100_000_000)))
+    ocr_admission_timeout: float = float(os.getenv("OCR_ADMISSION_TIMEOUT", "30"))
+    ocr_tesseract_config: str = os.getenv("OCR_TESSERACT_CONFIG", "--oem 3 --psm 6")
+    ocr_pdf_dpi: int = int(os.getenv("OCR_PDF_DPI", "300"))
+    ocr_pdf_min_text_chars: int = int(os.getenv("OCR_PDF_MIN_TEXT_CHARS", "20"))
+    ocr_preprocess_enabled: bool = os.getenv("OCR_PREPROCESS_ENABLED", "true").lower() == "true"
+    ocr_target_dpi: int = int(os.getenv("OCR_TARGET_DPI", "300"))
+    ocr_binarize: bool = os.getenv("OCR_BINARIZE", "true").lower() == "true"
+    ocr_deskew: bool = os.getenv("OCR_DESKEW", "false").lower() == "true"
+    ocr_engine: str = os.getenv("OCR_ENGINE", "inprocess")
+    ocr_adaptive_enabled: bool = os.getenv("OCR_ADAPTIVE_ENABLED", "true").lower() == "true"
+    ocr_adaptive_min_confidence: float = float(os.getenv("OCR_ADAPTIVE_MIN_CONFIDENCE", "60"))
+    ocr_adaptive_fallback_config: str = os.getenv("OCR_ADAPTIVE_FALLBACK_CONFIG", "--oem 3 --psm 3")
+    ocr_language_routing: bool = os.getenv("OCR_LANGUAGE_ROUTING", "true").lower() == "true"
+    ocr_language_sample_scale: float = float(os.getenv("OCR_LANGUAGE_SAMPLE_SCALE", "0.5"))
+    ocr_cache_enabled: bool = os.getenv("OCR_CACHE_ENABLED", "true").lower() == "true"
+    ocr_page_cache_enabled: bool = os.getenv("OCR_PAGE_CACHE_ENABLED", "true").lower() == "true"
+    ocr_cache_memory_items: int = int(os.getenv("OCR_CACHE_MEMORY_ITEMS", "256"))
+    ocr_cache_dir: str = os.getenv("OCR_CACHE_DIR", ".cache/ocr")
+    ocr_cache_max_bytes: int = int(os.getenv("OCR_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    
+    # Uploads
+    upload_chunk_size: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(256 * 1024)))
+    upload_spool_threshold: int = int(os.getenv("UPLOAD_SPOOL_THRESHOLD", str(1024 * 1024)))
+    upload_spool_dir: str = os.getenv("UPLOAD_SPOOL_DIR", "")
     
     # LLM
     llm_provider: str = os.getenv("LLM_PROVIDER", "openai")
     llm_model: str = os.getenv("LLM_MODEL", "gpt-4o-mini")
+    llm_request_concurrency: int = int(os.getenv("LLM_REQUEST_CONCURRENCY", "10"))
+    llm_global_concurrency: int = int(os.getenv("LLM_GLOBAL_CONCURRENCY", "16"))
+    llm_cv_token_budget: int = int(os.getenv("LLM_CV_TOKEN_BUDGET", "1200"))
+    llm_summary_token_budget: int = int(os.getenv("LLM_SUMMARY_TOKEN_BUDGET", "900"))
+    llm_summary_batch_enabled: bool = os.getenv("LLM_SUMMARY_BATCH_ENABLED", "true").lower() == "true"
+    llm_summary_batch_tokens: int = int(os.getenv("LLM_SUMMARY_BATCH_TOKENS", "2400"))
+    llm_summary_batch_cv_tokens: int = int(os.getenv("LLM_SUMMARY_BATCH_CV_TOKENS", "400"))
+    llm_summary_batch_max_items: int = int(os.getenv("LLM_SUMMARY_BATCH_MAX_ITEMS", "8"))
+    llm_query_mode: str = os.getenv("LLM_QUERY_MODE", "map_reduce")
+    llm_query_reduce: str = os.getenv("LLM_QUERY_REDUCE", "llm")
+    llm_requests_per_minute: int = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+    llm_tokens_per_minute: int = int(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+    llm_http_max_connections: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20"))
+    llm_http_max_keepalive: int = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "10"))
+    llm_http_keepalive_expiry: float = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60"))
+    llm_http_connect_timeout: float = float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", "5"))
+    llm_http_read_timeout: float = float(os.getenv("LLM_HTTP_READ_TIMEOUT", "60"))
+    llm_http2: bool = os.getenv("LLM_HTTP2", "false").lower() == "true"
+    llm_circuit_enabled: bool = os.getenv("LLM_CIRCUIT_ENABLED", "true").lower() == "true"
+    # Janela da taxa de erro; o p95 da latência usa pelo menos 20 chamadas, mesmo com janela menor
+    llm_circuit_window: int = int(os.getenv("LLM_CIRCUIT_WINDOW", "20"))
+    llm_circuit_min_calls: int = int(os.getenv("LLM_CIRCUIT_MIN_CALLS", "5"))
+    llm_circuit_error_rate: float = float(os.getenv("LLM_CIRCUIT_ERROR_RATE", "0.5"))
+    llm_circuit_latency_slo: float = float(os.getenv("LLM_CIRCUIT_LATENCY_SLO", "20"))
+    llm_circuit_open_seconds: float = float(os.getenv("LLM_CIRCUIT_OPEN_SECONDS", "30"))
+    llm_circuit_half_open_probes: int = int(os.getenv("LLM_CIRCUIT_HALF_OPEN_PROBES", "1"))
+    llm_hedge_delay: float = float(os.getenv("LLM_HEDGE_DELAY", "0"))
+    llm_cache_enabled: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    llm_cache_ttl: int = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+    llm_cache_memory_items: int = int(os.getenv("LLM_CACHE_MEMORY_ITEMS", "512"))
+    llm_cache_dir: str = os.getenv("LLM_CACHE_DIR", ".cache/llm")
+    llm_cache_max_bytes: int = int(os.getenv("LLM_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
     
     # OpenAI
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
@@ -33,6 +100,7 @@ class Settings(BaseSettings):
     max_file_size: int = 10 * 1024 * 1024  # 10MB
     allowed_extensions: Set[str] = {'.pdf', '.jpg', '.jpeg', '.png'}
     max_files_per_request: int = 10
+    max_request_body_size: int = int(os.getenv("MAX_REQUEST_BODY_SIZE", str(max_file_size * max_files_per_request + 1024 * 1024)))
     
     class Config:
         env_file = ".env"
@@ -1,7 +1,7 @@
 import logging
 import json
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 logging.basicConfig(
     level=logging.INFO,
@@ -45,3 +45,15 @@ def log_error(error: Exception, context: Dict[str, Any] = None):
     }
     
     logger.error(json.dumps(log_data))
+
+def log_ocr_report(filename: Optional[str], report: Dict[str, Any]):
+    """Log estruturado das decisões e tempos do OCR de um arquivo"""
+    log_data = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "level": "INFO",
+        "event": "ocr_report",
+        "filename": filename,
+        **report
+    }
+    
+    logger.info(json.dumps(log_data))
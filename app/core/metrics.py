@@ -0,0 +1,19 @@
+from typing import Any, Callable, Dict
+
+
+class MetricsRegistry:
+    """Registro de fontes de métricas expostas pela API"""
+
+    def __init__(self):
+        self._sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def register(self, name: str, source: Callable[[], Dict[str, Any]]) -> None:
+        """Registra uma função que retorna as métricas de um componente"""
+        self._sources[name] = source
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Coleta as métricas de todos os componentes registrados"""
+        return {name: source() for name, source in self._sources.items()}
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,235 @@
+import json
+import os
+import re
+from typing import Optional
+from app.core.config import settings
+
+# Assinaturas (magic bytes) aceitas para cada extensão suportada
+MAGIC_NUMBERS = {
+    ".pdf": (b"%PDF-",),
+    ".png": (b"\x89PNG\r\n\x1a\n",),
+    ".jpg": (b"\xff\xd8\xff",),
+    ".jpeg": (b"\xff\xd8\xff",),
+}
+SNIFF_BYTES = 8
+MAX_PART_HEADERS = 16 * 1024
+
+
+class UploadRejected(Exception):
+    """Upload recusado durante o recebimento do corpo"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class _MultipartScanner:
+    """
+    Leitor incremental de multipart/form-data que só observa o stream:
+    conta arquivos, mede o tamanho de cada um e confere os primeiros bytes,
+    sem decodificar nem armazenar o conteúdo.
+    """
+
+    def __init__(self, boundary: bytes, max_file_size: int, max_files: int):
+        self.delimiter = b"\r\n--" + boundary
+        self.max_file_size = max_file_size
+        self.max_files = max_files
+        # O primeiro delimitador não é precedido de CRLF
+        self.buffer = bytearray(b"\r\n")
+        self.state = "preamble"
+        self.files = 0
+        self.filename: Optional[str] = None
+        self.part_size = 0
+        self.head = bytearray()
+
+    def feed(self, data: bytes) -> None:
+        self.buffer.extend(data)
+        while self._step():
+            pass
+
+    def _step(self) -> bool:
+        if self.state == "preamble":
+            index = self.buffer.find(self.delimiter)
+            if index < 0:
+                del self.buffer[:max(0, len(self.buffer) - len(self.delimiter))]
+                return False
+            del self.buffer[:index + len(self.delimiter)]
+            self.state = "after_delimiter"
+            return True
+
+        if self.state == "after_delimiter":
+            if len(self.buffer) < 2:
+                return False
+            if self.buffer[:2] == b"--":
+                self.state = "epilogue"
+                self.buffer.clear()
+                return False
+            self.state = "headers"
+            return True
+
+        if self.state == "headers":
+            index = self.buffer.find(b"\r\n\r\n")
+            if index < 0:
+                if len(self.buffer) > MAX_PART_HEADERS:
+                    raise UploadRejected(413, "Cabeçalhos do multipart muito grandes")
+                return False
+            self._start_part(bytes(self.buffer[:index]))
+            del self.buffer[:index + 4]
+            self.state = "body"
+            return True
+
+        if self.state == "body":
+            index = self.buffer.find(self.delimiter)
+            if index < 0:
+                # Mantém o suficiente para achar um delimitador dividido entre blocos
+                keep = len(self.delimiter) - 1
+                consumed = max(0, len(self.buffer) - keep)
+                self._consume_body(bytes(self.buffer[:consumed]))
+                del self.buffer[:consumed]
+                return False
+            self._consume_body(bytes(self.buffer[:index]))
+            self._end_part()
+            del self.buffer[:index + len(self.delimiter)]
+            self.state = "after_delimiter"
+            return True
+
+        self.buffer.clear()
+        return False
+
+    def _start_part(self, raw_headers: bytes) -> None:
+        match = re.search(rb'filename="([^"]*)"', raw_headers, re.IGNORECASE)
+        self.filename = match.group(1).decode("utf-8", "replace") if match else None
+        self.part_size = 0
+        self.head = bytearray()
+        if self.filename is not None:
+            self.files += 1
+            if self.files > self.max_files:
+                raise UploadRejected(413, f"Máximo de {self.max_files} arquivos por requisição")
+
+    def _consume_body(self, data: bytes) -> None:
+        if self.filename is None or not data:
+            return
+        self.part_size += len(data)
+        if self.part_size > self.max_file_size:
+            raise UploadRejected(
+                413,
+                f"Arquivo muito grande: {self.filename}. "
+                f"Tamanho máximo: {self.max_file_size // (1024*1024)}MB"
+            )
+        if len(self.head) < SNIFF_BYTES:
+            self.head.extend(data[:SNIFF_BYTES - len(self.head)])
+            if len(self.head) >= SNIFF_BYTES:
+                self._check_signature()
+
+    def _end_part(self) -> None:
+        if self.filename is not None and len(self.head) < SNIFF_BYTES:
+            self._check_signature()
+        self.filename = None
+
+    def _check_signature(self) -> None:
+        extension = os.path.splitext(self.filename.lower())[1]
+        signatures = MAGIC_NUMBERS.get(extension)
+        # Extensões não suportadas são recusadas por validate_files
+        if signatures and not any(bytes(self.head).startswith(sig) for sig in signatures):
+            raise UploadRejected(
+                415,
+                f"Conteúdo do arquivo {self.filename} não corresponde a um {extension[1:].upper()} válido"
+            )
+
+
+class UploadLimitMiddleware:
+    """
+    Middleware ASGI que aplica os limites de upload enquanto o corpo chega,
+    antes do parsing do multipart pelo Starlette, encerrando a requisição
+    com 413/415 assim que um limite é violado.
+    """
+
+    def __init__(
+        self,
+        app,
+        max_file_size: int = settings.max_file_size,
+        max_files: int = settings.max_files_per_request,
+        max_body_size: int = settings.max_request_body_size
+    ):
+        self.app = app
+        self.max_file_size = max_file_size
+        self.max_files = max_files
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_body_size:
+            await self._reject(send, UploadRejected(413, self._body_too_large()))
+            return
+
+        scanner = None
+        boundary = _multipart_boundary(headers.get(b"content-type", b""))
+        if boundary:
+            scanner = _MultipartScanner(boundary, self.max_file_size, self.max_files)
+
+        received = 0
+        rejection: Optional[UploadRejected] = None
+
+        async def limited_receive():
+            nonlocal received, rejection
+            if rejection is not None:
+                return {"type": "http.disconnect"}
+
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                received += len(body)
+                try:
+                    if received > self.max_body_size:
+                        raise UploadRejected(413, self._body_too_large())
+                    if scanner is not None:
+                        scanner.feed(body)
+                except UploadRejected as e:
+                    rejection = e
+                    # Faz a aplicação abandonar a leitura do corpo
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            if rejection is None:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if rejection is None:
+                raise
+
+        if rejection is not None:
+            await self._reject(send, rejection)
+
+    def _body_too_large(self) -> str:
+        return f"Requisição muito grande. Tamanho máximo: {self.max_body_size // (1024*1024)}MB"
+
+    @staticmethod
+    async def _reject(send, rejection: UploadRejected) -> None:
+        body = json.dumps({"detail": rejection.detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": rejection.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def _multipart_boundary(content_type: bytes) -> Optional[bytes]:
+    """Extrai o boundary de um Content-Type multipart/form-data"""
+    if not content_type.lower().startswith(b"multipart/form-data"):
+        return None
+    match = re.search(rb'boundary="?([^";]+)"?', content_type, re.IGNORECASE)
+    return match.group(1) if match else None
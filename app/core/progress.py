@@ -0,0 +1,37 @@
+"""
+Eventos de progresso de uma análise.
+
+O endpoint de streaming registra um ouvinte no contexto da tarefa; OCR e
+LLM emitem eventos (arquivo extraído, resumo pronto, análise parcial) sem
+que as interfaces dos serviços mudem. Fora do streaming não há ouvinte e
+`emit_progress` não faz nada. As tarefas criadas durante a análise herdam o
+contexto, então eventos emitidos dentro de `gather_limited` também chegam.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+
+_listener: ContextVar[Optional[ProgressCallback]] = ContextVar("analysis_progress", default=None)
+
+
+def progress_enabled() -> bool:
+    """Há alguém recebendo os eventos desta análise"""
+    return _listener.get() is not None
+
+
+def emit_progress(event: str, data: Dict[str, Any]) -> None:
+    listener = _listener.get()
+    if listener is not None:
+        listener(event, data)
+
+
+@contextmanager
+def progress_listener(callback: ProgressCallback):
+    """Envia ao `callback` os eventos emitidos dentro do bloco"""
+    token = _listener.set(callback)
+    try:
+        yield
+    finally:
+        _listener.reset(token)
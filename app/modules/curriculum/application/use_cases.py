@@ -1,10 +1,12 @@
+import asyncio
 import time
-from typing import List, Optional, Dict
+from typing import Any, AsyncIterator, List, Optional, Dict, Tuple
 from fastapi import UploadFile
-from app.modules.curriculum.domain.entities import CurriculumAnalysis, AnalysisResult
+from app.modules.curriculum.domain.entities import CurriculumAnalysis, AnalysisResult, ExtractionStatus
 from app.modules.curriculum.domain.services import OCRService, LLMService, LogService
 from app.modules.curriculum.application.interfaces import AnalysisRepository
 from app.core.logging import log_analysis_request, log_error
+from app.core.progress import emit_progress, progress_listener
 
 class AnalyzeCurriculaUseCase:
     """Caso de uso para análise de currículos"""
@@ -34,6 +36,14 @@ class AnalyzeCurriculaUseCase:
         
         try:
             file_texts = await self.ocr_service.extract_text_from_files(files)
+            file_statuses = self.ocr_service.get_extraction_statuses()
+            
+            # Arquivos que estouraram o prazo do OCR não seguem para o LLM
+            file_texts = {
+                filename: text for filename, text in file_texts.items()
+                if file_statuses.get(filename, {}).get("status") != ExtractionStatus.TIMED_OUT
+            }
+            emit_progress("ocr_complete", {"file_statuses": file_statuses, "files_analyzed": list(file_texts)})
             
             if query:
                 result = await self.llm_service.analyze_with_query(file_texts, query)
@@ -73,6 +83,7 @@ class AnalyzeCurriculaUseCase:
                 "files_processed": len(files),
                 "processing_time_seconds": processing_time,
                 "result": result,
+                "file_statuses": file_statuses,
                 "message": "Análise concluída com sucesso!"
             }
             
@@ -103,6 +114,49 @@ class AnalyzeCurriculaUseCase:
             await self.log_service.save_log(error_analysis.__dict__)
             
             raise e
+    
+    async def stream(
+        self,
+        files: List[UploadFile],
+        query: Optional[str],
+        request_id: str,
+        user_id: str
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Executa a análise emitindo (evento, dados) à medida que cada etapa
+        termina: OCR de cada arquivo, resumos ou análises por candidato e
+        versões parciais da análise. O último evento é "result", com a mesma
+        resposta de `execute`, ou "error". Fechar o gerador cancela a análise.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        async def run():
+            with progress_listener(lambda event, data: queue.put_nowait((event, data))):
+                return await self.execute(files, query, request_id, user_id)
+        
+        task = asyncio.ensure_future(run())
+        try:
+            yield "started", {"request_id": request_id, "files": [f.filename for f in files]}
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait({task, getter}, return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    yield getter.result()
+                    continue
+                # Eventos que chegaram junto com o fim da análise continuam na fila
+                getter.cancel()
+                break
+            while not queue.empty():
+                yield queue.get_nowait()
+            
+            try:
+                yield "result", task.result()
+            except Exception as e:
+                yield "error", {"code": getattr(e, "status_code", 500), "detail": str(e)}
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
 
 class GetAnalysisHistoryUseCase:
     """Caso de uso para buscar histórico de análises"""
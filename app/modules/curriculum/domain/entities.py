@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from datetime import datetime
+from enum import Enum
 from typing import List, Optional, Dict, Any
 
 @dataclass
@@ -31,3 +32,9 @@ class AnalysisResult:
     analysis: str
     files_analyzed: List[str]
     processing_time: float
+
+class ExtractionStatus(str, Enum):
+    """Situação da extração de texto de um arquivo"""
+    OK = "ok"
+    ERROR = "error"
+    TIMED_OUT = "timed_out"
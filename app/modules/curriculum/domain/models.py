@@ -22,6 +22,12 @@ class QueryAnalysisResponse(BaseModel):
     recommendations: List[str] = Field(description="Recomendações para o recrutador")
     next_steps: List[str] = Field(description="Próximos passos sugeridos")
 
+class QueryAnalysisSynthesis(BaseModel):
+    """Conclusão da análise com query a partir das análises individuais já ranqueadas"""
+    summary: str = Field(description="Resumo geral da análise")
+    recommendations: List[str] = Field(description="Recomendações para o recrutador")
+    next_steps: List[str] = Field(description="Próximos passos sugeridos")
+
 class ResumeSummary(BaseModel):
     """Resumo estruturado de um currículo"""
     filename: str = Field(description="Nome do arquivo")
@@ -32,6 +38,10 @@ class ResumeSummary(BaseModel):
     education: Optional[str] = Field(description="Formação acadêmica", default=None)
     contact_info: Optional[str] = Field(description="Informações de contato", default=None)
 
+class ResumeSummaryBatch(BaseModel):
+    """Resumos de vários currículos curtos gerados em uma única chamada"""
+    summaries: List[ResumeSummary] = Field(description="Um resumo por currículo, com o nome de arquivo informado")
+
 class SummaryResponse(BaseModel):
     """Resposta estruturada para resumos automáticos"""
     summaries: List[ResumeSummary] = Field(description="Resumos dos currículos")
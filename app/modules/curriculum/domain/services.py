@@ -9,6 +9,10 @@ class OCRService(ABC):
     async def extract_text_from_files(self, files: List[UploadFile]) -> Dict[str, str]:
         """Extrai texto de múltiplos arquivos"""
         pass
+    
+    def get_extraction_statuses(self) -> Dict[str, Dict]:
+        """Situação da extração de cada arquivo da última chamada (status e detalhe)"""
+        return {}
 
 class LLMService(ABC):
     """Interface para serviços LLM"""
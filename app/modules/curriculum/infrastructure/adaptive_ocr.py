@@ -0,0 +1,179 @@
+"""
+OCR adaptativo em duas passadas guiado pela confiança das palavras.
+
+A primeira passada usa a configuração normal e lê a confiança de cada
+palavra. Só o que ficou abaixo do limite volta ao Tesseract:
+
+- página inteira com confiança média baixa: nova passada com outro modo de
+  segmentação (por exemplo, psm 3 para layouts em colunas), mantendo o
+  resultado de maior confiança;
+- linhas com confiança baixa: recortadas, ampliadas e relidas como linha
+  única (psm 7), substituindo o texto só quando a confiança melhora.
+
+Currículos limpos terminam na primeira passada.
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from PIL import Image
+from app.modules.curriculum.infrastructure import tesseract_engine
+
+LINE_PSM = 7
+LINE_UPSCALE = 2
+LINE_PADDING = 4
+MAX_REFINED_LINES = 40
+
+
+class Word(NamedTuple):
+    block: int
+    par: int
+    line: int
+    left: int
+    top: int
+    width: int
+    height: int
+    conf: float
+    text: str
+
+
+@dataclass
+class ConfidenceStats:
+    """Estatísticas de confiança do OCR de uma imagem ou página"""
+    words: int = 0
+    mean_confidence: float = 0.0
+    low_confidence_words: int = 0
+    refined_lines: int = 0
+    fallback_pass: bool = False
+    passes: int = 1
+
+    @classmethod
+    def combine(cls, items: List["ConfidenceStats"]) -> Optional["ConfidenceStats"]:
+        """Agrega as estatísticas das páginas de um arquivo (média ponderada por palavras)"""
+        items = [item for item in items if item is not None]
+        if not items:
+            return None
+        words = sum(item.words for item in items)
+        return cls(
+            words=words,
+            mean_confidence=round(sum(item.mean_confidence * item.words for item in items) / words, 2) if words else 0.0,
+            low_confidence_words=sum(item.low_confidence_words for item in items),
+            refined_lines=sum(item.refined_lines for item in items),
+            fallback_pass=any(item.fallback_pass for item in items),
+            passes=sum(item.passes for item in items)
+        )
+
+
+def recognize(
+    image: Image.Image,
+    languages: str,
+    config: str,
+    engine: str,
+    min_confidence: float,
+    fallback_config: str = ""
+) -> Tuple[str, ConfidenceStats]:
+    """Reconhece o texto da imagem refazendo apenas as regiões de baixa confiança"""
+    words = _read_words(image, languages, config, engine)
+    passes = 1
+    fallback_pass = False
+
+    # Imagens sem nenhuma palavra (páginas em branco) não ganham nova passada
+    if words and _mean(words) < min_confidence and fallback_config and fallback_config != config:
+        retry = _read_words(image, languages, fallback_config, engine)
+        passes += 1
+        if retry and _mean(retry) > _mean(words):
+            words, config, fallback_pass = retry, fallback_config, True
+
+    lines = _group_lines(words)
+    line_config = _with_psm(config, LINE_PSM)
+    low_lines = [key for key, line_words in lines.items() if _mean(line_words) < min_confidence]
+    refined = 0
+
+    for key in low_lines[:MAX_REFINED_LINES]:
+        crop = _upscaled_crop(image, lines[key])
+        retry = _read_words(crop, languages, line_config, engine)
+        passes += 1
+        if retry and _mean(retry) > _mean(lines[key]):
+            lines[key] = [word._replace(block=key[0], par=key[1], line=key[2]) for word in retry]
+            refined += 1
+
+    final_words = [word for line_words in lines.values() for word in line_words]
+    stats = ConfidenceStats(
+        words=len(final_words),
+        mean_confidence=round(_mean(final_words), 2),
+        low_confidence_words=sum(1 for word in final_words if word.conf < min_confidence),
+        refined_lines=refined,
+        fallback_pass=fallback_pass,
+        passes=passes
+    )
+    return _assemble(lines), stats
+
+
+def parse_tsv(tsv: str) -> List[Word]:
+    """Converte a saída TSV do Tesseract nas palavras reconhecidas"""
+    words = []
+    for row in tsv.splitlines():
+        columns = row.split("\t", 11)
+        # Ignora o cabeçalho e as linhas de bloco/parágrafo/linha (level != 5)
+        if len(columns) < 12 or columns[0] != "5":
+            continue
+        text = columns[11].strip()
+        conf = float(columns[10])
+        if not text or conf < 0:
+            continue
+        words.append(Word(
+            block=int(columns[2]),
+            par=int(columns[3]),
+            line=int(columns[4]),
+            left=int(columns[6]),
+            top=int(columns[7]),
+            width=int(columns[8]),
+            height=int(columns[9]),
+            conf=conf,
+            text=text
+        ))
+    return words
+
+
+def _read_words(image: Image.Image, languages: str, config: str, engine: str) -> List[Word]:
+    return parse_tsv(tesseract_engine.image_to_data(image, languages, config, engine=engine))
+
+
+def _mean(words: List[Word]) -> float:
+    return sum(word.conf for word in words) / len(words) if words else 0.0
+
+
+def _group_lines(words: List[Word]) -> Dict[Tuple[int, int, int], List[Word]]:
+    """Agrupa as palavras por linha, na ordem de leitura do Tesseract"""
+    lines: Dict[Tuple[int, int, int], List[Word]] = {}
+    for word in words:
+        lines.setdefault((word.block, word.par, word.line), []).append(word)
+    return lines
+
+
+def _upscaled_crop(image: Image.Image, words: List[Word]) -> Image.Image:
+    """Recorta a caixa da linha com margem e amplia para a segunda passada"""
+    left = max(0, min(word.left for word in words) - LINE_PADDING)
+    top = max(0, min(word.top for word in words) - LINE_PADDING)
+    right = min(image.width, max(word.left + word.width for word in words) + LINE_PADDING)
+    bottom = min(image.height, max(word.top + word.height for word in words) + LINE_PADDING)
+    crop = image.crop((left, top, right, bottom))
+    return crop.resize((crop.width * LINE_UPSCALE, crop.height * LINE_UPSCALE), Image.Resampling.LANCZOS)
+
+
+def _with_psm(config: str, psm: int) -> str:
+    """Troca (ou adiciona) o modo de segmentação na configuração do Tesseract"""
+    if re.search(r"--psm\s+\d+", config):
+        return re.sub(r"--psm\s+\d+", f"--psm {psm}", config)
+    return f"{config} --psm {psm}".strip()
+
+
+def _assemble(lines: Dict[Tuple[int, int, int], List[Word]]) -> str:
+    """Monta o texto com uma linha em branco entre parágrafos"""
+    parts = []
+    previous = None
+    for (block, par, _), words in lines.items():
+        if previous is not None and previous != (block, par):
+            parts.append("")
+        parts.append(" ".join(word.text for word in words))
+        previous = (block, par)
+    return "\n".join(parts).strip()
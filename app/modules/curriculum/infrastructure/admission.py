@@ -0,0 +1,268 @@
+"""
+Controle de admissão do OCR pelo tamanho decodificado dos arquivos.
+
+Um JPEG de 2MB pode virar centenas de MB de bitmap. Antes de decodificar,
+lê apenas os cabeçalhos (dimensões e bandas da imagem, páginas e tamanhos
+do PDF), estima o pico de memória do pipeline e reserva esse valor num
+orçamento global. Quando o arquivo não cabe no orçamento, é reduzido
+(teto de pixels para imagens, DPI menor para PDFs); se nem assim couber,
+a requisição é recusada. Arquivos que cabem mas encontram o orçamento
+ocupado aguardam na fila até OCR_ADMISSION_TIMEOUT.
+
+PDFs são admitidos em duas etapas: a leitura da camada de texto reserva
+um valor pequeno e fixo, e a memória da rasterização só é reservada para
+as páginas que continuam pendentes depois dela e do cache de páginas. Um
+PDF digital não ocupa o orçamento com OCR que nunca vai acontecer.
+"""
+import asyncio
+import math
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional
+from app.core.concurrency import MemoryBudget
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.modules.curriculum.infrastructure.image_preprocessing import estimate_dpi
+from app.modules.curriculum.infrastructure.ocr_workers import OCROptions
+from app.modules.curriculum.infrastructure.uploads import SpooledUpload
+
+# Bytes por pixel processado, estimados a partir das cópias feitas no pipeline
+TESSERACT_BYTES_PER_PIXEL = 8
+# Binarização: cópia float32, somas acumuladas float64 e média local
+BINARIZE_BYTES_PER_PIXEL = 24
+# Pixmap em tons de cinza do PyMuPDF + cópia para o PIL
+PDF_RASTER_BYTES_PER_PIXEL = 2
+# Leitura da camada de texto e hash das páginas, somada ao tamanho do arquivo
+PDF_TEXT_LAYER_BYTES = 16 * 1024 * 1024
+
+MIN_IMAGE_PIXELS = 1_000_000
+MIN_PDF_DPI = 150
+
+
+class AdmissionRejectedError(Exception):
+    """Arquivo recusado pelo controle de admissão do OCR"""
+
+    def __init__(self, message: str, status_code: int = 413):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class AdmissionPlan:
+    """Resultado da inspeção: opções a usar, memória estimada e custo do OCR"""
+    options: OCROptions
+    peak_bytes: int = 0
+    ocr_pixels: int = 0
+    pages: int = 0
+    downscaled: bool = False
+    rejection: Optional[str] = None
+    filename: str = ""
+    # PDFs: pixels de cada página no DPI escolhido, reservados só se a página for ao OCR
+    page_pixels: List[int] = field(default_factory=list)
+
+
+def plan_admission(
+    upload: SpooledUpload,
+    options: OCROptions,
+    budget_bytes: int,
+    max_image_pixels: int,
+    parallel_pages: int = 1
+) -> AdmissionPlan:
+    """Inspeciona só os cabeçalhos do arquivo e decide como admiti-lo"""
+    try:
+        if upload.filename.lower().endswith(".pdf"):
+            plan = _plan_pdf(upload, options, budget_bytes, parallel_pages)
+        else:
+            plan = _plan_image(upload, options, budget_bytes, max_image_pixels)
+    except Exception:
+        # Arquivos ilegíveis seguem para a extração, que reporta o erro
+        plan = AdmissionPlan(options=options)
+    plan.filename = upload.filename
+    return plan
+
+
+def estimate_image_peak(
+    width: int,
+    height: int,
+    bands: int,
+    is_jpeg: bool,
+    dpi: float,
+    options: OCROptions,
+    max_pixels: int = 0
+) -> AdmissionPlan:
+    """Pico de memória estimado para decodificar, pré-processar e reconhecer uma imagem"""
+    pixels = width * height
+    scale = min(1.0, options.target_dpi / dpi) if options.preprocess else 1.0
+    if max_pixels:
+        scale = min(scale, math.sqrt(max_pixels / pixels))
+
+    # JPEG pode ser decodificado já reduzido em 1/2, 1/4 ou 1/8
+    decode_scale = 1.0
+    if is_jpeg and scale < 1.0:
+        decode_scale = 1.0 / 2 ** min(3, int(math.log2(1.0 / scale)))
+
+    decoded = pixels * decode_scale ** 2
+    processed = pixels * scale ** 2
+    per_pixel = TESSERACT_BYTES_PER_PIXEL + (BINARIZE_BYTES_PER_PIXEL if options.preprocess and options.binarize else 0)
+    # Bitmap decodificado + cópia em tons de cinza + estruturas do pipeline
+    peak = decoded * bands + decoded + processed * per_pixel
+    return AdmissionPlan(options=options, peak_bytes=int(peak), ocr_pixels=int(processed), pages=1)
+
+
+def _plan_image(upload: SpooledUpload, options: OCROptions, budget_bytes: int, max_image_pixels: int) -> AdmissionPlan:
+    import io
+    from PIL import Image
+
+    source = upload.source
+    with Image.open(source if isinstance(source, str) else io.BytesIO(source)) as image:
+        width, height = image.size
+        bands = len(image.getbands())
+        is_jpeg = image.format == "JPEG"
+        dpi = estimate_dpi(image)
+
+    if width * height > max_image_pixels:
+        return AdmissionPlan(
+            options=options,
+            rejection=f"Imagem {upload.filename} ({width}x{height}) excede o limite de "
+                      f"{max_image_pixels // 1_000_000} megapixels"
+        )
+
+    plan = estimate_image_peak(width, height, bands, is_jpeg, dpi, options)
+    max_pixels = plan.ocr_pixels
+    while plan.peak_bytes > budget_bytes and max_pixels > MIN_IMAGE_PIXELS:
+        max_pixels = max(MIN_IMAGE_PIXELS, max_pixels // 2)
+        plan = estimate_image_peak(width, height, bands, is_jpeg, dpi, options, max_pixels)
+        plan.options = replace(options, max_pixels=max_pixels)
+        plan.downscaled = True
+
+    if plan.peak_bytes > budget_bytes:
+        plan.rejection = (
+            f"Imagem {upload.filename} ({width}x{height}) precisa de ~{plan.peak_bytes // (1024*1024)}MB "
+            f"para o OCR, acima do orçamento de {budget_bytes // (1024*1024)}MB"
+        )
+    return plan
+
+
+def _plan_pdf(upload: SpooledUpload, options: OCROptions, budget_bytes: int, parallel_pages: int) -> AdmissionPlan:
+    import fitz
+
+    source = upload.source
+    doc = fitz.open(source, filetype="pdf") if isinstance(source, str) else fitz.open(stream=source, filetype="pdf")
+    try:
+        # Dimensões em pontos (1/72 pol.), lidas sem renderizar as páginas
+        sizes = [(page.rect.width, page.rect.height) for page in doc]
+    finally:
+        doc.close()
+
+    per_pixel = PDF_RASTER_BYTES_PER_PIXEL + TESSERACT_BYTES_PER_PIXEL
+    concurrent = min(len(sizes), max(1, parallel_pages))
+
+    def page_pixels(dpi: int) -> List[int]:
+        return [int((width / 72 * dpi) * (height / 72 * dpi)) for width, height in sizes] or [0]
+
+    def ocr_peak(dpi: int) -> int:
+        # Pior caso, usado para escolher o DPI: todas as páginas sem camada de texto, em paralelo
+        return max(page_pixels(dpi)) * per_pixel * concurrent
+
+    dpi = options.pdf_dpi
+    while ocr_peak(dpi) > budget_bytes and dpi > MIN_PDF_DPI:
+        dpi = max(MIN_PDF_DPI, int(dpi * 0.75))
+
+    pixels = page_pixels(dpi)
+    plan = AdmissionPlan(
+        options=replace(options, pdf_dpi=dpi),
+        peak_bytes=PDF_TEXT_LAYER_BYTES + upload.size,
+        ocr_pixels=sum(pixels),
+        pages=len(sizes),
+        downscaled=dpi != options.pdf_dpi,
+        page_pixels=pixels
+    )
+    if ocr_peak(dpi) > budget_bytes:
+        plan.rejection = (
+            f"PDF {upload.filename} ({len(sizes)} páginas) precisa de ~{ocr_peak(dpi) // (1024*1024)}MB "
+            f"para o OCR, acima do orçamento de {budget_bytes // (1024*1024)}MB"
+        )
+    return plan
+
+
+def pdf_pages_peak(plan: AdmissionPlan, pages: List[int], parallel_pages: int) -> int:
+    """Memória para rasterizar e reconhecer as páginas pendentes, no máximo `parallel_pages` por vez"""
+    pixels = [plan.page_pixels[index] for index in pages if index < len(plan.page_pixels)]
+    if not pixels:
+        return 0
+    concurrent = min(len(pixels), max(1, parallel_pages))
+    return max(pixels) * (PDF_RASTER_BYTES_PER_PIXEL + TESSERACT_BYTES_PER_PIXEL) * concurrent
+
+
+class AdmissionController:
+    """Reserva memória do orçamento global para cada arquivo antes do OCR"""
+
+    def __init__(
+        self,
+        budget: MemoryBudget,
+        max_image_pixels: int = settings.ocr_max_image_pixels,
+        timeout: float = settings.ocr_admission_timeout,
+        parallel_pages: int = settings.ocr_max_workers
+    ):
+        self.budget = budget
+        self.max_image_pixels = max_image_pixels
+        self.timeout = timeout
+        self.parallel_pages = parallel_pages
+        self.counters = Counter()
+
+    @asynccontextmanager
+    async def admit(self, upload: SpooledUpload, options: OCROptions):
+        """Inspeciona o arquivo, aguarda espaço no orçamento e entrega o plano com as opções ajustadas"""
+        plan = await asyncio.to_thread(
+            plan_admission, upload, options, self.budget.limit, self.max_image_pixels, self.parallel_pages
+        )
+        if plan.rejection:
+            self.counters["rejected"] += 1
+            raise AdmissionRejectedError(plan.rejection)
+
+        await self._acquire(plan.peak_bytes, plan.filename)
+        self.counters["admitted"] += 1
+        self.counters["downscaled"] += int(plan.downscaled)
+        self.counters["estimated_ocr_pixels"] += plan.ocr_pixels
+        try:
+            yield plan
+        finally:
+            await self.budget.release(plan.peak_bytes)
+
+    @asynccontextmanager
+    async def admit_pages(self, plan: AdmissionPlan, pages: List[int]):
+        """
+        Reserva a rasterização das páginas do PDF que ainda precisam de OCR.
+        A reserva da leitura da camada de texto é devolvida antes: o documento
+        já foi fechado no worker, e esperar por mais memória segurando a
+        reserva anterior travaria dois PDFs concorrentes.
+        """
+        peak = pdf_pages_peak(plan, pages, self.parallel_pages)
+        held, plan.peak_bytes = plan.peak_bytes, 0
+        await self.budget.release(held)
+        await self._acquire(peak, plan.filename)
+        self.counters["ocr_pages"] += len(pages)
+        try:
+            yield peak
+        finally:
+            await self.budget.release(peak)
+
+    async def _acquire(self, amount: int, filename: str) -> None:
+        try:
+            await self.budget.acquire(amount, self.timeout)
+        except asyncio.TimeoutError:
+            self.counters["rejected_busy"] += 1
+            raise AdmissionRejectedError(
+                f"Servidor ocupado: memória para o OCR de {filename} indisponível "
+                f"após {self.timeout:.0f}s",
+                status_code=503
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.budget.stats(), **self.counters}
+
+
+ocr_admission = AdmissionController(MemoryBudget(settings.ocr_memory_budget))
+
+metrics.register("ocr_admission", ocr_admission.stats)
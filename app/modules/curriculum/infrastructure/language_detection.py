@@ -0,0 +1,74 @@
+"""
+Detecção offline do idioma dominante de um texto curto de OCR, usada para
+escolher um único traineddata do Tesseract em vez do modelo combinado.
+
+Conta stopwords exclusivas de cada idioma; palavras comuns a mais de um
+idioma (como "a", ou "as", "do", "no" e "com", que também são inglês e
+aparecem em qualquer e-mail ".com") ficam de fora das listas. Quando não há sinal suficiente ou a
+vantagem do primeiro idioma é pequena, o resultado é ambíguo (None).
+"""
+import re
+from typing import Iterable, Optional
+from PIL import Image
+
+STOPWORDS = {
+    "por": {
+        "de", "da", "das", "dos", "em", "na", "nos", "nas",
+        "para", "por", "um", "uma", "os", "que", "não", "ao", "aos",
+        "pela", "pelo", "como", "mais", "sobre", "entre", "até", "também",
+        "experiência", "formação", "empresa", "desenvolvimento", "atual",
+        "anos", "curso", "ensino", "superior", "idiomas", "habilidades",
+    },
+    "eng": {
+        "the", "and", "of", "to", "in", "with", "for", "on", "at", "by",
+        "from", "is", "are", "was", "were", "an", "this", "that", "my",
+        "experience", "education", "skills", "company", "development",
+        "years", "university", "degree", "languages", "present", "work",
+    },
+    "spa": {
+        "el", "la", "los", "las", "del", "en", "con", "para", "por", "una",
+        "que", "y", "al", "como", "más", "sobre", "entre", "hasta", "también",
+        "experiencia", "formación", "empresa", "desarrollo", "años",
+        "habilidades", "idiomas",
+    },
+}
+
+MIN_HITS = 5
+MIN_MARGIN = 2.0
+
+_WORD_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+
+def detect_language(text: str, candidates: Iterable[str]) -> Optional[str]:
+    """Idioma dominante entre os candidatos, ou None quando ambíguo"""
+    candidates = [code for code in candidates if code in STOPWORDS]
+    if len(candidates) < 2:
+        return None
+
+    # Stopwords compartilhadas entre candidatos não ajudam a decidir
+    exclusive = {
+        code: STOPWORDS[code] - set().union(*(STOPWORDS[other] for other in candidates if other != code))
+        for code in candidates
+    }
+
+    scores = {code: 0 for code in candidates}
+    for token in _WORD_RE.findall(text.lower()):
+        for code in candidates:
+            if token in exclusive[code]:
+                scores[code] += 1
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (best, best_hits), (_, second_hits) = ranked[0], ranked[1]
+    if best_hits < MIN_HITS or best_hits < MIN_MARGIN * second_hits:
+        return None
+    return best
+
+
+def language_sample(image: Image.Image, scale: float = 0.5) -> Image.Image:
+    """Faixa central da imagem reduzida, barata o bastante para a passada de detecção"""
+    top, bottom = image.height // 4, image.height * 3 // 4
+    band = image.crop((0, top, image.width, max(bottom, top + 1)))
+    if scale >= 1.0:
+        return band
+    size = (max(1, round(band.width * scale)), max(1, round(band.height * scale)))
+    return band.resize(size, Image.Resampling.BILINEAR)
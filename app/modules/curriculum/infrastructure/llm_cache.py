@@ -0,0 +1,43 @@
+"""
+Cache das respostas estruturadas do LLM.
+
+A mesma pergunta sobre o mesmo currículo gerava uma nova chamada à OpenAI a
+cada análise. A chave reúne o modelo, a temperatura, o prompt normalizado e
+o schema JSON do `response_model`: mudar o modelo ou os campos da resposta
+invalida as entradas antigas. O valor guardado é o JSON da resposta, que
+volta a ser validado pelo `response_model` na leitura.
+"""
+import hashlib
+import json
+import re
+from typing import Optional, Type
+from pydantic import BaseModel
+from app.core.cache import TwoTierCache
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Remove a indentação e os espaços repetidos, que não mudam o que é pedido ao modelo"""
+    lines = (re.sub(r"[ \t]+", " ", line).strip() for line in prompt.strip().splitlines())
+    return "\n".join(lines)
+
+
+def build_llm_cache_key(model: str, temperature: Optional[float], prompt: str, response_model: Type[BaseModel]) -> str:
+    """Chave do cache: modelo + temperatura + prompt normalizado + schema da resposta"""
+    payload = json.dumps({
+        "model": model,
+        "temperature": temperature,
+        "prompt": normalize_prompt(prompt),
+        "schema": response_model.model_json_schema()
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+llm_response_cache = TwoTierCache(
+    memory_items=settings.llm_cache_memory_items,
+    directory=settings.llm_cache_dir or None,
+    max_disk_bytes=settings.llm_cache_max_bytes
+)
+
+metrics.register("llm_cache", llm_response_cache.stats)
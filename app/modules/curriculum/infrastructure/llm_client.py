@@ -0,0 +1,109 @@
+"""
+Cliente HTTP do LLM compartilhado pelo processo.
+
+Um único `httpx.AsyncClient` (com pool de conexões, keep-alive e HTTP/2
+opcional) é criado na inicialização da aplicação e reaproveitado por todas
+as requisições, evitando um novo pool e um novo handshake TLS por análise.
+O reuso de conexões é medido pelo stream de rede de cada resposta e
+exposto em /api/v1/metrics.
+"""
+import weakref
+from collections import Counter
+from typing import Any, Dict, Optional
+import httpx
+import instructor
+import openai
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+class LLMClientManager:
+    """Cria, compartilha e encerra o cliente do LLM"""
+
+    def __init__(
+        self,
+        max_connections: int = settings.llm_http_max_connections,
+        max_keepalive_connections: int = settings.llm_http_max_keepalive,
+        keepalive_expiry: float = settings.llm_http_keepalive_expiry,
+        connect_timeout: float = settings.llm_http_connect_timeout,
+        read_timeout: float = settings.llm_http_read_timeout,
+        http2: bool = settings.llm_http2
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.http2 = http2
+        self.http_client: Optional[httpx.AsyncClient] = None
+        self._client = None
+        self.counters = Counter()
+        self._streams = weakref.WeakSet()
+
+    def start(self, transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+        """Cria o pool HTTP e o cliente instructor; sem OPENAI_API_KEY não há cliente"""
+        if self.http_client is not None or not settings.openai_api_key:
+            return
+
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("⚠️ LLM_HTTP2 ativo, mas o pacote h2 não está instalado. Usando HTTP/1.1...")
+                http2 = False
+
+        self.http_client = httpx.AsyncClient(
+            http2=http2,
+            transport=transport,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry
+            ),
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            event_hooks={"response": [self._track_connection]}
+        )
+        self._client = instructor.from_openai(
+            openai.AsyncOpenAI(api_key=settings.openai_api_key, http_client=self.http_client),
+            mode=instructor.Mode.JSON,
+        )
+
+    @property
+    def client(self):
+        """Cliente instructor assíncrono compartilhado (criado sob demanda fora da aplicação)"""
+        if self._client is None:
+            self.start()
+        return self._client
+
+    async def shutdown(self) -> None:
+        if self.http_client is not None:
+            await self.http_client.aclose()
+        self.http_client = None
+        self._client = None
+
+    async def _track_connection(self, response: httpx.Response) -> None:
+        """Conta respostas servidas por conexões novas e por conexões reaproveitadas"""
+        self.counters["requests"] += 1
+        self.counters[f"http_version_{response.extensions.get('http_version', b'unknown').decode()}"] += 1
+        stream = response.extensions.get("network_stream")
+        if stream is None:
+            return
+        if stream in self._streams:
+            self.counters["reused_connections"] += 1
+        else:
+            self._streams.add(stream)
+            self.counters["new_connections"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        tracked = self.counters["new_connections"] + self.counters["reused_connections"]
+        return {
+            **self.counters,
+            "started": self.http_client is not None,
+            "reuse_rate": round(self.counters["reused_connections"] / tracked, 4) if tracked else 0.0
+        }
+
+
+llm_client_manager = LLMClientManager()
+
+metrics.register("llm_http", llm_client_manager.stats)
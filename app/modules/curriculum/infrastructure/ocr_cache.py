@@ -0,0 +1,30 @@
+import hashlib
+import json
+from dataclasses import asdict
+from app.core.cache import TwoTierCache
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.modules.curriculum.infrastructure.ocr_workers import OCROptions
+
+
+def build_ocr_cache_key(content_sha256: str, kind: str, options: OCROptions, routing_policy: str = "") -> str:
+    """Chave do cache: SHA-256 do arquivo + tipo + parâmetros do OCR (+ política de roteamento dos provedores)"""
+    data = {"sha256": content_sha256, "kind": kind, "options": asdict(options)}
+    if routing_policy:
+        data["routing_policy"] = routing_policy
+    payload = json.dumps(data, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def build_ocr_page_cache_key(page_hash: str, options: OCROptions, routing_policy: str = "") -> str:
+    """Chave do cache de páginas: hash do conteúdo da página + parâmetros do OCR"""
+    return build_ocr_cache_key(page_hash, "pdf_page", options, routing_policy)
+
+
+ocr_result_cache = TwoTierCache(
+    memory_items=settings.ocr_cache_memory_items,
+    directory=settings.ocr_cache_dir or None,
+    max_disk_bytes=settings.ocr_cache_max_bytes
+)
+
+metrics.register("ocr_cache", ocr_result_cache.stats)
@@ -0,0 +1,198 @@
+import asyncio
+import itertools
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+import psutil
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# Fila usada pelos workers para avisar qual processo iniciou cada tarefa
+_pid_queue = None
+
+
+class OCRQueueFullError(Exception):
+    """Fila de submissão do OCR cheia"""
+    pass
+
+
+def _init_worker(pid_queue) -> None:
+    global _pid_queue
+    _pid_queue = pid_queue
+
+
+def _run_task(task_id: int, fn: Callable[..., Any], *args: Any) -> Any:
+    """Executa a tarefa no worker após registrar o PID que a está processando"""
+    _pid_queue.put((task_id, os.getpid()))
+    return fn(*args)
+
+
+class OCRExecutor:
+    """Pool de processos gerenciado para tarefas de OCR"""
+
+    def __init__(
+        self,
+        max_workers: int = settings.ocr_max_workers,
+        max_tasks_per_child: int = settings.ocr_max_tasks_per_child,
+        queue_size: int = settings.ocr_queue_size,
+        queue_timeout: float = settings.ocr_queue_timeout
+    ):
+        self.max_workers = max_workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pid_queue = None
+        self._task_ids = itertools.count()
+        self._task_pids: Dict[int, int] = {}
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._cancelled = 0
+        self._killed_workers = 0
+        self._restarts = 0
+        self._resubmitted = 0
+        # Pools derrubados por _kill_task, e não por uma tarefa que quebrou o worker
+        self._killed_pools: "weakref.WeakSet[ProcessPoolExecutor]" = weakref.WeakSet()
+
+    @property
+    def is_running(self) -> bool:
+        """Indica se o pool foi iniciado"""
+        return self._executor is not None
+
+    def start(self) -> None:
+        """Inicia o pool de processos"""
+        if self._executor is not None:
+            return
+
+        context = multiprocessing.get_context("spawn")
+        # SimpleQueue grava de forma síncrona: o PID chega antes da tarefa começar
+        self._pid_queue = context.SimpleQueue()
+        self._executor = self._create_pool()
+        self._slots = asyncio.Semaphore(self.max_workers + self.queue_size)
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        # max_tasks_per_child exige processos criados via spawn
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=self.max_tasks_per_child or None,
+            initializer=_init_worker,
+            initargs=(self._pid_queue,)
+        )
+
+    async def shutdown(self) -> None:
+        """Encerra o pool, cancelando tarefas ainda não iniciadas"""
+        executor, self._executor = self._executor, None
+        self._slots = None
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Executa uma função no pool sem bloquear o event loop.
+
+        Se a chamada for cancelada (por exemplo, por um timeout) com a tarefa
+        já em execução, o worker é encerrado e o pool recriado. As demais
+        tarefas que estavam no pool antigo são reenviadas sempre que isso
+        acontecer, até o prazo de cada uma (o cancelamento de quem chamou):
+        o encerramento não diz nada sobre elas. Já um pool quebrado por outro
+        motivo pode ter sido derrubado pela própria tarefa, que é reenviada
+        uma única vez.
+        """
+        if self._executor is None:
+            return await asyncio.to_thread(fn, *args)
+
+        slots = self._slots
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise OCRQueueFullError(
+                f"Fila de OCR cheia ({self.max_workers + self.queue_size} tarefas)"
+            )
+
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            crashes = 0
+            while True:
+                executor = self._executor
+                if executor is None:
+                    return await asyncio.to_thread(fn, *args)
+
+                task_id = next(self._task_ids)
+                try:
+                    return await loop.run_in_executor(executor, _run_task, task_id, fn, *args)
+                except asyncio.CancelledError:
+                    self._cancelled += 1
+                    self._kill_task(task_id, executor)
+                    raise
+                except BrokenProcessPool:
+                    self._recycle(executor)
+                    if executor not in self._killed_pools:
+                        crashes += 1
+                        if crashes > 1:
+                            raise
+                    self._resubmitted += 1
+                finally:
+                    # Drena sempre para o pipe da fila nunca encher e bloquear os workers
+                    self._drain_pids()
+                    self._task_pids.pop(task_id, None)
+        finally:
+            self._in_flight -= 1
+            self._completed += 1
+            slots.release()
+
+    def _kill_task(self, task_id: int, executor: ProcessPoolExecutor) -> None:
+        """Encerra o worker que está executando a tarefa, se ela já começou"""
+        self._drain_pids()
+        pid = self._task_pids.pop(task_id, None)
+        if pid is None:
+            # Ainda na fila: o cancelamento do future impede que ela comece
+            return
+
+        self._killed_pools.add(executor)
+        try:
+            psutil.Process(pid).kill()
+            self._killed_workers += 1
+        except psutil.NoSuchProcess:
+            pass
+        self._recycle(executor)
+
+    def _recycle(self, executor: ProcessPoolExecutor) -> None:
+        """Substitui um pool quebrado por um novo"""
+        if self._executor is executor:
+            self._executor = self._create_pool()
+            self._restarts += 1
+        executor.shutdown(wait=False)
+
+    def _drain_pids(self) -> None:
+        while not self._pid_queue.empty():
+            task_id, pid = self._pid_queue.get()
+            self._task_pids[task_id] = pid
+
+    def stats(self) -> Dict[str, Any]:
+        """Estatísticas do pool"""
+        return {
+            "running": self.is_running,
+            "max_workers": self.max_workers,
+            "max_tasks_per_child": self.max_tasks_per_child,
+            "queue_size": self.queue_size,
+            "in_flight": self._in_flight,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "cancelled": self._cancelled,
+            "killed_workers": self._killed_workers,
+            "restarts": self._restarts,
+            "resubmitted": self._resubmitted
+        }
+
+
+ocr_executor = OCRExecutor()
+
+metrics.register("ocr_executor", ocr_executor.stats)
@@ -0,0 +1,248 @@
+"""
+Registro de provedores de OCR e roteamento por custo.
+
+Cada provedor declara o que consegue processar, uma nota de qualidade e o
+custo estimado (em ms) para um arquivo. O `TesseractOCRService` monta o
+perfil do arquivo (tipo, páginas, páginas sem camada de texto e pixels a
+reconhecer, vindos do controle de admissão) e usa o provedor mais barato
+entre os que atendem a qualidade mínima configurada.
+
+Provedores:
+- "text_layer": PDFs em que todas as páginas têm camada de texto; não roda OCR.
+- "tesseract_inprocess": Tesseract via tesserocr, com handles reaproveitados.
+- "tesseract_subprocess": Tesseract via pytesseract, um processo por chamada.
+- "tesseract_fast": modo rápido em resolução reduzida, sem a segunda passada.
+
+Um engine novo entra registrando um provedor com suas funções de worker,
+sem alterar o serviço nem o caso de uso.
+"""
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, List, Optional
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.modules.curriculum.infrastructure import ocr_workers, tesseract_engine
+from app.modules.curriculum.infrastructure.ocr_workers import OCROptions
+
+AUTO = "auto"
+
+# Estimativas grosseiras, ainda não medidas; para o roteamento só importa a
+# ordem de grandeza entre os provedores. Calibrar com benchmarks/ocr_benchmark.py
+# num ambiente com o tesseract instalado
+TEXT_LAYER_MS_PER_PAGE = 2.0
+TESSERACT_MS_PER_MEGAPIXEL = 120.0
+# Início do processo do tesseract e carga do modelo a cada chamada
+SUBPROCESS_OVERHEAD_MS = 150.0
+# Página A4 a 300 DPI, usada quando o controle de admissão não informa os pixels
+DEFAULT_PAGE_PIXELS = 8_700_000
+
+FAST_DPI = 150
+
+
+def inprocess_enabled() -> bool:
+    """O engine em processo está habilitado (OCR_ENGINE) e o tesserocr instalado"""
+    return settings.ocr_engine == tesseract_engine.INPROCESS and tesseract_engine.inprocess_available()
+
+
+@dataclass(frozen=True)
+class FileProfile:
+    """O que se sabe de um arquivo antes do OCR"""
+    kind: str
+    pages: int = 1
+    ocr_pages: int = 1
+    ocr_pixels: int = 0
+
+    @property
+    def ocr_megapixels(self) -> float:
+        pixels = self.ocr_pixels or self.ocr_pages * DEFAULT_PAGE_PIXELS
+        return pixels / 1_000_000
+
+
+class OCRProvider(ABC):
+    """Provedor de OCR: capacidade, qualidade, custo e funções executadas nos workers"""
+
+    name: str = ""
+    # 1.0 = texto exato; o roteador descarta provedores abaixo de OCR_MIN_QUALITY
+    quality: float = 1.0
+    image_worker: Optional[Callable] = None
+    page_worker: Optional[Callable] = None
+
+    @abstractmethod
+    def can_handle(self, profile: FileProfile) -> bool:
+        """O provedor consegue processar arquivos com este perfil"""
+        pass
+
+    @abstractmethod
+    def estimate_cost_ms(self, profile: FileProfile, options: OCROptions) -> float:
+        """Custo estimado do OCR do arquivo, em ms"""
+        pass
+
+    def configure(self, options: OCROptions) -> OCROptions:
+        """Ajusta as opções do OCR para este provedor"""
+        return options
+
+
+class TextLayerProvider(OCRProvider):
+    """Usa só a camada de texto de PDFs digitais"""
+
+    name = "text_layer"
+
+    def can_handle(self, profile: FileProfile) -> bool:
+        return profile.kind == "pdf" and profile.ocr_pages == 0
+
+    def estimate_cost_ms(self, profile: FileProfile, options: OCROptions) -> float:
+        return profile.pages * TEXT_LAYER_MS_PER_PAGE
+
+
+class TesseractProvider(OCRProvider):
+    """Tesseract sobre as imagens e as páginas sem camada de texto"""
+
+    engine = tesseract_engine.SUBPROCESS
+
+    # Resolvidos a cada chamada, pelo nome no módulo dos workers
+    @property
+    def image_worker(self) -> Callable:
+        return ocr_workers.extract_image_text
+
+    @property
+    def page_worker(self) -> Callable:
+        return ocr_workers.ocr_pdf_page
+
+    def can_handle(self, profile: FileProfile) -> bool:
+        return profile.kind in ("pdf", "image")
+
+    def estimate_cost_ms(self, profile: FileProfile, options: OCROptions) -> float:
+        text_layer = profile.pages * TEXT_LAYER_MS_PER_PAGE if profile.kind == "pdf" else 0.0
+        return text_layer + profile.ocr_megapixels * TESSERACT_MS_PER_MEGAPIXEL + self._overhead_ms(profile)
+
+    def configure(self, options: OCROptions) -> OCROptions:
+        return replace(options, engine=self.engine)
+
+    def _overhead_ms(self, profile: FileProfile) -> float:
+        return 0.0
+
+
+class TesseractSubprocessProvider(TesseractProvider):
+    """pytesseract: sempre disponível, paga a inicialização do tesseract a cada chamada"""
+
+    name = "tesseract_subprocess"
+    quality = 0.9
+
+    def _overhead_ms(self, profile: FileProfile) -> float:
+        return profile.ocr_pages * SUBPROCESS_OVERHEAD_MS
+
+
+class TesseractInProcessProvider(TesseractProvider):
+    """tesserocr: mesmo modelo, sem o custo de processo por chamada"""
+
+    name = "tesseract_inprocess"
+    quality = 0.9
+    engine = tesseract_engine.INPROCESS
+
+    def can_handle(self, profile: FileProfile) -> bool:
+        return super().can_handle(profile) and inprocess_enabled()
+
+
+class TesseractFastProvider(TesseractProvider):
+    """Modo rápido: rasteriza e reamostra a FAST_DPI e dispensa a segunda passada"""
+
+    name = "tesseract_fast"
+    quality = 0.6
+
+    def estimate_cost_ms(self, profile: FileProfile, options: OCROptions) -> float:
+        dpi = options.pdf_dpi if profile.kind == "pdf" else options.target_dpi
+        scale = min(1.0, FAST_DPI / dpi) ** 2
+        return super().estimate_cost_ms(replace(profile, ocr_pixels=int(profile.ocr_megapixels * 1_000_000 * scale)), options)
+
+    def configure(self, options: OCROptions) -> OCROptions:
+        return replace(
+            options,
+            engine=self._engine(),
+            pdf_dpi=min(options.pdf_dpi, FAST_DPI),
+            target_dpi=min(options.target_dpi, FAST_DPI),
+            adaptive=False
+        )
+
+    def _engine(self) -> str:
+        return tesseract_engine.INPROCESS if inprocess_enabled() else tesseract_engine.SUBPROCESS
+
+    def _overhead_ms(self, profile: FileProfile) -> float:
+        return 0.0 if inprocess_enabled() else profile.ocr_pages * SUBPROCESS_OVERHEAD_MS
+
+
+@dataclass
+class RouteDecision:
+    """Provedor escolhido para um arquivo e o custo estimado de cada candidato"""
+    provider: OCRProvider
+    estimated_ms: float
+    candidates: Dict[str, float]
+
+
+class OCRProviderRegistry:
+    """Provedores registrados e roteamento de cada arquivo para o mais barato"""
+
+    def __init__(self, providers: List[OCRProvider] = (), preferred: str = AUTO, min_quality: float = 0.0):
+        self.providers: Dict[str, OCRProvider] = {}
+        self.preferred = preferred
+        self.min_quality = min_quality
+        self.counters = Counter()
+        for provider in providers:
+            self.register(provider)
+
+    def register(self, provider: OCRProvider) -> None:
+        self.providers[provider.name] = provider
+
+    def get(self, name: str) -> OCRProvider:
+        try:
+            return self.providers[name]
+        except KeyError:
+            raise ValueError(f"Provedor de OCR desconhecido: {name}")
+
+    @property
+    def policy(self) -> str:
+        """Identifica a política de roteamento, para separar resultados de políticas diferentes no cache"""
+        return f"{self.preferred}:{self.min_quality:g}"
+
+    def route(self, profile: FileProfile, options: OCROptions) -> RouteDecision:
+        """
+        Usa o provedor fixado em OCR_PROVIDER se ele atender o arquivo; senão,
+        o mais barato entre os capazes e com qualidade suficiente.
+        """
+        capable = [provider for provider in self.providers.values() if provider.can_handle(profile)]
+        if not capable:
+            raise ValueError(f"Nenhum provedor de OCR registrado atende arquivos do tipo {profile.kind}")
+        candidates = {provider.name: provider.estimate_cost_ms(profile, options) for provider in capable}
+
+        pinned = self.providers.get(self.preferred)
+        if pinned is not None and pinned in capable:
+            chosen = pinned
+        else:
+            eligible = [provider for provider in capable if provider.quality >= self.min_quality] or capable
+            chosen = min(eligible, key=lambda provider: candidates[provider.name])
+
+        self.counters[f"routed_{chosen.name}"] += 1
+        self.counters[f"routed_{chosen.name}_estimated_ms"] += candidates[chosen.name]
+        return RouteDecision(provider=chosen, estimated_ms=candidates[chosen.name], candidates=candidates)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"preferred": self.preferred, "min_quality": self.min_quality, **self.counters}
+
+
+def build_registry(preferred: str = settings.ocr_provider, min_quality: float = settings.ocr_min_quality) -> OCRProviderRegistry:
+    """Registro com os provedores embutidos; "tesseract" equivale a "auto" """
+    if preferred == "tesseract":
+        preferred = AUTO
+    registry = OCRProviderRegistry(
+        [TextLayerProvider(), TesseractInProcessProvider(), TesseractSubprocessProvider(), TesseractFastProvider()],
+        preferred=preferred,
+        min_quality=min_quality
+    )
+    if preferred != AUTO:
+        registry.get(preferred)
+    return registry
+
+
+ocr_providers = build_registry()
+
+metrics.register("ocr_providers", ocr_providers.stats)
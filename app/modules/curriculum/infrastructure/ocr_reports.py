@@ -0,0 +1,119 @@
+from collections import Counter
+from dataclasses import asdict
+from typing import Any, Dict, Optional
+import psutil
+from app.core.logging import log_ocr_report
+from app.core.metrics import metrics
+from app.modules.curriculum.infrastructure.adaptive_ocr import ConfidenceStats
+from app.modules.curriculum.infrastructure.ocr_workers import OCRResult, PDFExtraction
+
+
+class OCRReportCollector:
+    """Agrega no processo principal os relatórios devolvidos pelos workers de OCR"""
+
+    def __init__(self):
+        self.counters = Counter()
+        # Páginas/imagens e tempo de OCR por modelo de idioma usado na passada completa
+        self.language_pages = Counter()
+        self.language_ms = Counter()
+
+    def record_pdf(self, filename: str, extraction: PDFExtraction) -> None:
+        """Registra as decisões por página de um PDF"""
+        for page in extraction.pages:
+            self.counters[f"pdf_pages_{page.strategy}"] += 1
+            self.counters[f"pdf_pages_{page.strategy}_ms"] += page.elapsed_ms
+            if page.language:
+                self._record_language(page.language, page.elapsed_ms, page.language_detection_ms)
+
+        confidence = extraction.confidence
+        self._record_confidence(confidence)
+        log_ocr_report(filename, {
+            "type": "pdf",
+            "provider": extraction.provider,
+            "pages": [asdict(page) for page in extraction.pages],
+            "confidence": asdict(confidence) if confidence else None
+        })
+
+    def record_image(self, filename: str, result: OCRResult) -> None:
+        """Registra idioma, tempo e confiança do OCR de uma imagem"""
+        self.counters["images"] += 1
+        self._record_confidence(result.confidence)
+        if result.language:
+            self._record_language(result.language, result.elapsed_ms, result.language_detection_ms)
+        log_ocr_report(filename, {
+            "type": "image",
+            "provider": result.provider,
+            "language": result.language,
+            "elapsed_ms": result.elapsed_ms,
+            "language_detection_ms": result.language_detection_ms,
+            "confidence": asdict(result.confidence) if result.confidence else None
+        })
+
+    def record_timeout(self, filename: str, budget_seconds: float) -> None:
+        """Registra um arquivo cuja extração foi cancelada por prazo"""
+        self.counters["files_timed_out"] += 1
+        log_ocr_report(filename, {"type": "timeout", "budget_seconds": round(budget_seconds, 3)})
+
+    def record_request_memory(self, files_count: int, peak_buffered_bytes: int, spooled_files: int) -> None:
+        """Registra o pico de bytes de upload mantidos em memória por uma requisição"""
+        self.counters["upload_spooled_files"] += spooled_files
+        self.counters["upload_peak_buffered_bytes"] = max(
+            self.counters["upload_peak_buffered_bytes"], peak_buffered_bytes
+        )
+
+        log_ocr_report(None, {
+            "type": "request_memory",
+            "files_count": files_count,
+            "peak_buffered_bytes": peak_buffered_bytes,
+            "spooled_files": spooled_files,
+            "rss_bytes": psutil.Process().memory_info().rss
+        })
+
+    def _record_confidence(self, confidence: Optional[ConfidenceStats]) -> None:
+        """Conta quantos arquivos terminaram na primeira passada e quantos precisaram de mais"""
+        if confidence is None:
+            return
+        if confidence.passes > 1:
+            self.counters["ocr_adaptive_second_pass_files"] += 1
+        else:
+            self.counters["ocr_adaptive_single_pass_files"] += 1
+        self.counters["ocr_adaptive_extra_passes"] += confidence.passes - 1
+        self.counters["ocr_adaptive_refined_lines"] += confidence.refined_lines
+        self.counters["ocr_adaptive_fallback_files"] += int(confidence.fallback_pass)
+
+    def _record_language(self, language: str, elapsed_ms: float, detection_ms: float) -> None:
+        self.language_pages[language] += 1
+        self.language_ms[language] += elapsed_ms - detection_ms
+        self.counters["ocr_language_detection_ms"] += detection_ms
+
+    def estimated_language_savings_ms(self) -> float:
+        """
+        Tempo economizado estimado: páginas roteadas para um único idioma
+        vezes a diferença entre o tempo médio do modelo combinado e o do
+        idioma, menos o custo das passadas de detecção.
+        """
+        combined = [language for language in self.language_pages if "+" in language]
+        combined_pages = sum(self.language_pages[language] for language in combined)
+        if not combined_pages:
+            return 0.0
+        combined_avg = sum(self.language_ms[language] for language in combined) / combined_pages
+
+        saved = sum(
+            pages * combined_avg - self.language_ms[language]
+            for language, pages in self.language_pages.items()
+            if "+" not in language
+        )
+        return round(saved - self.counters["ocr_language_detection_ms"], 2)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores acumulados"""
+        stats = dict(self.counters)
+        stats["ocr_language_pages"] = dict(self.language_pages)
+        stats["ocr_language_ms"] = {language: round(ms, 2) for language, ms in self.language_ms.items()}
+        stats["ocr_language_estimated_saved_ms"] = self.estimated_language_savings_ms()
+        return stats
+
+
+ocr_report_collector = OCRReportCollector()
+
+metrics.register("ocr_reports", ocr_report_collector.stats)
@@ -0,0 +1,262 @@
+"""
+Funções de extração executadas nos processos do pool de OCR.
+
+Precisam ser funções de módulo (picklable) e importam PyMuPDF, Pillow e
+pytesseract apenas dentro do worker.
+"""
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+from app.modules.curriculum.infrastructure import tesseract_engine
+from app.modules.curriculum.infrastructure.adaptive_ocr import ConfidenceStats, recognize
+from app.modules.curriculum.infrastructure.image_preprocessing import preprocess_image
+from app.modules.curriculum.infrastructure.language_detection import detect_language, language_sample
+
+
+@dataclass(frozen=True)
+class OCROptions:
+    """Parâmetros do OCR repassados aos workers e usados na chave do cache"""
+    languages: str = "por+eng"
+    tesseract_config: str = "--oem 3 --psm 6"
+    pdf_dpi: int = 300
+    pdf_min_text_chars: int = 20
+    preprocess: bool = True
+    target_dpi: int = 300
+    binarize: bool = True
+    deskew: bool = False
+    engine: str = "inprocess"
+    adaptive: bool = True
+    adaptive_min_confidence: float = 60.0
+    adaptive_fallback_config: str = "--oem 3 --psm 3"
+    language_routing: bool = True
+    language_sample_scale: float = 0.5
+    # Teto de pixels da imagem processada, definido pelo controle de admissão (0 = sem teto)
+    max_pixels: int = 0
+
+
+@dataclass
+class PageReport:
+    """Decisão e tempo de extração de uma página"""
+    page: int
+    strategy: str
+    chars: int
+    elapsed_ms: float
+    confidence: Optional[ConfidenceStats] = None
+    language: Optional[str] = None
+    language_detection_ms: float = 0.0
+
+
+@dataclass
+class OCRResult:
+    """Texto reconhecido de uma imagem ou página, com as métricas do worker"""
+    text: str
+    elapsed_ms: float = 0.0
+    confidence: Optional[ConfidenceStats] = None
+    # Modelo usado na passada completa e custo da detecção de idioma
+    language: Optional[str] = None
+    language_detection_ms: float = 0.0
+    # Provedor escolhido pelo roteamento, preenchido no processo principal
+    provider: Optional[str] = None
+
+
+@dataclass
+class PDFExtraction:
+    """Texto extraído de um PDF com o relatório por página"""
+    page_texts: List[str] = field(default_factory=list)
+    pages: List[PageReport] = field(default_factory=list)
+    # Índices das páginas sem camada de texto, pendentes de OCR
+    pending_ocr: List[int] = field(default_factory=list)
+    # Hash do conteúdo de cada página pendente, chave do cache de páginas
+    page_hashes: Dict[int, str] = field(default_factory=dict)
+    provider: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self.page_texts)
+
+    @property
+    def confidence(self) -> Optional[ConfidenceStats]:
+        """Confiança agregada das páginas que passaram por OCR"""
+        return ConfidenceStats.combine([page.confidence for page in self.pages])
+
+    def apply_ocr(self, index: int, result: OCRResult) -> None:
+        """Preenche uma página pendente com o resultado do OCR"""
+        page = self.pages[index]
+        self.page_texts[index] = result.text
+        page.chars = len(result.text)
+        page.elapsed_ms += result.elapsed_ms
+        page.confidence = result.confidence
+        page.language = result.language
+        page.language_detection_ms = result.language_detection_ms
+
+
+Source = Union[bytes, str]
+
+
+def extract_pdf_text(source: Source, options: OCROptions) -> PDFExtraction:
+    """
+    Extrai texto de PDF página a página: usa a camada de texto quando
+    existe e só rasteriza + aplica OCR nas páginas que são apenas imagem.
+    """
+    extraction = read_pdf_text_layer(source, options)
+    for index in extraction.pending_ocr:
+        extraction.apply_ocr(index, ocr_pdf_page(source, index, options))
+    extraction.pending_ocr = []
+    return extraction
+
+
+def read_pdf_text_layer(source: Source, options: OCROptions) -> PDFExtraction:
+    """
+    Lê a camada de texto de cada página e marca as páginas com pouco texto
+    como pendentes de OCR, para que sejam rasterizadas nos workers.
+    """
+    doc = _open_pdf(source)
+    try:
+        extraction = PDFExtraction()
+        for page in doc:
+            start = time.perf_counter()
+            text = page.get_text()
+            strategy = "text_layer"
+
+            if len(text.strip()) < options.pdf_min_text_chars:
+                extraction.pending_ocr.append(page.number)
+                extraction.page_hashes[page.number] = page_content_hash(doc, page)
+                text = ""
+                strategy = "ocr"
+
+            extraction.page_texts.append(text)
+            extraction.pages.append(PageReport(
+                page=page.number + 1,
+                strategy=strategy,
+                chars=len(text),
+                elapsed_ms=(time.perf_counter() - start) * 1000
+            ))
+        return extraction
+    finally:
+        doc.close()
+
+
+def page_content_hash(doc, page) -> str:
+    """
+    SHA-256 do que define a renderização da página: dimensões, rotação,
+    content stream e os streams das imagens e XObjects referenciados.
+    Não rasteriza a página.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{tuple(page.rect)}|{page.rotation}".encode("utf-8"))
+    digest.update(page.read_contents())
+    xrefs = {image[0] for image in page.get_images(full=True)} | {xobject[0] for xobject in page.get_xobjects()}
+    for xref in sorted(xrefs):
+        digest.update(doc.xref_stream_raw(xref) or b"")
+    return digest.hexdigest()
+
+
+def ocr_pdf_page(source: Source, page_index: int, options: OCROptions) -> OCRResult:
+    """Rasteriza uma única página do PDF e aplica OCR, dentro do worker"""
+    start = time.perf_counter()
+    doc = _open_pdf(source)
+    try:
+        result = _ocr_pdf_page(doc[page_index], options)
+    finally:
+        doc.close()
+    result.elapsed_ms = (time.perf_counter() - start) * 1000
+    return result
+
+
+def extract_image_text(source: Source, options: OCROptions) -> OCRResult:
+    """Extrai texto de imagem usando Tesseract, com as métricas do OCR"""
+    import io
+    from PIL import Image
+
+    start = time.perf_counter()
+    with Image.open(source if isinstance(source, str) else io.BytesIO(source)) as image:
+        if options.preprocess:
+            image = preprocess_image(
+                image,
+                target_dpi=options.target_dpi,
+                binarize=options.binarize,
+                deskew=options.deskew,
+                max_pixels=options.max_pixels
+            )
+        elif options.max_pixels and image.width * image.height > options.max_pixels:
+            scale = (options.max_pixels / (image.width * image.height)) ** 0.5
+            size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+            image.draft(image.mode, size)
+            image = image.resize(size)
+        result = _ocr_image(image, options)
+    result.elapsed_ms = (time.perf_counter() - start) * 1000
+    return result
+
+
+def _open_pdf(source: Source):
+    """Abre o PDF pelo caminho (sem copiar para memória) ou a partir dos bytes"""
+    import fitz
+
+    if isinstance(source, str):
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def _ocr_pdf_page(page, options: OCROptions) -> OCRResult:
+    """Rasteriza uma página em tons de cinza e aplica OCR"""
+    import fitz
+    from PIL import Image
+
+    pixmap = page.get_pixmap(dpi=options.pdf_dpi, colorspace=fitz.csGRAY)
+    image = Image.frombytes("L", (pixmap.width, pixmap.height), pixmap.samples)
+    result = _ocr_image(image, options)
+    if result.text:
+        result.text += "\n"
+    return result
+
+
+def _ocr_image(image, options: OCROptions) -> OCRResult:
+    """OCR em passada única ou adaptativo, no modelo de idioma escolhido pelo roteamento"""
+    languages, detection_ms = _route_language(image, options)
+
+    if options.adaptive:
+        text, confidence = recognize(
+            image,
+            languages,
+            options.tesseract_config,
+            options.engine,
+            min_confidence=options.adaptive_min_confidence,
+            fallback_config=options.adaptive_fallback_config
+        )
+    else:
+        text = tesseract_engine.image_to_string(
+            image,
+            languages,
+            options.tesseract_config,
+            engine=options.engine
+        )
+        confidence = None
+
+    return OCRResult(
+        text=text.strip(),
+        confidence=confidence,
+        language=languages,
+        language_detection_ms=detection_ms
+    )
+
+
+def _route_language(image, options: OCROptions) -> Tuple[str, float]:
+    """
+    Passada rápida numa amostra reduzida para detectar o idioma dominante;
+    usa o modelo combinado quando o resultado é ambíguo.
+    """
+    candidates = options.languages.split("+")
+    if not options.language_routing or len(candidates) < 2:
+        return options.languages, 0.0
+
+    start = time.perf_counter()
+    sample = language_sample(image, options.language_sample_scale)
+    text = tesseract_engine.image_to_string(
+        sample,
+        options.languages,
+        options.tesseract_config,
+        engine=options.engine
+    )
+    language = detect_language(text, candidates)
+    return language or options.languages, (time.perf_counter() - start) * 1000
@@ -0,0 +1,122 @@
+"""
+Engines do Tesseract usadas pelos workers de OCR.
+
+- "subprocess": pytesseract, que executa o binário `tesseract` a cada
+  chamada (grava a imagem em arquivo temporário e recarrega o traineddata).
+- "inprocess": tesserocr, que mantém handles da API C do Tesseract já
+  inicializados e reutilizados entre chamadas, um por worker.
+
+tesserocr é opcional; sem ele o engine "inprocess" cai no subprocess.
+"""
+import shlex
+import threading
+from typing import Dict, Optional, Tuple
+
+SUBPROCESS = "subprocess"
+INPROCESS = "inprocess"
+
+# Um conjunto de handles por thread: a API do Tesseract não é thread-safe e
+# cada processo do pool tem o próprio módulo, então isso resulta em um
+# engine por worker.
+_local = threading.local()
+_fallback_warned = False
+
+
+def inprocess_available() -> bool:
+    """Indica se o tesserocr está instalado"""
+    try:
+        import tesserocr  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def image_to_string(image, languages: str, config: str, engine: str = SUBPROCESS) -> str:
+    """Reconhece o texto de uma imagem PIL com o engine escolhido"""
+    if engine == INPROCESS:
+        api = _get_api(languages, config)
+        if api is not None:
+            try:
+                api.SetImage(image)
+                return api.GetUTF8Text()
+            finally:
+                api.Clear()
+
+    import pytesseract
+    return pytesseract.image_to_string(image, lang=languages, config=config)
+
+
+def image_to_data(image, languages: str, config: str, engine: str = SUBPROCESS) -> str:
+    """Reconhece a imagem e devolve o TSV do Tesseract com caixa e confiança de cada palavra"""
+    if engine == INPROCESS:
+        api = _get_api(languages, config)
+        if api is not None:
+            try:
+                api.SetImage(image)
+                api.Recognize()
+                return api.GetTSVText(0)
+            finally:
+                api.Clear()
+
+    import pytesseract
+    return pytesseract.image_to_data(image, lang=languages, config=config)
+
+
+def parse_config(config: str) -> Tuple[Optional[int], Optional[int], Dict[str, str]]:
+    """Converte a configuração no formato da CLI (--oem, --psm, -c) em psm, oem e variáveis"""
+    psm = oem = None
+    variables = {}
+    tokens = shlex.split(config)
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        value = tokens[index + 1] if index + 1 < len(tokens) else ""
+        if token == "--psm":
+            psm = int(value)
+            index += 1
+        elif token == "--oem":
+            oem = int(value)
+            index += 1
+        elif token == "-c" and "=" in value:
+            name, _, var_value = value.partition("=")
+            variables[name] = var_value
+            index += 1
+        index += 1
+    return psm, oem, variables
+
+
+def _get_api(languages: str, config: str):
+    """Handle da API do Tesseract inicializado, criado uma vez por thread/processo"""
+    apis = getattr(_local, "apis", None)
+    if apis is None:
+        apis = _local.apis = {}
+
+    key = (languages, config)
+    if key in apis:
+        return apis[key]
+
+    try:
+        import tesserocr
+
+        psm, oem, variables = parse_config(config)
+        kwargs = {"lang": languages}
+        if psm is not None:
+            kwargs["psm"] = psm
+        if oem is not None:
+            kwargs["oem"] = oem
+        api = tesserocr.PyTessBaseAPI(**kwargs)
+        for name, value in variables.items():
+            api.SetVariable(name, value)
+    except Exception as e:
+        _warn_fallback(e)
+        api = None
+
+    apis[key] = api
+    return api
+
+
+def _warn_fallback(error: Exception) -> None:
+    global _fallback_warned
+    if not _fallback_warned:
+        _fallback_warned = True
+        print(f"⚠️ Tesseract in-process indisponível ({error}). Usando subprocess...")
@@ -0,0 +1,229 @@
+"""
+Estimativa offline de tokens e empacotamento de currículos em um orçamento.
+
+Os prompts eram limitados por caracteres (`text[:4000]`), o que paga demais
+em currículos densos em inglês e corta cedo os em português, no meio de uma
+seção. Aqui o texto é dividido em seções (blocos separados por linha em
+branco; blocos grandes viram grupos de linhas), cada seção recebe uma nota
+de relevância (termos da query e títulos como experiência/habilidades) e as
+seções entram em ordem de relevância até o orçamento; as que não cabem são
+descartadas inteiras e o texto final mantém a ordem original.
+
+A estimativa não depende de tokenizador nem de rede: aproxima o BPE dos
+modelos da OpenAI por palavra (palavras ASCII curtas costumam ser um token;
+palavras acentuadas e longas se dividem mais). O uso real devolvido pela API
+é comparado com a estimativa em /api/v1/metrics.
+"""
+import math
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from app.core.metrics import metrics
+
+_PIECES = re.compile(r"\d+|[^\W\d_]+|\n|[^\w\s]", re.UNICODE)
+
+# Marcador no lugar das seções descartadas
+OMITTED = "[...]"
+
+# Títulos de seção que mais importam para análise e resumo de currículos
+SECTION_KEYWORDS = {
+    "experiencia", "experience", "profissional", "habilidades", "skills", "competencias",
+    "tecnologias", "resumo", "summary", "perfil", "objetivo", "formacao", "education",
+    "projetos", "projects", "certificacoes", "certifications", "idiomas", "languages"
+}
+
+STOPWORDS = {
+    "the", "and", "for", "with", "que", "para", "com", "uma", "dos", "das", "por", "como",
+    "qual", "quais", "quem", "desses", "dessas", "candidato", "candidatos", "vaga", "melhor", "mais"
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Tokens estimados do texto, sem tokenizador"""
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        if piece.isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        elif piece.isalpha():
+            if piece.isascii():
+                tokens += 1 + (len(piece) - 1) // 6
+            else:
+                tokens += 1 + len(piece) // 4
+        else:
+            tokens += 1
+    return tokens
+
+
+def normalize(word: str) -> str:
+    """Minúsculas sem acentos, para comparar termos"""
+    decomposed = unicodedata.normalize("NFKD", word.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def query_terms(query: Optional[str]) -> set:
+    if not query:
+        return set()
+    return {
+        normalize(word) for word in re.findall(r"[^\W_]+", query, re.UNICODE)
+        if len(word) > 2 and normalize(word) not in STOPWORDS
+    }
+
+
+@dataclass
+class Section:
+    index: int
+    text: str
+    tokens: int
+    score: float = 0.0
+
+
+@dataclass
+class PackedText:
+    """Texto empacotado no orçamento e o que ficou de fora"""
+    text: str
+    tokens: int
+    original_tokens: int
+    dropped_sections: int = 0
+    kept_sections: List[int] = field(default_factory=list)
+
+
+def split_sections(text: str, max_section_tokens: int) -> List[str]:
+    """Blocos separados por linha em branco; blocos maiores que o limite viram grupos de linhas"""
+    sections = []
+    for block in re.split(r"\n\s*\n", text.strip()):
+        block = block.strip()
+        if not block:
+            continue
+        if estimate_tokens(block) <= max_section_tokens:
+            sections.append(block)
+            continue
+
+        # Linhas longas demais (OCR sem quebras) são divididas por palavras
+        lines = [
+            piece
+            for line in block.splitlines()
+            for piece in (chunk_by_tokens(line, max_section_tokens) if estimate_tokens(line) > max_section_tokens else [line])
+        ]
+        group, group_tokens = [], 0
+        for line in lines:
+            line_tokens = estimate_tokens(line) + 1
+            if group and group_tokens + line_tokens > max_section_tokens:
+                sections.append("\n".join(group))
+                group, group_tokens = [], 0
+            group.append(line)
+            group_tokens += line_tokens
+        if group:
+            sections.append("\n".join(group))
+    return sections
+
+
+def score_section(section: Section, terms: set) -> float:
+    """Relevância por token: termos da query, títulos de seção conhecidos e posição"""
+    words = [normalize(word) for word in re.findall(r"[^\W_]+", section.text, re.UNICODE)]
+    first_line_words = {normalize(word) for word in re.findall(r"[^\W_]+", section.text.split("\n", 1)[0], re.UNICODE)}
+
+    score = 0.0
+    if terms:
+        score += 3.0 * sum(1 for word in words if word in terms)
+    if first_line_words & SECTION_KEYWORDS:
+        score += 2.0
+    # O topo do currículo costuma trazer nome, contato e resumo
+    score += 2.0 / (1 + section.index)
+    return score / max(section.tokens, 1) * 100
+
+
+def pack_text(text: str, budget_tokens: int, query: Optional[str] = None) -> PackedText:
+    """Empacota as seções mais relevantes em até `budget_tokens`, na ordem original"""
+    original_tokens = estimate_tokens(text)
+    if original_tokens <= budget_tokens:
+        return PackedText(text=text, tokens=original_tokens, original_tokens=original_tokens)
+
+    terms = query_terms(query)
+    sections = [
+        Section(index=index, text=block, tokens=estimate_tokens(block))
+        for index, block in enumerate(split_sections(text, max(budget_tokens // 4, 32)))
+    ]
+    for section in sections:
+        section.score = score_section(section, terms)
+
+    # Cabeçalho (nome e contato) sempre entra se couber
+    ranked = sorted(sections[1:], key=lambda section: section.score, reverse=True)
+    if sections:
+        ranked.insert(0, sections[0])
+
+    kept, used = [], 0
+    omission_tokens = estimate_tokens(OMITTED) + 2
+    for section in ranked:
+        cost = section.tokens + omission_tokens
+        if used + cost <= budget_tokens:
+            kept.append(section)
+            used += cost
+
+    kept.sort(key=lambda section: section.index)
+    parts, previous = [], -1
+    for section in kept:
+        if section.index != previous + 1:
+            parts.append(OMITTED)
+        parts.append(section.text)
+        previous = section.index
+    if previous != len(sections) - 1:
+        parts.append(OMITTED)
+
+    packed = "\n\n".join(parts)
+    return PackedText(
+        text=packed,
+        tokens=estimate_tokens(packed),
+        original_tokens=original_tokens,
+        dropped_sections=len(sections) - len(kept),
+        kept_sections=[section.index for section in kept]
+    )
+
+
+def chunk_by_tokens(text: str, max_tokens: int) -> List[str]:
+    """Divide o texto em pedaços de até `max_tokens`, sem quebrar palavras"""
+    chunks, current, current_tokens = [], [], 0
+    for word in text.split():
+        word_tokens = estimate_tokens(word)
+        if current and current_tokens + word_tokens > max_tokens:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(word)
+        current_tokens += word_tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+class TokenUsageStats:
+    """Tokens de prompt estimados x reais (informados pela API) por tipo de chamada"""
+
+    def __init__(self):
+        self.counters = Counter()
+
+    def record_packing(self, packed: PackedText) -> None:
+        self.counters["packed_texts"] += 1
+        self.counters["packed_original_tokens"] += packed.original_tokens
+        self.counters["packed_tokens"] += packed.tokens
+        self.counters["dropped_sections"] += packed.dropped_sections
+
+    def record_call(self, kind: str, estimated_prompt_tokens: int, actual_prompt_tokens: Optional[int]) -> None:
+        self.counters[f"{kind}_calls"] += 1
+        if actual_prompt_tokens:
+            self.counters[f"{kind}_estimated_prompt_tokens"] += estimated_prompt_tokens
+            self.counters[f"{kind}_actual_prompt_tokens"] += actual_prompt_tokens
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(self.counters)
+        kinds = {key[:-len("_calls")] for key in self.counters if key.endswith("_calls")}
+        for kind in kinds:
+            actual = self.counters[f"{kind}_actual_prompt_tokens"]
+            if actual:
+                stats[f"{kind}_estimate_ratio"] = round(self.counters[f"{kind}_estimated_prompt_tokens"] / actual, 3)
+        return stats
+
+
+token_usage_stats = TokenUsageStats()
+
+metrics.register("llm_tokens", token_usage_stats.stats)
@@ -0,0 +1,112 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Optional, Union
+from fastapi import UploadFile
+from app.core.config import settings
+
+
+@dataclass
+class SpooledUpload:
+    """
+    Upload recebido em blocos: arquivos pequenos ficam em memória e os
+    maiores em um arquivo temporário, aberto pelos workers pelo caminho.
+    """
+    filename: str
+    size: int
+    sha256: str
+    data: Optional[bytes] = None
+    path: Optional[str] = None
+
+    @property
+    def source(self) -> Union[bytes, str]:
+        """Bytes ou caminho, no formato aceito pelos workers de OCR"""
+        return self.path if self.path is not None else self.data
+
+    @property
+    def buffered_bytes(self) -> int:
+        """Bytes mantidos em memória por este upload"""
+        return len(self.data) if self.data is not None else 0
+
+    def release(self) -> None:
+        """Libera os bytes em memória e remove o arquivo temporário"""
+        self.data = None
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+
+async def spool_upload(
+    file: UploadFile,
+    chunk_size: int = settings.upload_chunk_size,
+    memory_threshold: int = settings.upload_spool_threshold
+) -> SpooledUpload:
+    """Lê o upload em blocos, calculando o SHA-256 durante a leitura"""
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    spool = None
+    size = 0
+
+    try:
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+
+            if spool is None and size > memory_threshold:
+                spool = tempfile.NamedTemporaryFile(
+                    prefix="upload-",
+                    suffix=os.path.splitext(file.filename or "")[1],
+                    dir=settings.upload_spool_dir or None,
+                    delete=False
+                )
+                await asyncio.to_thread(spool.write, bytes(buffer))
+                buffer = bytearray()
+
+            if spool is None:
+                buffer.extend(chunk)
+            else:
+                await asyncio.to_thread(spool.write, chunk)
+    except BaseException:
+        if spool is not None:
+            spool.close()
+            os.remove(spool.name)
+        raise
+
+    if spool is None:
+        return SpooledUpload(file.filename, size, digest.hexdigest(), data=bytes(buffer))
+
+    spool.close()
+    return SpooledUpload(file.filename, size, digest.hexdigest(), path=spool.name)
+
+
+async def detach_upload(
+    file: UploadFile,
+    chunk_size: int = settings.upload_chunk_size,
+    memory_threshold: int = settings.upload_spool_threshold
+) -> UploadFile:
+    """
+    Copia o upload para um arquivo próprio. O FastAPI fecha os arquivos do
+    formulário quando o endpoint retorna, antes de uma resposta em streaming
+    terminar; a cópia continua legível até ser fechada por quem a criou.
+    """
+    copy = tempfile.SpooledTemporaryFile(max_size=memory_threshold, dir=settings.upload_spool_dir or None)
+    try:
+        await file.seek(0)
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            await asyncio.to_thread(copy.write, chunk)
+        copy.seek(0)
+    except BaseException:
+        copy.close()
+        raise
+    return UploadFile(file=copy, filename=file.filename, size=file.size, headers=file.headers)
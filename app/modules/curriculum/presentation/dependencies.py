@@ -1,137 +1,603 @@
 from fastapi import Depends
 from app.modules.curriculum.infrastructure.repositories import DynamoDBAnalysisRepository
 from app.modules.curriculum.domain.services import OCRService, LLMService, LogService
+from app.modules.curriculum.domain.entities import ExtractionStatus
 from app.modules.curriculum.application.use_cases import AnalyzeCurriculaUseCase, GetAnalysisHistoryUseCase
+from app.modules.curriculum.infrastructure import ocr_workers
+from app.modules.curriculum.infrastructure.ocr_executor import OCRExecutor, ocr_executor
+from app.modules.curriculum.infrastructure.ocr_cache import build_ocr_cache_key, build_ocr_page_cache_key, ocr_result_cache
+from app.modules.curriculum.infrastructure.ocr_workers import OCROptions
+from app.modules.curriculum.infrastructure.ocr_reports import ocr_report_collector
+from app.modules.curriculum.infrastructure.ocr_providers import FileProfile, OCRProviderRegistry, ocr_providers
+from app.modules.curriculum.infrastructure.uploads import SpooledUpload, spool_upload
+from app.modules.curriculum.infrastructure.admission import AdmissionController, AdmissionRejectedError, ocr_admission
+from app.modules.curriculum.infrastructure.llm_client import LLMClientManager, llm_client_manager
+from app.modules.curriculum.infrastructure.token_budget import estimate_tokens, pack_text, token_usage_stats
+from app.modules.curriculum.infrastructure.llm_cache import build_llm_cache_key, llm_response_cache
+from app.core.cache import TwoTierCache
 import aioboto3
 from app.core.config import settings
+from app.core.concurrency import (
+    CircuitBreaker, CircuitOpenError, gather_limited, llm_circuit_breaker, llm_global_limiter, llm_rate_limiter,
+    ocr_global_limiter
+)
+from app.core.progress import emit_progress, progress_enabled
 import asyncio
-import openai
-import instructor
+import time
+from contextlib import nullcontext
 from typing import Dict, List
-from app.modules.curriculum.domain.models import QueryAnalysisResponse, SummaryResponse, ResumeSummary
+from pydantic import ValidationError
+from app.modules.curriculum.domain.models import (
+    CandidateAnalysis, QueryAnalysisResponse, QueryAnalysisSynthesis, SummaryResponse, ResumeSummary, ResumeSummaryBatch
+)
 import json
+import hashlib
 from decimal import Decimal
 
 class TesseractOCRService(OCRService):
-    """Implementação do OCR usando Tesseract"""
+    """Implementação do OCR usando Tesseract, roteando cada arquivo para o provedor mais barato"""
     
-    def __init__(self):
-        import fitz
-        import pytesseract
-        from PIL import Image
-        import io
-        
-        self.fitz = fitz
-        self.pytesseract = pytesseract
-        self.Image = Image
-        self.io = io
-        self.languages = 'por+eng'
+    def __init__(
+        self,
+        executor: OCRExecutor = ocr_executor,
+        cache: TwoTierCache = ocr_result_cache,
+        admission: AdmissionController = ocr_admission,
+        providers: OCRProviderRegistry = ocr_providers
+    ):
+        self.executor = executor
+        self.cache = cache
+        self.admission = admission
+        self.providers = providers
+        self.statuses: Dict[str, Dict] = {}
+        self.languages = settings.ocr_languages
+        self.options = OCROptions(
+            languages=self.languages,
+            tesseract_config=settings.ocr_tesseract_config,
+            pdf_dpi=settings.ocr_pdf_dpi,
+            pdf_min_text_chars=settings.ocr_pdf_min_text_chars,
+            preprocess=settings.ocr_preprocess_enabled,
+            target_dpi=settings.ocr_target_dpi,
+            binarize=settings.ocr_binarize,
+            deskew=settings.ocr_deskew,
+            engine=settings.ocr_engine,
+            adaptive=settings.ocr_adaptive_enabled,
+            adaptive_min_confidence=settings.ocr_adaptive_min_confidence,
+            adaptive_fallback_config=settings.ocr_adaptive_fallback_config,
+            language_routing=settings.ocr_language_routing,
+            language_sample_scale=settings.ocr_language_sample_scale
+        )
     
     async def extract_text_from_files(self, files):
-        """Extrai texto de múltiplos arquivos"""
-        file_texts = {}
+        """Extrai texto de múltiplos arquivos concorrentemente, dentro dos prazos configurados"""
+        self._buffered_bytes = 0
+        self.peak_buffered_bytes = 0
+        self.spooled_files = 0
+        self.statuses = {}
+        deadline = asyncio.get_running_loop().time() + settings.ocr_request_timeout
         
-        for file in files:
-            try:
-                content = await file.read()
-                text = await self._extract_text_from_content(content, file.filename)
-                file_texts[file.filename] = text
-            except Exception as e:
-                file_texts[file.filename] = f"Erro ao processar arquivo: {str(e)}"
+        texts = await gather_limited(
+            [self._extract_file_with_deadline(file, deadline) for file in files],
+            settings.ocr_request_concurrency,
+            ocr_global_limiter
+        )
         
-        return file_texts
+        ocr_report_collector.record_request_memory(len(files), self.peak_buffered_bytes, self.spooled_files)
+        return {file.filename: text for file, text in zip(files, texts)}
     
-    async def _extract_text_from_content(self, content, filename):
-        """Extrai texto baseado no tipo de arquivo"""
-        if filename.lower().endswith('.pdf'):
-            return self._extract_from_pdf(content)
+    def get_extraction_statuses(self):
+        """Situação da extração de cada arquivo da última chamada"""
+        return self.statuses
+    
+    async def _extract_file_with_deadline(self, file, deadline):
+        """
+        Extrai um arquivo com o menor entre o prazo por arquivo e o que resta
+        do prazo da requisição. Ao estourar, a tarefa é cancelada (e o worker
+        encerrado pelo executor) e o arquivo fica como "timed_out".
+        """
+        budget = min(settings.ocr_file_timeout, deadline - asyncio.get_running_loop().time())
+        try:
+            if budget <= 0:
+                raise asyncio.TimeoutError
+            text = await asyncio.wait_for(self._extract_file(file), budget)
+        except asyncio.TimeoutError:
+            ocr_report_collector.record_timeout(file.filename, max(budget, 0))
+            self.statuses[file.filename] = {
+                "status": ExtractionStatus.TIMED_OUT.value,
+                "detail": f"Extração excedeu o prazo de {max(budget, 0):.1f}s"
+            }
+            emit_progress("ocr", {"filename": file.filename, **self.statuses[file.filename], "chars": 0})
+            return ""
+        
+        if text.startswith("Erro ao processar"):
+            self.statuses[file.filename] = {"status": ExtractionStatus.ERROR.value, "detail": text}
         else:
-            return self._extract_from_image(content)
+            self.statuses[file.filename] = {"status": ExtractionStatus.OK.value, "detail": None}
+        emit_progress("ocr", {"filename": file.filename, **self.statuses[file.filename], "chars": len(text)})
+        return text
     
-    def _extract_from_pdf(self, content):
-        """Extrai texto de PDF"""
+    async def _extract_file(self, file):
+        """Extrai texto de um arquivo, isolando falhas e liberando o upload ao final"""
         try:
-            doc = self.fitz.open(stream=content, filetype="pdf")
-            text = ""
-            for page in doc:
-                text += page.get_text()
-            doc.close()
-            return text
+            upload = await spool_upload(file)
         except Exception as e:
-            return f"Erro ao processar PDF: {str(e)}"
+            return f"Erro ao processar arquivo: {str(e)}"
+        
+        self._buffered_bytes += upload.buffered_bytes
+        self.peak_buffered_bytes = max(self.peak_buffered_bytes, self._buffered_bytes)
+        if upload.path is not None:
+            self.spooled_files += 1
+        
+        try:
+            # Um arquivo já no cache não precisa de memória para rasterizar: só os
+            # que vão ao OCR passam pela admissão (e podem esperar ou ser recusados)
+            cached = await self._cached_text(upload, self.options)
+            if cached is not None:
+                return cached
+            async with self.admission.admit(upload, self.options) as plan:
+                return await self._extract_upload(
+                    upload, plan.options, plan.ocr_pixels, plan, cache_checked=not plan.downscaled
+                )
+        except AdmissionRejectedError:
+            raise
+        except Exception as e:
+            return f"Erro ao processar arquivo: {str(e)}"
+        finally:
+            self._buffered_bytes -= upload.buffered_bytes
+            upload.release()
     
-    def _extract_from_image(self, content):
-        """Extrai texto de imagem"""
+    async def _extract_text_from_content(self, content, filename):
+        """Extrai texto de bytes já carregados em memória"""
+        upload = SpooledUpload(filename, len(content), hashlib.sha256(content).hexdigest(), data=content)
+        return await self._extract_upload(upload)
+    
+    def _cache_key(self, upload, options):
+        """Chave do resultado no cache, ou None com o cache desligado"""
+        if not settings.ocr_cache_enabled:
+            return None
+        kind = 'pdf' if upload.filename.lower().endswith('.pdf') else 'image'
+        return build_ocr_cache_key(upload.sha256, kind, options, self.providers.policy)
+    
+    async def _cached_text(self, upload, options):
+        cache_key = self._cache_key(upload, options)
+        return await self.cache.aget(cache_key) if cache_key else None
+    
+    async def _extract_upload(self, upload, options=None, ocr_pixels=0, plan=None, cache_checked=False):
+        """
+        Extrai texto baseado no tipo de arquivo, consultando o cache antes do
+        OCR (a menos que quem chamou já tenha consultado com as mesmas opções)
+        """
+        options = options or self.options
+        is_pdf = upload.filename.lower().endswith('.pdf')
+        
+        cache_key = self._cache_key(upload, options)
+        if cache_key and not cache_checked:
+            cached = await self.cache.aget(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
-            image = self.Image.open(self.io.BytesIO(content))
-            text = self.pytesseract.image_to_string(image, lang=self.languages)
-            return text.strip()
+            if is_pdf:
+                extraction = await self._extract_pdf(upload.source, options, ocr_pixels, plan)
+                ocr_report_collector.record_pdf(upload.filename, extraction)
+                text = extraction.text
+            else:
+                provider = self.providers.route(FileProfile("image", ocr_pixels=ocr_pixels), options).provider
+                result = await self.executor.run(provider.image_worker, upload.source, provider.configure(options))
+                result.provider = provider.name
+                ocr_report_collector.record_image(upload.filename, result)
+                text = result.text
+        except AdmissionRejectedError:
+            raise
         except Exception as e:
-            return f"Erro ao processar imagem: {str(e)}"
+            return f"Erro ao processar {'PDF' if is_pdf else 'imagem'}: {str(e)}"
+        
+        if cache_key:
+            await self.cache.aset(cache_key, text)
+        return text
+    
+    async def _extract_pdf(self, source, options=None, ocr_pixels=0, plan=None):
+        """
+        Lê a camada de texto, reaproveita do cache as páginas escaneadas já
+        vistas, escolhe o provedor pelas páginas restantes e distribui o OCR
+        delas entre os workers. Com um plano de admissão, a memória da
+        rasterização é reservada só para essas páginas
+        """
+        options = options or self.options
+        extraction = await self.executor.run(ocr_workers.read_pdf_text_layer, source, options)
+        pending, extraction.pending_ocr = extraction.pending_ocr, []
+        pending = await self._reuse_cached_pages(extraction, pending, options)
+        
+        # O controle de admissão estima os pixels de todas as páginas
+        pages = len(extraction.pages)
+        profile = FileProfile("pdf", pages=pages, ocr_pages=len(pending), ocr_pixels=ocr_pixels * len(pending) // max(pages, 1))
+        provider = self.providers.route(profile, options).provider
+        extraction.provider = provider.name
+        if not pending:
+            return extraction
+        
+        page_options = provider.configure(options)
+        async with self.admission.admit_pages(plan, pending) if plan else nullcontext():
+            # Uma página que falha cancela as outras antes de a reserva e o upload serem liberados
+            results = await gather_limited(
+                [self.executor.run(provider.page_worker, source, index, page_options) for index in pending],
+                self.executor.max_workers
+            )
+        for index, result in zip(pending, results):
+            extraction.apply_ocr(index, result)
+            if settings.ocr_page_cache_enabled and index in extraction.page_hashes:
+                key = build_ocr_page_cache_key(extraction.page_hashes[index], options, self.providers.policy)
+                await self.cache.aset(key, result.text)
+        return extraction
+    
+    async def _reuse_cached_pages(self, extraction, pending, options):
+        """Preenche as páginas pendentes cujo conteúdo já passou pelo OCR e devolve as demais"""
+        if not settings.ocr_page_cache_enabled:
+            return pending
+        
+        remaining = []
+        for index in pending:
+            page_hash = extraction.page_hashes.get(index)
+            cached = None
+            if page_hash:
+                cached = await self.cache.aget(build_ocr_page_cache_key(page_hash, options, self.providers.policy))
+            if cached is None:
+                remaining.append(index)
+                continue
+            extraction.apply_ocr(index, ocr_workers.OCRResult(cached))
+            extraction.pages[index].strategy = "ocr_cached"
+        return remaining
+
+# Tamanho típico da resposta estruturada, reservado no orçamento de tokens até o uso real chegar
+RESPONSE_TOKENS_ESTIMATE = 500
+
+# Motivos de uma resposta degradada (análise local no lugar do LLM)
+DEGRADED_CIRCUIT_OPEN = "circuit_open"
+DEGRADED_HEDGE_TIMEOUT = "hedge_timeout"
 
 class InstructorLLMService(LLMService):
     """Implementação do LLM usando instructor para respostas estruturadas"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        llm_client: LLMClientManager = llm_client_manager,
+        cache: TwoTierCache = llm_response_cache,
+        breaker: CircuitBreaker = llm_circuit_breaker
+    ):
         self.client = None
         self.use_instructor = False
+        self.cache = cache
+        self.breaker = breaker
         
         try:
-            if settings.openai_api_key:
-                openai_client = openai.OpenAI(api_key=settings.openai_api_key)
-                self.client = instructor.from_openai(
-                    openai_client,
-                    mode=instructor.Mode.JSON,
-                )
-                self.use_instructor = True
-                print("✅ Instructor LLM configurado com sucesso!")
-            else:
-                print("⚠️ OpenAI API key não configurada. Usando análise simples...")
+            # Cliente e pool HTTP compartilhados, criados na inicialização da aplicação
+            self.client = llm_client.client
+            self.use_instructor = self.client is not None
         except Exception as e:
             print(f"⚠️ Erro ao configurar Instructor LLM: {e}")
             print("🔄 Usando fallback para análise simples...")
     
     async def analyze_with_query(self, file_texts, query):
-        """Análise com instructor baseada em query específica"""
+        """
+        Análise com instructor baseada em query específica. Com o circuito do
+        LLM aberto, ou sem resposta em LLM_HEDGE_DELAY, usa a análise local e
+        marca o resultado como degradado.
+        """
         all_text = "\n\n".join([
             f"=== {filename} ===\n{text}" 
             for filename, text in file_texts.items()
         ])
         
+        degraded_reason = None
         if self.use_instructor and self.client:
-            analysis = await self._analyze_with_instructor(all_text, query, file_texts)
+            try:
+                if not self._circuit_available():
+                    raise CircuitOpenError("Circuito do LLM aberto")
+                analysis = await self._hedged(self._analyze_with_instructor(all_text, query, file_texts))
+            except CircuitOpenError:
+                degraded_reason = DEGRADED_CIRCUIT_OPEN
+            except asyncio.TimeoutError:
+                degraded_reason = DEGRADED_HEDGE_TIMEOUT
+            if degraded_reason:
+                analysis = self._simple_text_analysis(all_text, query)
         else:
             analysis = self._simple_text_analysis(all_text, query)
         
-        return {
+        result = {
             "type": "query_analysis",
             "query": query,
             "analysis": analysis,
             "files_analyzed": list(file_texts.keys())
         }
+        if degraded_reason:
+            result.update(degraded=True, degraded_reason=degraded_reason)
+        return result
     
     async def generate_individual_summaries(self, file_texts):
-        """Gera resumo individual de cada currículo usando instructor"""
-        summaries = {}
+        """
+        Gera resumo individual de cada currículo usando instructor. Currículos
+        curtos são agrupados em chamadas em lote (LLM_SUMMARY_BATCH_ENABLED);
+        os grandes continuam em chamadas próprias.
         
-        for filename, text in file_texts.items():
+        Arquivos resumidos sem o LLM (circuito aberto ou sem resposta em
+        LLM_HEDGE_DELAY) recebem o resumo local e aparecem em `degraded_files`.
+        """
+        degraded = {}
+        
+        def fallback(filenames, reason):
+            degraded.update((filename, reason) for filename in filenames)
+            return {filename: self._generate_simple_summary(file_texts[filename]) for filename in filenames}
+        
+        async def summarize(filename, text):
             try:
                 if self.use_instructor and self.client:
-                    summary = await self._generate_instructor_summary(text, filename)
-                else:
-                    summary = self._generate_simple_summary(text)
-                summaries[filename] = summary
+                    if not self._circuit_available():
+                        return fallback([filename], DEGRADED_CIRCUIT_OPEN)[filename]
+                    return await self._hedged(self._generate_instructor_summary(text, filename))
+                return self._generate_simple_summary(text)
+            except CircuitOpenError:
+                return fallback([filename], DEGRADED_CIRCUIT_OPEN)[filename]
+            except asyncio.TimeoutError:
+                return fallback([filename], DEGRADED_HEDGE_TIMEOUT)[filename]
             except Exception as e:
-                summaries[filename] = f"Erro ao gerar resumo: {str(e)}"
+                return f"Erro ao gerar resumo: {str(e)}"
         
-        return {
+        async def summarize_batch(filenames):
+            if len(filenames) == 1:
+                summary = await summarize(filenames[0], file_texts[filenames[0]])
+                emit_progress("summary", {"filename": filenames[0], "summary": summary})
+                return {filenames[0]: summary}
+            try:
+                if not self._circuit_available():
+                    raise CircuitOpenError("Circuito do LLM aberto")
+                summaries = await self._hedged(
+                    self._generate_batch_summaries({filename: file_texts[filename] for filename in filenames})
+                )
+            except CircuitOpenError:
+                summaries = fallback(filenames, DEGRADED_CIRCUIT_OPEN)
+            except asyncio.TimeoutError:
+                summaries = fallback(filenames, DEGRADED_HEDGE_TIMEOUT)
+            except Exception as e:
+                print(f"⚠️ Erro no resumo em lote, resumindo individualmente: {e}")
+                summaries = {}
+            # Currículos que faltaram na resposta do lote são resumidos sozinhos
+            missing = [filename for filename in filenames if filename not in summaries]
+            results = await gather_limited(
+                [summarize(filename, file_texts[filename]) for filename in missing],
+                settings.llm_request_concurrency
+            )
+            summaries.update(zip(missing, results))
+            for filename in filenames:
+                emit_progress("summary", {"filename": filename, "summary": summaries[filename]})
+            return summaries
+        
+        if self.use_instructor and self.client and settings.llm_summary_batch_enabled:
+            batches = self._plan_summary_batches(file_texts)
+        else:
+            batches = [[filename] for filename in file_texts]
+        
+        summaries = {}
+        for result in await gather_limited([summarize_batch(batch) for batch in batches], settings.llm_request_concurrency):
+            summaries.update(result)
+        
+        result = {
             "type": "individual_summaries",
-            "summaries": summaries
+            "summaries": {filename: summaries[filename] for filename in file_texts}
+        }
+        if degraded:
+            result.update(
+                degraded=True,
+                degraded_reason=next(iter(degraded.values())),
+                degraded_files=[filename for filename in file_texts if filename in degraded]
+            )
+        return result
+    
+    def _circuit_available(self):
+        """O circuito do LLM aceita chamadas (ou está desativado)"""
+        return not settings.llm_circuit_enabled or self.breaker.available
+    
+    @staticmethod
+    async def _hedged(aw):
+        """
+        Aguarda a chamada ao LLM por até LLM_HEDGE_DELAY segundos (0 = sem
+        limite). Como o fallback local responde na hora, começar o fallback
+        após o atraso equivale a desistir do LLM: a chamada é cancelada e
+        asyncio.TimeoutError leva o chamador à resposta degradada.
+        """
+        if settings.llm_hedge_delay <= 0:
+            return await aw
+        return await asyncio.wait_for(aw, settings.llm_hedge_delay)
+    
+    @staticmethod
+    def _plan_summary_batches(file_texts):
+        """
+        Agrupa currículos de até LLM_SUMMARY_BATCH_CV_TOKENS em lotes de até
+        LLM_SUMMARY_BATCH_TOKENS e LLM_SUMMARY_BATCH_MAX_ITEMS; os demais ficam sozinhos
+        """
+        batches, current, current_tokens = [], [], 0
+        for filename, text in file_texts.items():
+            tokens = estimate_tokens(text)
+            # Textos muito curtos voltam sem chamada ao LLM
+            if len(text) < 100 or tokens > settings.llm_summary_batch_cv_tokens:
+                batches.append([filename])
+                continue
+            if current and (
+                current_tokens + tokens > settings.llm_summary_batch_tokens
+                or len(current) >= settings.llm_summary_batch_max_items
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(filename)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+    
+    async def _generate_batch_summaries(self, file_texts):
+        """Resume vários currículos curtos em uma chamada; as respostas voltam por nome de arquivo"""
+        text = "\n\n".join(
+            f"=== ARQUIVO: {filename} ===\n{cv_text}"
+            for filename, cv_text in file_texts.items()
+        )
+        prompt = f"""
+            Você é um assistente de recrutamento especializado em resumir currículos.
+            
+            GERE UM RESUMO ESTRUTURADO PARA CADA UM DOS {len(file_texts)} CURRÍCULOS ABAIXO.
+            
+            CURRÍCULOS:
+            {text}
+            
+            INSTRUÇÕES:
+            1. Gere exatamente um resumo por currículo, no campo filename use o nome do ARQUIVO
+            2. Não misture informações de currículos diferentes
+            3. Identifique nome, habilidades, experiência e formação
+            4. Seja conciso mas informativo
+            5. Use linguagem profissional
+            
+            IMPORTANTE: Estruture a resposta conforme o modelo ResumeSummaryBatch.
+            """
+        
+        response = await self._create(prompt, ResumeSummaryBatch, timeout=60.0)
+        
+        return {
+            summary.filename: summary.model_dump()
+            for summary in response.summaries
+            if summary.filename in file_texts
         }
     
     async def _analyze_with_instructor(self, text, query, file_texts):
-        """Análise usando instructor"""
+        """Análise usando instructor: map-reduce por currículo ou prompt único (LLM_QUERY_MODE=single)"""
+        if settings.llm_query_mode == "single":
+            return await self._analyze_single_prompt(file_texts, query)
+        return await self._analyze_map_reduce(query, file_texts)
+    
+    async def _analyze_map_reduce(self, query, file_texts):
+        """
+        Avalia cada currículo contra a query em chamadas concorrentes (map) e
+        ranqueia as análises compactas em uma QueryAnalysisResponse (reduce)
+        """
+        rejected = False
+        
+        async def score(filename, text):
+            nonlocal rejected
+            try:
+                candidate = await self._analyze_candidate(text, query, filename)
+            except CircuitOpenError:
+                # Sem cancelar as demais: uma delas pode ser o teste do circuito semiaberto
+                rejected = True
+                return None
+            except Exception as e:
+                print(f"⚠️ Erro ao analisar {filename}: {e}")
+                return None
+            emit_progress("candidate", candidate.model_dump())
+            return candidate
+        
+        results = await gather_limited(
+            [score(filename, text) for filename, text in file_texts.items()],
+            settings.llm_request_concurrency
+        )
+        if rejected:
+            # O circuito abriu durante a análise: a requisição inteira vai para o fallback
+            raise CircuitOpenError("Circuito do LLM aberto durante a análise")
+        candidates = sorted(
+            (candidate for candidate in results if candidate is not None),
+            key=lambda candidate: candidate.match_score,
+            reverse=True
+        )
+        if not candidates:
+            return "Erro na análise Instructor: nenhum currículo pôde ser analisado. Usando análise simples..."
+        
+        synthesis = None
+        if settings.llm_query_reduce == "llm":
+            try:
+                synthesis = await self._synthesize_analysis(query, candidates)
+            except Exception as e:
+                print(f"⚠️ Erro na síntese da análise, usando consolidação local: {e}")
+        if synthesis is None:
+            synthesis = self._merge_analysis(candidates)
+        
+        return QueryAnalysisResponse(
+            query=query,
+            best_candidates=candidates,
+            total_candidates_analyzed=len(candidates),
+            **synthesis.model_dump()
+        ).model_dump()
+    
+    async def _analyze_candidate(self, text, query, filename):
+        """Map: análise compacta de um currículo em relação à query"""
+        text = self._pack(text, settings.llm_cv_token_budget, query)
+        prompt = f"""
+            Você é um assistente especializado em recrutamento e seleção.
+            
+            AVALIE O CURRÍCULO ABAIXO EM RELAÇÃO À PERGUNTA DO RECRUTADOR.
+            
+            PERGUNTA DO RECRUTADOR: {query}
+            
+            ARQUIVO: {filename}
+            CURRÍCULO:
+            {text}
+            
+            INSTRUÇÕES IMPORTANTES:
+            1. Analise APENAS o conteúdo real do currículo
+            2. NÃO invente informações que não estão no currículo
+            3. match_score de 0 a 100 indica o quanto o candidato atende à pergunta
+            4. Seja conciso: poucas habilidades, pontos fortes e fracos, os mais relevantes
+            """
+        
+        candidate = await self._create(prompt, CandidateAnalysis, timeout=30.0)
+        # O modelo não escolhe o arquivo: a análise pertence ao currículo enviado
+        candidate.filename = filename
+        return candidate
+    
+    async def _synthesize_analysis(self, query, candidates):
+        """Reduce: conclusão a partir das análises já ranqueadas, sem reenviar os currículos"""
+        ranking = "\n".join(
+            f"{position}. {candidate.name} ({candidate.filename}) - score {candidate.match_score:.0f}; "
+            f"fortes: {', '.join(candidate.strengths[:3]) or '-'}; "
+            f"fracos: {', '.join(candidate.weaknesses[:3]) or '-'}"
+            for position, candidate in enumerate(candidates, start=1)
+        )
+        prompt = f"""
+            Você é um assistente especializado em recrutamento e seleção.
+            
+            PERGUNTA DO RECRUTADOR: {query}
+            
+            RANKING DOS CANDIDATOS (já avaliados individualmente):
+            {ranking}
+            
+            Com base APENAS no ranking acima, escreva um resumo geral da análise,
+            recomendações para o recrutador e os próximos passos.
+            """
+        
+        return await self._create(prompt, QueryAnalysisSynthesis, timeout=30.0, partial_event="analysis_partial")
+    
+    @staticmethod
+    def _merge_analysis(candidates):
+        """Reduce determinístico, sem chamada ao LLM"""
+        best = candidates[0]
+        summary = (
+            f"{len(candidates)} candidato(s) analisado(s). {best.name} ({best.filename}) tem a maior "
+            f"adequação, com score {best.match_score:.0f}."
+        )
+        recommendations = [
+            f"{candidate.name}: score {candidate.match_score:.0f}"
+            + (f" - {candidate.strengths[0]}" if candidate.strengths else "")
+            for candidate in candidates[:3]
+        ]
+        return QueryAnalysisSynthesis(
+            summary=summary,
+            recommendations=recommendations,
+            next_steps=[f"Agendar entrevista com {best.name}"]
+        )
+    
+    async def _analyze_single_prompt(self, file_texts, query):
+        """Análise em um único prompt com todos os currículos, dividindo o orçamento de tokens entre eles"""
         try:
+            budget = max(settings.llm_cv_token_budget // max(len(file_texts), 1), 100)
+            text = "\n\n".join(
+                f"=== {filename} ===\n{self._pack(cv_text, budget, query)}"
+                for filename, cv_text in file_texts.items()
+            )
+            
             prompt = f"""
             Você é um assistente especializado em recrutamento e seleção.
             
@@ -140,7 +606,7 @@ class InstructorLLMService(LLMService):
             PERGUNTA DO RECRUTADOR: {query}
             
             CURRÍCULOS ANALISADOS:
-            {text[:4000]}
+            {text}
             
             INSTRUÇÕES IMPORTANTES:
             1. Analise APENAS o conteúdo real dos currículos fornecidos
@@ -153,17 +619,12 @@ class InstructorLLMService(LLMService):
             IMPORTANTE: Baseie sua análise APENAS no conteúdo real dos currículos fornecidos.
             """
             
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
-                model=settings.openai_model,
-                messages=[{"role": "user", "content": prompt}],
-                response_model=QueryAnalysisResponse,
-                max_retries=3,
-                timeout=60.0
-            )
+            response = await self._create(prompt, QueryAnalysisResponse, timeout=60.0, partial_event="analysis_partial")
             
             return response.model_dump()
             
+        except CircuitOpenError:
+            raise
         except Exception as e:
             return f"Erro na análise Instructor: {str(e)}. Usando análise simples..."
     
@@ -173,12 +634,13 @@ class InstructorLLMService(LLMService):
             if len(text) < 100:
                 return text
             
+            text = self._pack(text, settings.llm_summary_token_budget)
             prompt = f"""
             Você é um assistente de recrutamento especializado em resumir currículos.
             
             GERE UM RESUMO ESTRUTURADO DO CURRÍCULO FORNECIDO.
             
-            CURRÍCULO: {text[:3000]}
+            CURRÍCULO: {text}
             
             INSTRUÇÕES:
             1. Extraia as informações mais relevantes
@@ -190,20 +652,115 @@ class InstructorLLMService(LLMService):
             IMPORTANTE: Estruture a resposta conforme o modelo ResumeSummary.
             """
             
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
-                model=settings.openai_model,
-                messages=[{"role": "user", "content": prompt}],
-                response_model=ResumeSummary,
-                max_retries=3,
-                timeout=30.0
-            )
+            response = await self._create(prompt, ResumeSummary, timeout=30.0)
             
             return response.model_dump()
             
+        except CircuitOpenError:
+            raise
         except Exception as e:
             return f"Erro ao gerar resumo Instructor: {str(e)}"
     
+    async def _create(self, prompt, response_model, timeout, partial_event=None):
+        """
+        Chamada estruturada ao modelo pelo cliente assíncrono. Aguarda os
+        orçamentos de RPM/TPM do processo e respeita o LLM_GLOBAL_CONCURRENCY;
+        o cancelamento da tarefa aborta a requisição HTTP.
+        
+        Respostas ficam no cache (LLM_CACHE_ENABLED) por modelo, temperatura,
+        prompt e schema; um acerto não consome orçamento nem chama a API.
+        
+        Com `partial_event` e alguém acompanhando o progresso, a resposta é
+        recebida em streaming e cada versão parcial do objeto vira um evento.
+        """
+        cache_key = None
+        if settings.llm_cache_enabled and self.cache is not None:
+            cache_key = build_llm_cache_key(settings.openai_model, settings.openai_temperature, prompt, response_model)
+            cached = await self._cached_response(cache_key, response_model)
+            if cached is not None:
+                return cached
+        
+        breaker = self.breaker if settings.llm_circuit_enabled else None
+        if breaker is not None:
+            breaker.before_call()
+        
+        prompt_tokens = estimate_tokens(prompt)
+        estimated_tokens = prompt_tokens + RESPONSE_TOKENS_ESTIMATE
+        # A espera pelos limites não conta na latência vista pelo circuito
+        started = None
+        try:
+            await llm_rate_limiter.acquire(estimated_tokens)
+            async with llm_global_limiter:
+                started = time.monotonic()
+                if partial_event and progress_enabled():
+                    # O streaming não informa o uso de tokens; a reserva estimada fica como está
+                    response = await self._stream_partials(prompt, response_model, timeout, partial_event)
+                    completion = None
+                else:
+                    response, completion = await self.client.chat.completions.create_with_completion(
+                        model=settings.openai_model,
+                        temperature=settings.openai_temperature,
+                        messages=[{"role": "user", "content": prompt}],
+                        response_model=response_model,
+                        max_retries=3,
+                        timeout=timeout
+                    )
+        except asyncio.CancelledError:
+            if breaker is not None:
+                breaker.record_cancelled(time.monotonic() - started if started else 0.0)
+            raise
+        except Exception:
+            if breaker is not None:
+                breaker.record_failure(time.monotonic() - started if started else 0.0)
+            raise
+        if breaker is not None:
+            breaker.record_success(time.monotonic() - started)
+        
+        usage = getattr(completion, "usage", None)
+        token_usage_stats.record_call(response_model.__name__, prompt_tokens, getattr(usage, "prompt_tokens", None))
+        if usage is not None and usage.total_tokens:
+            llm_rate_limiter.settle(estimated_tokens, usage.total_tokens)
+        
+        if cache_key is not None:
+            await self.cache.aset(cache_key, response.model_dump_json(), ttl=settings.llm_cache_ttl)
+        return response
+    
+    async def _stream_partials(self, prompt, response_model, timeout, event):
+        """Recebe a resposta em streaming (Partial do instructor), emitindo cada versão nova do objeto"""
+        latest, last_emitted = None, None
+        async for partial in self.client.chat.completions.create_partial(
+            model=settings.openai_model,
+            temperature=settings.openai_temperature,
+            messages=[{"role": "user", "content": prompt}],
+            response_model=response_model,
+            max_retries=3,
+            timeout=timeout
+        ):
+            latest = partial.model_dump(exclude_none=True)
+            if latest != last_emitted:
+                emit_progress(event, latest)
+                last_emitted = latest
+        # O último parcial é o objeto completo; validado pelo modelo original
+        return response_model.model_validate(latest or {})
+    
+    async def _cached_response(self, cache_key, response_model):
+        """Resposta do cache validada pelo response_model; entradas inválidas contam como falta"""
+        value = await self.cache.aget(cache_key)
+        if value is None:
+            return None
+        try:
+            return response_model.model_validate_json(value)
+        except ValidationError as e:
+            print(f"⚠️ Resposta inválida no cache do LLM, chamando o modelo: {e}")
+            return None
+    
+    @staticmethod
+    def _pack(text, budget_tokens, query=None):
+        """Seções mais relevantes do currículo dentro do orçamento de tokens"""
+        packed = pack_text(text, budget_tokens, query)
+        token_usage_stats.record_packing(packed)
+        return packed.text
+    
     def _simple_text_analysis(self, text, query):
         """Análise simples baseada em palavras-chave (fallback)"""
         query_lower = query.lower()
@@ -1,10 +1,17 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
-from typing import List, Optional
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, List, Optional
 from app.modules.curriculum.presentation.schemas import AnalysisResponse, HealthResponse
 from app.modules.curriculum.presentation.dependencies import get_analyze_use_case, get_history_use_case
 from app.modules.curriculum.application.use_cases import AnalyzeCurriculaUseCase, GetAnalysisHistoryUseCase
+from app.modules.curriculum.infrastructure.admission import AdmissionRejectedError
+from app.modules.curriculum.infrastructure.uploads import detach_upload
 from app.core.security import validate_files
+from app.core.metrics import metrics
+from app.core.concurrency import ClientDisconnectedError, cancel_on_disconnect
 from datetime import datetime
+import json
 
 router = APIRouter(prefix="/api/v1")
 misc = APIRouter(prefix="/api/v1")
@@ -23,8 +30,14 @@ async def health_check():
         }
     }
 
+@misc.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Métricas internas dos componentes (cache, pool de OCR, etc.)"""
+    return metrics.snapshot()
+
 @router.post("/curriculum/", response_model=AnalysisResponse)
 async def analyze_curriculum(
+    request: Request,
     files: List[UploadFile] = File(..., description="Arquivos PDF, JPG ou PNG"),
     query: Optional[str] = Form(None, description="Pergunta opcional para análise específica"),
     request_id: str = Form(..., description="ID único da requisição"),
@@ -90,15 +103,67 @@ async def analyze_curriculum(
     - O sistema suporta múltiplos formatos de arquivo (PDF, JPG, PNG)
     - O tempo de processamento varia conforme o número e tamanho dos arquivos
     - Todos os arquivos são processados usando OCR antes da análise por LLM
+    - Se o cliente desconectar, o OCR e as chamadas ao LLM em andamento são cancelados
     """
     try:
         validate_files(files)
         
-        result = await use_case.execute(files, query, request_id, user_id)
+        result = await cancel_on_disconnect(request, use_case.execute(files, query, request_id, user_id))
         return result
+    except AdmissionRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except ClientDisconnectedError as e:
+        # Ninguém vai ler a resposta; 499 apenas marca o caso nos logs de acesso
+        raise HTTPException(status_code=499, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Formata um evento no padrão Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data), ensure_ascii=False)}\n\n"
+
+@router.post("/curriculum/stream")
+async def analyze_curriculum_stream(
+    files: List[UploadFile] = File(..., description="Arquivos PDF, JPG ou PNG"),
+    query: Optional[str] = Form(None, description="Pergunta opcional para análise específica"),
+    request_id: str = Form(..., description="ID único da requisição"),
+    user_id: str = Form(..., description="ID do usuário solicitante"),
+    use_case: AnalyzeCurriculaUseCase = Depends(get_analyze_use_case)
+):
+    """
+    Mesma análise de `POST /curriculum/`, com o progresso enviado como Server-Sent Events.
+    
+    **Eventos (`event:` / `data:` em JSON):**
+    - **started**: arquivos recebidos
+    - **ocr**: texto de um arquivo extraído (`filename`, `status`, `detail`, `chars`)
+    - **ocr_complete**: situação de todos os arquivos, antes das chamadas ao LLM
+    - **summary**: resumo de um currículo pronto (sem query)
+    - **candidate**: análise de um candidato em relação à query
+    - **analysis_partial**: versão parcial da conclusão da análise, enquanto o modelo responde
+    - **result**: resposta completa, no mesmo formato do `POST /curriculum/`
+    - **error**: falha na análise (`code`, `detail`)
+    
+    Se o cliente fechar a conexão, o OCR e as chamadas ao LLM em andamento são cancelados.
+    """
+    validate_files(files)
+    # Os arquivos do formulário são fechados quando esta função retorna
+    files = [await detach_upload(file) for file in files]
+    
+    async def events():
+        try:
+            async for event, data in use_case.stream(files, query, request_id, user_id):
+                yield _sse_event(event, data)
+        finally:
+            for file in files:
+                await file.close()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Sem buffer em proxies, para cada evento chegar assim que é emitido
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/curriculum/history/{user_id}")
 async def get_analysis_history(
     user_id: str,
@@ -31,24 +31,36 @@ class AnalysisSummary(BaseModel):
 class IndividualSummary(BaseModel):
     """Resumo individual de um currículo"""
     filename: str = Field(..., description="Nome do arquivo original")
-    candidate_name: str = Field(..., description="Nome do candidato")
+    candidate_name: Optional[str] = Field(None, description="Nome do candidato")
     summary: str = Field(..., description="Resumo geral do perfil")
     key_skills: List[str] = Field(..., description="Principais habilidades identificadas")
     experience_highlights: List[str] = Field(..., description="Destaques da experiência profissional")
-    education: str = Field(..., description="Informações educacionais")
-    contact_info: str = Field(..., description="Informações de contato")
+    education: Optional[str] = Field(None, description="Informações educacionais")
+    contact_info: Optional[str] = Field(None, description="Informações de contato")
 
 class QueryAnalysisResult(BaseModel):
     """Resultado de análise com query específica"""
     type: AnalysisType = Field(AnalysisType.QUERY_ANALYSIS, description="Tipo de análise")
     query: str = Field(..., description="Query utilizada na análise")
-    analysis: AnalysisSummary = Field(..., description="Análise detalhada dos candidatos")
+    # Texto quando a análise é local (sem LLM configurado, circuito aberto ou hedge) ou falhou
+    analysis: Union[AnalysisSummary, str] = Field(..., description="Análise detalhada dos candidatos")
     files_analyzed: List[str] = Field(..., description="Lista de arquivos analisados")
+    degraded: bool = Field(False, description="Análise local usada no lugar do LLM")
+    degraded_reason: Optional[str] = Field(None, description="circuit_open ou hedge_timeout")
 
 class IndividualSummariesResult(BaseModel):
     """Resultado de resumos individuais"""
     type: AnalysisType = Field(AnalysisType.INDIVIDUAL_SUMMARIES, description="Tipo de análise")
-    summaries: Dict[str, IndividualSummary] = Field(..., description="Resumos individuais por arquivo")
+    # Texto para resumos locais e erros por arquivo
+    summaries: Dict[str, Union[IndividualSummary, str]] = Field(..., description="Resumos individuais por arquivo")
+    degraded: bool = Field(False, description="Algum resumo foi gerado localmente, sem o LLM")
+    degraded_reason: Optional[str] = Field(None, description="circuit_open ou hedge_timeout")
+    degraded_files: List[str] = Field(default_factory=list, description="Arquivos resumidos sem o LLM")
+
+class FileStatus(BaseModel):
+    """Situação da extração de texto de um arquivo"""
+    status: str = Field(..., description="ok, error ou timed_out")
+    detail: Optional[str] = Field(None, description="Detalhe do erro ou do prazo excedido")
 
 class AnalysisRequest(BaseModel):
     """Schema para requisição de análise"""
@@ -65,6 +77,7 @@ class AnalysisResponse(BaseModel):
     files_processed: int = Field(..., description="Número de arquivos processados")
     processing_time_seconds: float = Field(..., description="Tempo de processamento em segundos")
     result: Union[QueryAnalysisResult, IndividualSummariesResult] = Field(..., description="Resultado da análise")
+    file_statuses: Optional[Dict[str, FileStatus]] = Field(None, description="Situação da extração de cada arquivo")
     message: str = Field(..., description="Mensagem de status da operação")
 
     class Config:
@@ -1,6 +1,10 @@
 from transformers import pipeline
 from typing import Dict, List
 import asyncio
+from app.modules.curriculum.infrastructure.token_budget import chunk_by_tokens
+
+# Entrada máxima do modelo de sumarização (1024 tokens), com folga para a estimativa
+SUMMARIZER_CHUNK_TOKENS = 700
 
 class LLMService:
     def __init__(self):
@@ -54,7 +58,7 @@ class LLMService:
         if len(text) < 100:
             return text
         
-        chunks = self._split_text(text, max_length=1000)
+        chunks = chunk_by_tokens(text, SUMMARIZER_CHUNK_TOKENS)
         summaries = []
         
         for chunk in chunks:
@@ -1,9 +1,12 @@
 import fitz  
+import asyncio
 from typing import List, Dict
 from fastapi import UploadFile
 import io
 from PIL import Image
 import pytesseract
+from app.core.config import settings
+from app.core.concurrency import gather_limited, ocr_global_limiter
 
 class OCRService:
     def __init__(self):
@@ -11,25 +14,28 @@ class OCRService:
         self.languages = 'por+eng'
     
     async def extract_text_from_files(self, files: List[UploadFile]) -> Dict[str, str]:
-        """Extrai texto de múltiplos arquivos usando Tesseract"""
-        file_texts = {}
-        
-        for file in files:
-            try:
-                content = await file.read()
-                text = await self._extract_text_from_content(content, file.filename)
-                file_texts[file.filename] = text
-            except Exception as e:
-                file_texts[file.filename] = f"Erro ao processar arquivo: {str(e)}"
-        
-        return file_texts
+        """Extrai texto de múltiplos arquivos concorrentemente usando Tesseract"""
+        texts = await gather_limited(
+            [self._extract_file(file) for file in files],
+            settings.ocr_request_concurrency,
+            ocr_global_limiter
+        )
+        return {file.filename: text for file, text in zip(files, texts)}
+    
+    async def _extract_file(self, file: UploadFile) -> str:
+        """Extrai texto de um arquivo, isolando falhas"""
+        try:
+            content = await file.read()
+            return await self._extract_text_from_content(content, file.filename)
+        except Exception as e:
+            return f"Erro ao processar arquivo: {str(e)}"
     
     async def _extract_text_from_content(self, content: bytes, filename: str) -> str:
-        """Extrai texto baseado no tipo de arquivo"""
+        """Extrai texto baseado no tipo de arquivo, fora do event loop"""
         if filename.lower().endswith('.pdf'):
-            return self._extract_from_pdf(content)
+            return await asyncio.to_thread(self._extract_from_pdf, content)
         else:
-            return self._extract_from_image(content)
+            return await asyncio.to_thread(self._extract_from_image, content)
     
     def _extract_from_pdf(self, content: bytes) -> str:
         """Extrai texto de PDF usando PyMuPDF"""
@@ -0,0 +1,303 @@
+"""
+Benchmark de throughput do OCR sobre os currículos de exemplo.
+
+Executa o `TesseractOCRService` (pool de processos) e o `OCRService` legado
+sobre os arquivos de `data-examples/` e variantes sintéticas (imagens
+reduzidas/ampliadas e um PDF escaneado com várias páginas), sem cache.
+
+Para cada serviço e arquivo reporta percentis de latência, páginas por
+segundo, tempo de CPU (processo principal + workers) e pico de RSS. Os
+resultados são gravados em JSON por commit para comparação.
+
+Roda offline; requer apenas o binário local do tesseract.
+
+Uso:
+    python -m benchmarks.ocr_benchmark [--repeat 5] [--services tesseract legacy]
+    python -m benchmarks.ocr_benchmark --compare benchmarks/results/<sha>.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import fitz
+import psutil
+import pytesseract
+from fastapi import UploadFile
+from PIL import Image, ImageDraw
+
+from app.core.cache import TwoTierCache
+from app.core.config import settings
+from app.modules.curriculum.infrastructure.ocr_executor import OCRExecutor
+from app.modules.curriculum.presentation.dependencies import TesseractOCRService
+from app.services.ocr_service import OCRService
+
+DEFAULT_FILES = ["data-examples/cv-irineu-brito.pdf", "data-examples/cv1.png", "data-examples/cv2.jpg"]
+IMAGE_SCALES = (0.5, 2.0)
+SCANNED_PDF_PAGES = 3
+RESULTS_DIR = "benchmarks/results"
+
+
+class ResourceSampler:
+    """Amostra em segundo plano o RSS do processo principal somado ao dos workers"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_rss = 0
+        self._process = psutil.Process()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_rss = max(self.peak_rss, self.total_rss())
+            self._stop.wait(self.interval)
+
+    def total_rss(self) -> int:
+        total = self._process.memory_info().rss
+        for child in self._process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.NoSuchProcess:
+                pass
+        return total
+
+    def cpu_seconds(self) -> float:
+        """CPU (user + system) do processo principal e dos workers vivos"""
+        times = self._process.cpu_times()
+        total = times.user + times.system
+        for child in self._process.children(recursive=True):
+            try:
+                child_times = child.cpu_times()
+                total += child_times.user + child_times.system
+            except psutil.NoSuchProcess:
+                pass
+        return total
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def count_pages(path: str) -> int:
+    if path.lower().endswith(".pdf"):
+        with fitz.open(path) as doc:
+            return len(doc)
+    return 1
+
+
+def build_variants(paths, workdir: str):
+    """Gera as variantes sintéticas: imagens reescaladas e um PDF só com imagens"""
+    variants = []
+    for path in paths:
+        name, ext = os.path.splitext(os.path.basename(path))
+        if ext.lower() == ".pdf":
+            # Rasteriza a primeira página e repete como PDF escaneado, forçando o OCR por página.
+            # Cada cópia leva o número da página no bitmap, para que páginas iguais não
+            # sejam deduplicadas pelo hash de conteúdo
+            with fitz.open(path) as source:
+                pixmap = source[0].get_pixmap(dpi=200)
+                base = Image.open(io.BytesIO(pixmap.tobytes("png"))).convert("RGB")
+                scanned = fitz.open()
+                for number in range(SCANNED_PDF_PAGES):
+                    image = base.copy()
+                    ImageDraw.Draw(image).text((20, image.height - 40), f"Página {number + 1}", fill="black")
+                    buffer = io.BytesIO()
+                    image.save(buffer, format="PNG")
+                    page = scanned.new_page(width=source[0].rect.width, height=source[0].rect.height)
+                    page.insert_image(page.rect, stream=buffer.getvalue())
+                target = os.path.join(workdir, f"{name}-escaneado-{SCANNED_PDF_PAGES}p.pdf")
+                scanned.save(target)
+                scanned.close()
+            variants.append(target)
+            continue
+
+        with Image.open(path) as image:
+            for scale in IMAGE_SCALES:
+                size = (int(image.width * scale), int(image.height * scale))
+                target = os.path.join(workdir, f"{name}-x{scale:g}{ext}")
+                image.convert("RGB").resize(size, Image.Resampling.LANCZOS).save(target)
+                variants.append(target)
+    return variants
+
+
+def make_upload(path: str) -> UploadFile:
+    with open(path, "rb") as f:
+        return UploadFile(file=io.BytesIO(f.read()), filename=os.path.basename(path))
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+async def bench_file(service, path: str, repeat: int, sampler: ResourceSampler):
+    """Executa o OCR de um arquivo `repeat` vezes, após uma execução de aquecimento"""
+    await service.extract_text_from_files([make_upload(path)])
+
+    latencies = []
+    chars = 0
+    cpu_start = sampler.cpu_seconds()
+    for _ in range(repeat):
+        upload = make_upload(path)
+        start = time.perf_counter()
+        texts = await service.extract_text_from_files([upload])
+        latencies.append(time.perf_counter() - start)
+        chars = len(next(iter(texts.values())))
+    cpu_seconds = sampler.cpu_seconds() - cpu_start
+
+    pages = count_pages(path)
+    return {
+        "file": path,
+        "pages": pages,
+        "chars": chars,
+        "repeat": repeat,
+        "p50_seconds": round(percentile(latencies, 50), 4),
+        "p90_seconds": round(percentile(latencies, 90), 4),
+        "p99_seconds": round(percentile(latencies, 99), 4),
+        "mean_seconds": round(statistics.fmean(latencies), 4),
+        "pages_per_second": round(pages * repeat / sum(latencies), 3),
+        "cpu_seconds": round(cpu_seconds, 3),
+        "cpu_seconds_per_page": round(cpu_seconds / (pages * repeat), 3),
+        "peak_rss_bytes": sampler.peak_rss
+    }
+
+
+async def run_service(name: str, paths, repeat: int):
+    executor = None
+    if name == "tesseract":
+        # Sem reciclagem de workers para que o CPU deles não se perca entre amostras
+        executor = OCRExecutor(max_tasks_per_child=0)
+        executor.start()
+        service = TesseractOCRService(executor=executor, cache=TwoTierCache(memory_items=1))
+    else:
+        service = OCRService()
+
+    results = []
+    try:
+        with ResourceSampler() as sampler:
+            for path in paths:
+                result = await bench_file(service, path, repeat, sampler)
+                result["service"] = name
+                results.append(result)
+                print(
+                    f"{name:<10} {os.path.basename(path):<36} "
+                    f"p50={result['p50_seconds']:.3f}s p90={result['p90_seconds']:.3f}s "
+                    f"páginas/s={result['pages_per_second']:.2f} "
+                    f"cpu/página={result['cpu_seconds_per_page']:.2f}s "
+                    f"rss={result['peak_rss_bytes'] / (1024*1024):.0f}MB"
+                )
+    finally:
+        if executor is not None:
+            await executor.shutdown()
+    return results
+
+
+def git_sha() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current, baseline, baseline_path: str):
+    """Imprime a variação do p50 e de páginas/s em relação a um resultado anterior"""
+    previous = {(r["service"], os.path.basename(r["file"])): r for r in baseline["results"]}
+
+    print(f"\nComparação com {baseline.get('git_sha')} ({baseline_path}):")
+    for result in current["results"]:
+        old = previous.get((result["service"], os.path.basename(result["file"])))
+        if old is None:
+            continue
+        p50_delta = (result["p50_seconds"] - old["p50_seconds"]) / old["p50_seconds"] * 100
+        pps_delta = (result["pages_per_second"] - old["pages_per_second"]) / old["pages_per_second"] * 100
+        print(
+            f"{result['service']:<10} {os.path.basename(result['file']):<36} "
+            f"p50 {p50_delta:+.1f}%  páginas/s {pps_delta:+.1f}%"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", default=DEFAULT_FILES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--services", nargs="+", choices=["tesseract", "legacy"], default=["tesseract", "legacy"])
+    parser.add_argument("--no-variants", action="store_true", help="Não gera as variantes sintéticas")
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: benchmarks/results/<sha>.json)")
+    parser.add_argument("--compare", help="JSON de um resultado anterior para comparação")
+    args = parser.parse_args()
+
+    try:
+        tesseract_version = str(pytesseract.get_tesseract_version())
+    except pytesseract.TesseractNotFoundError:
+        parser.exit(1, "❌ Binário do tesseract não encontrado no PATH\n")
+
+    # Lido antes de rodar, já que a saída pode sobrescrever o mesmo arquivo
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    # O benchmark mede o OCR, não o cache: nem o de arquivos nem o de páginas
+    settings.ocr_cache_enabled = False
+    settings.ocr_page_cache_enabled = False
+
+    with tempfile.TemporaryDirectory(prefix="ocr-bench-") as workdir:
+        paths = list(args.files)
+        if not args.no_variants:
+            paths += build_variants(args.files, workdir)
+
+        results = []
+        for name in args.services:
+            results += asyncio.run(run_service(name, paths, args.repeat))
+
+    sha = git_sha()
+    report = {
+        "git_sha": sha,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "tesseract_version": tesseract_version,
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "ocr_max_workers": settings.ocr_max_workers,
+            "ocr_engine": settings.ocr_engine,
+            "ocr_tesseract_config": settings.ocr_tesseract_config,
+            "ocr_pdf_dpi": settings.ocr_pdf_dpi,
+            "ocr_preprocess_enabled": settings.ocr_preprocess_enabled,
+            "ocr_adaptive_enabled": settings.ocr_adaptive_enabled,
+            "ocr_language_routing": settings.ocr_language_routing
+        },
+        "results": [
+            {**result, "file": os.path.basename(result["file"])} for result in results
+        ]
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{sha}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✅ Resultados salvos em {output}")
+
+    if baseline is not None:
+        compare(report, baseline, args.compare)
+
+
+if __name__ == "__main__":
+    main()
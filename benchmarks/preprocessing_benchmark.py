@@ -0,0 +1,104 @@
+"""
+Benchmark do pré-processamento de imagem antes do Tesseract.
+
+Executa o OCR das imagens de exemplo com e sem o pré-processamento e
+compara tempo e qualidade. A qualidade é medida pela confiança média das
+palavras reportada pelo Tesseract e, quando existe um arquivo de
+referência `<imagem>.txt` ao lado da imagem, pela similaridade com ele.
+
+Uso:
+    python -m benchmarks.preprocessing_benchmark [--repeat 3] [imagens...]
+"""
+import argparse
+import difflib
+import json
+import os
+import statistics
+import time
+
+import pytesseract
+from PIL import Image
+
+from app.core.config import settings
+from app.modules.curriculum.infrastructure.image_preprocessing import preprocess_image
+
+DEFAULT_IMAGES = ["data-examples/cv1.png", "data-examples/cv2.jpg"]
+
+
+def run_ocr(path: str, preprocess: bool, config: str):
+    """Executa o OCR de uma imagem e devolve (texto, confiança média, tempo total, tempo de preparo)"""
+    start = time.perf_counter()
+    with Image.open(path) as image:
+        if preprocess:
+            image = preprocess_image(
+                image,
+                target_dpi=settings.ocr_target_dpi,
+                binarize=settings.ocr_binarize,
+                deskew=settings.ocr_deskew
+            )
+        else:
+            image.load()
+        prepared = time.perf_counter()
+        data = pytesseract.image_to_data(
+            image,
+            lang=settings.ocr_languages,
+            config=config,
+            output_type=pytesseract.Output.DICT
+        )
+    elapsed = time.perf_counter() - start
+
+    words = [word for word, conf in zip(data["text"], data["conf"]) if word.strip() and float(conf) >= 0]
+    confidences = [float(conf) for word, conf in zip(data["text"], data["conf"]) if word.strip() and float(conf) >= 0]
+    text = " ".join(words)
+    mean_confidence = statistics.fmean(confidences) if confidences else 0.0
+    return text, mean_confidence, elapsed, prepared - start
+
+
+def reference_similarity(path: str, text: str):
+    """Similaridade com o texto de referência, quando disponível"""
+    reference_path = os.path.splitext(path)[0] + ".txt"
+    if not os.path.exists(reference_path):
+        return None
+    with open(reference_path, encoding="utf-8") as f:
+        reference = " ".join(f.read().split())
+    return difflib.SequenceMatcher(None, reference, text).ratio()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("images", nargs="*", default=DEFAULT_IMAGES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--config", default=settings.ocr_tesseract_config)
+    parser.add_argument("--output", help="Arquivo JSON para salvar os resultados")
+    args = parser.parse_args()
+
+    results = []
+    for path in args.images:
+        for preprocess in (False, True):
+            runs = [run_ocr(path, preprocess, args.config) for _ in range(args.repeat)]
+            text, confidence = runs[-1][0], runs[-1][1]
+            result = {
+                "image": path,
+                "preprocess": preprocess,
+                "median_seconds": statistics.median(run[2] for run in runs),
+                "median_preprocess_seconds": statistics.median(run[3] for run in runs),
+                "mean_word_confidence": round(confidence, 2),
+                "words": len(text.split()),
+                "reference_similarity": reference_similarity(path, text)
+            }
+            results.append(result)
+            print(
+                f"{path:<32} preprocess={str(preprocess):<5} "
+                f"tempo={result['median_seconds']:.3f}s "
+                f"confiança={result['mean_word_confidence']:.1f} "
+                f"palavras={result['words']}"
+                + (f" similaridade={result['reference_similarity']:.3f}" if result["reference_similarity"] is not None else "")
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
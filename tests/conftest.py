@@ -7,6 +7,14 @@ import os
 from io import BytesIO
 from PIL import Image
 import fitz 
+import atexit
+import shutil
+
+# Keep the persistent OCR/LLM caches out of the repository's .cache directory
+_CACHE_ROOT = tempfile.mkdtemp(prefix="curriculum-tests-cache-")
+atexit.register(shutil.rmtree, _CACHE_ROOT, True)
+os.environ["OCR_CACHE_DIR"] = os.path.join(_CACHE_ROOT, "ocr")
+os.environ["LLM_CACHE_DIR"] = os.path.join(_CACHE_ROOT, "llm")
 
 from app.app import create_app
 from app.modules.curriculum.domain.entities import CurriculumAnalysis
@@ -45,6 +53,7 @@ def mock_ocr_service():
         "cv1.pdf": "João Silva\nDesenvolvedor Python\n5 anos de experiência",
         "cv2.jpg": "Maria Santos\nEngenheira de Software\n3 anos de experiência"
     })
+    mock.get_extraction_statuses = Mock(return_value={})
     return mock
 
 
@@ -149,9 +158,14 @@ def mock_upload_file():
             self.filename = filename
             self.content = content
             self.size = len(content)
+            self.position = 0
         
-        async def read(self):
-            return self.content
+        async def read(self, size=-1):
+            if size is None or size < 0:
+                size = len(self.content) - self.position
+            chunk = self.content[self.position:self.position + size]
+            self.position += len(chunk)
+            return chunk
     
     return MockUploadFile
 
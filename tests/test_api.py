@@ -186,6 +186,88 @@ class TestAPIEndpoints:
         finally:
             app.dependency_overrides = {}
     
+    @pytest.mark.unit
+    @pytest.mark.api
+    def test_analyze_curriculum_stream_sends_events(self, client, sample_pdf_content):
+        """Test the streaming endpoint sends SSE events with uploads still readable after the handler returns."""
+        # Arrange
+        async def fake_stream(files, query, request_id, user_id):
+            content = await files[0].read()
+            yield "ocr", {"filename": files[0].filename, "chars": len(content)}
+            yield "result", {"code": 200, "request_id": request_id}
+        
+        mock_use_case = Mock()
+        mock_use_case.stream = fake_stream
+        app.dependency_overrides = {
+            get_analyze_use_case: lambda: mock_use_case
+        }
+        
+        try:
+            # Act
+            files = {"files": ("cv1.pdf", sample_pdf_content, "application/pdf")}
+            data = {"request_id": "test-request-123", "user_id": "test-user@example.com"}
+            response = client.post("/api/v1/curriculum/stream", files=files, data=data)
+            
+            # Assert
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            assert response.text == (
+                f'event: ocr\ndata: {{"filename": "cv1.pdf", "chars": {len(sample_pdf_content)}}}\n\n'
+                'event: result\ndata: {"code": 200, "request_id": "test-request-123"}\n\n'
+            )
+        finally:
+            app.dependency_overrides = {}
+
+    @pytest.mark.unit
+    @pytest.mark.api
+    @pytest.mark.parametrize("query", ["Quem sabe Python?", None])
+    def test_analyze_curriculum_degraded_when_circuit_open(self, client, sample_pdf_content, query):
+        """Test the local fallback used while the LLM circuit is open validates against the response schema."""
+        # Arrange
+        from app.core.cache import TwoTierCache
+        from app.core.concurrency import CircuitBreaker
+        from app.modules.curriculum.application.use_cases import AnalyzeCurriculaUseCase
+        from app.modules.curriculum.presentation.dependencies import InstructorLLMService
+        breaker = CircuitBreaker(min_calls=1)
+        breaker.record_failure(1.0)
+        with patch("app.modules.curriculum.presentation.dependencies.settings.openai_api_key", ""):
+            llm_service = InstructorLLMService(cache=TwoTierCache(memory_items=8), breaker=breaker)
+        llm_service.client = Mock()
+        llm_service.use_instructor = True
+        ocr_service = Mock()
+        ocr_service.extract_text_from_files = AsyncMock(return_value={
+            "cv1.pdf": "João Silva - Desenvolvedor Python com Django, FastAPI e AWS. " * 4
+        })
+        ocr_service.get_extraction_statuses = Mock(return_value={"cv1.pdf": {"status": "ok", "detail": None}})
+        log_service = Mock(save_log=AsyncMock())
+        repository = Mock(save=AsyncMock())
+        use_case = AnalyzeCurriculaUseCase(ocr_service, llm_service, log_service, repository)
+        app.dependency_overrides = {
+            get_analyze_use_case: lambda: use_case
+        }
+
+        try:
+            # Act
+            files = {"files": ("cv1.pdf", sample_pdf_content, "application/pdf")}
+            data = {"request_id": "test-request-123", "user_id": "test-user@example.com"}
+            if query:
+                data["query"] = query
+            with patch("app.modules.curriculum.presentation.dependencies.settings.llm_circuit_enabled", True):
+                response = client.post("/api/v1/curriculum/", files=files, data=data)
+
+            # Assert
+            assert response.status_code == 200
+            result = response.json()["result"]
+            assert result["degraded"] is True
+            assert result["degraded_reason"] == "circuit_open"
+            if query:
+                assert "Python" in result["analysis"]
+            else:
+                assert result["degraded_files"] == ["cv1.pdf"]
+                assert result["summaries"]["cv1.pdf"].startswith("João Silva")
+        finally:
+            app.dependency_overrides = {}
+
     @pytest.mark.unit
     @pytest.mark.api
     def test_analyze_curriculum_missing_files(self, client):
@@ -358,6 +440,120 @@ class TestFileValidation:
         assert response.status_code in [200, 422]
 
 
+
+class TestUploadLimitMiddleware:
+    """Test cases for streaming upload limits."""
+    
+    @pytest.fixture
+    def client(self):
+        """Create test client for a minimal app with small limits."""
+        from fastapi import FastAPI, File, UploadFile
+        from typing import List
+        from app.core.middleware import UploadLimitMiddleware
+        
+        limited_app = FastAPI()
+        limited_app.add_middleware(UploadLimitMiddleware, max_file_size=1024, max_files=2, max_body_size=4096)
+        
+        @limited_app.post("/upload")
+        async def upload(files: List[UploadFile] = File(...)):
+            return {"files": [len(await f.read()) for f in files]}
+        
+        return TestClient(limited_app)
+    
+    @pytest.mark.unit
+    @pytest.mark.api
+    def test_accepts_files_within_limits(self, client):
+        """Test that valid uploads reach the endpoint."""
+        # Act
+        files = [
+            ("files", ("cv.pdf", b"%PDF-1.4 " + b"a" * 100, "application/pdf")),
+            ("files", ("cv.png", b"\x89PNG\r\n\x1a\n" + b"b" * 100, "image/png"))
+        ]
+        response = client.post("/upload", files=files)
+        
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {"files": [109, 108]}
+    
+    @pytest.mark.unit
+    @pytest.mark.api
+    def test_rejects_oversized_file(self, client):
+        """Test that a file above the limit is rejected with 413."""
+        # Act
+        files = {"files": ("cv.pdf", b"%PDF-1.4 " + b"a" * 2048, "application/pdf")}
+        response = client.post("/upload", files=files)
+        
+        # Assert
+        assert response.status_code == 413
+        assert "cv.pdf" in response.json()["detail"]
+    
+    @pytest.mark.unit
+    @pytest.mark.api
+    def test_rejects_too_many_files(self, client):
+        """Test that exceeding the file count is rejected with 413."""
+        # Act
+        files = [("files", (f"cv{i}.pdf", b"%PDF-1.4", "application/pdf")) for i in range(3)]
+        response = client.post("/upload", files=files)
+        
+        # Assert
+        assert response.status_code == 413
+    
+    @pytest.mark.unit
+    @pytest.mark.api
+    def test_rejects_oversized_body(self, client):
+        """Test that the declared body size is checked before reading."""
+        # Act
+        response = client.post("/upload", content=b"x" * 5000, headers={"content-type": "application/octet-stream"})
+        
+        # Assert
+        assert response.status_code == 413
+    
+    @pytest.mark.unit
+    @pytest.mark.api
+    def test_rejects_mismatched_magic_bytes(self, client):
+        """Test that content not matching the extension is rejected with 415."""
+        # Act
+        files = {"files": ("cv.pdf", b"MZ\x90\x00 not a pdf", "application/pdf")}
+        response = client.post("/upload", files=files)
+        
+        # Assert
+        assert response.status_code == 415
+    
+    @pytest.mark.unit
+    @pytest.mark.api
+    def test_rejections_carry_cors_headers(self, app):
+        """Test that 415 rejections from the real app are wrapped by CORS, so browsers can read them."""
+        # Arrange
+        client = TestClient(app)
+        files = {"files": ("cv.pdf", b"MZ\x90\x00 not a pdf", "application/pdf")}
+        
+        # Act
+        response = client.post("/api/v1/curriculum/", files=files, headers={"Origin": "https://rh.example.com"})
+        
+        # Assert
+        assert response.status_code == 415
+        assert "access-control-allow-origin" in response.headers
+    
+    @pytest.mark.unit
+    @pytest.mark.api
+    def test_scanner_handles_split_chunks(self):
+        """Test that limits hold when the body arrives in tiny chunks."""
+        from app.core.middleware import _MultipartScanner, UploadRejected
+        
+        # Arrange
+        body = (
+            b"--XyZ\r\nContent-Disposition: form-data; name=\"files\"; filename=\"cv.jpg\"\r\n\r\n"
+            + b"\xff\xd8\xff" + b"c" * 2000 + b"\r\n--XyZ--\r\n"
+        )
+        scanner = _MultipartScanner(b"XyZ", max_file_size=1024, max_files=2)
+        
+        # Act / Assert
+        with pytest.raises(UploadRejected) as exc:
+            for i in range(0, len(body), 7):
+                scanner.feed(body[i:i + 7])
+        assert exc.value.status_code == 413
+        assert scanner.part_size > 1024
+
 class TestErrorHandling:
     """Test cases for error handling."""
     
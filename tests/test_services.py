@@ -10,6 +10,11 @@ import fitz  # PyMuPDF
 from app.services.ocr_service import OCRService
 from app.services.llm_service import LLMService
 from app.services.log_service import LogService
+from app.modules.curriculum.infrastructure import ocr_workers
+from app.modules.curriculum.infrastructure.ocr_executor import OCRExecutor, OCRQueueFullError
+from app.modules.curriculum.presentation.dependencies import TesseractOCRService
+from app.core.cache import TwoTierCache
+from app.core.concurrency import CircuitBreaker
 
 
 class TestOCRService:
@@ -61,6 +66,60 @@ class TestOCRService:
         assert "error.pdf" in result
         assert "Erro ao processar arquivo" in result["error.pdf"]
     
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_extract_text_from_files_concurrently(self, ocr_service, mock_files):
+        """Test files are extracted concurrently, in upload order, with isolated failures."""
+        # Arrange
+        import asyncio
+        import time
+        
+        async def fake_extract(content, filename):
+            await asyncio.sleep(0.2)
+            if filename == "cv2.jpg":
+                raise Exception("Corrupted image")
+            return f"texto de {filename}"
+        
+        # Act
+        with patch.object(ocr_service, "_extract_text_from_content", side_effect=fake_extract):
+            start = time.perf_counter()
+            result = await ocr_service.extract_text_from_files(mock_files)
+            elapsed = time.perf_counter() - start
+        
+        # Assert
+        assert list(result) == ["cv1.pdf", "cv2.jpg", "cv3.png"]
+        assert result["cv1.pdf"] == "texto de cv1.pdf"
+        assert "Erro ao processar arquivo" in result["cv2.jpg"]
+        assert result["cv3.png"] == "texto de cv3.png"
+        assert elapsed < 0.5
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_gather_limited_respects_limit(self):
+        """Test the per-request fan-out cap."""
+        # Arrange
+        import asyncio
+        from app.core.concurrency import gather_limited
+        running = 0
+        peak = 0
+        
+        async def work(value):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return value
+        
+        # Act
+        result = await gather_limited([work(i) for i in range(6)], 2)
+        
+        # Assert
+        assert result == list(range(6))
+        assert peak == 2
+    
     @pytest.mark.unit
     @pytest.mark.services
     def test_extract_from_pdf_success(self, ocr_service, sample_pdf_file):
@@ -305,6 +364,1935 @@ class TestLogService:
         # Assert
         assert isinstance(result, list) 
 
+class TestOCRExecutor:
+    """Test cases for OCRExecutor."""
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_run_without_pool_uses_thread(self, sample_pdf_file):
+        """Test fallback to a thread when the pool was not started."""
+        # Arrange
+        executor = OCRExecutor(max_workers=1, max_tasks_per_child=1, queue_size=0, queue_timeout=1)
+        
+        # Act
+        result = (await executor.run(ocr_workers.extract_pdf_text, sample_pdf_file, ocr_workers.OCROptions())).text
+        
+        # Assert
+        assert not executor.is_running
+        assert "João Silva" in result or "Desenvolvedor Python" in result
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_run_in_process_pool(self, sample_pdf_file):
+        """Test extraction inside the process pool and clean shutdown."""
+        # Arrange
+        executor = OCRExecutor(max_workers=1, max_tasks_per_child=1, queue_size=1, queue_timeout=30)
+        executor.start()
+        
+        try:
+            # Act
+            first = await executor.run(ocr_workers.extract_pdf_text, sample_pdf_file, ocr_workers.OCROptions())
+            second = await executor.run(ocr_workers.extract_pdf_text, sample_pdf_file, ocr_workers.OCROptions())
+        finally:
+            await executor.shutdown()
+        
+        # Assert
+        assert first.text == second.text
+        assert executor.stats()["completed"] == 2
+        assert not executor.is_running
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_run_rejects_when_queue_is_full(self):
+        """Test bounded submission queue."""
+        # Arrange
+        import asyncio
+        import time
+        executor = OCRExecutor(max_workers=1, max_tasks_per_child=0, queue_size=0, queue_timeout=0.1)
+        executor.start()
+        
+        try:
+            # Act
+            busy = asyncio.create_task(executor.run(time.sleep, 1))
+            await asyncio.sleep(0.05)
+            with pytest.raises(OCRQueueFullError):
+                await executor.run(time.sleep, 0)
+            await busy
+        finally:
+            await executor.shutdown()
+        
+        # Assert
+        assert executor.stats()["rejected"] == 1
+
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_cancelled_task_kills_worker_and_others_are_retried(self):
+        """Test cancelling a running task kills its worker and collateral tasks still finish."""
+        # Arrange
+        import asyncio
+        import time
+        executor = OCRExecutor(max_workers=2, max_tasks_per_child=0, queue_size=2, queue_timeout=30)
+        executor.start()
+        
+        try:
+            # Act
+            other = asyncio.create_task(executor.run(time.sleep, 6))
+            start = time.perf_counter()
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(executor.run(time.sleep, 60), timeout=5)
+            await other
+            after = await executor.run(abs, -3)
+            elapsed = time.perf_counter() - start
+        finally:
+            await executor.shutdown()
+        
+        # Assert
+        stats = executor.stats()
+        assert stats["cancelled"] == 1
+        assert stats["killed_workers"] == 1
+        assert stats["restarts"] == 1
+        assert after == 3
+        assert elapsed < 30
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_collateral_task_survives_repeated_kills(self):
+        """Test a task caught in two worker kills is resubmitted each time instead of failing."""
+        # Arrange
+        import asyncio
+        import time
+        executor = OCRExecutor(max_workers=2, max_tasks_per_child=0, queue_size=2, queue_timeout=30)
+        executor.start()
+        
+        try:
+            # Act
+            other = asyncio.create_task(executor.run(time.sleep, 4))
+            for _ in range(2):
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(executor.run(time.sleep, 60), timeout=2)
+            result = await other
+        finally:
+            await executor.shutdown()
+        
+        # Assert
+        stats = executor.stats()
+        assert result is None
+        assert stats["killed_workers"] == 2
+        assert stats["restarts"] == 2
+        assert stats["resubmitted"] == 2
+
+
+class TestTwoTierCache:
+    """Test cases for TwoTierCache."""
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_memory_lru_eviction(self):
+        """Test the in-memory tier keeps only the most recently used entries."""
+        # Arrange
+        cache = TwoTierCache(memory_items=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        
+        # Act
+        cache.set("c", "3")
+        
+        # Assert
+        assert cache.get("a") == "1"
+        assert cache.get("b") is None
+        assert cache.get("c") == "3"
+        assert cache.stats()["memory_hits"] == 3
+        assert cache.stats()["misses"] == 1
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """Test entries are served from disk by a new cache instance."""
+        # Arrange
+        TwoTierCache(memory_items=4, directory=str(tmp_path)).set("abcdef", "texto")
+        cache = TwoTierCache(memory_items=4, directory=str(tmp_path))
+        
+        # Act
+        value = cache.get("abcdef")
+        
+        # Assert
+        assert value == "texto"
+        assert cache.stats()["disk_hits"] == 1
+        assert not list(tmp_path.rglob("*.tmp"))
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_disk_tier_is_size_capped(self, tmp_path):
+        """Test least recently used disk entries are evicted above the cap."""
+        # Arrange
+        cache = TwoTierCache(memory_items=1, directory=str(tmp_path), max_disk_bytes=2500)
+        
+        # Act
+        for index in range(5):
+            cache.set(f"key{index:02d}", "x" * 1000)
+        
+        # Assert
+        assert cache.stats()["disk_bytes"] <= 2500
+        assert cache.stats()["evictions"] > 0
+        cache.clear_memory()
+        assert cache.get("key04") == "x" * 1000
+        assert cache.get("key00") is None
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_entries_expire_after_ttl(self, tmp_path):
+        """Test entries written with a TTL expire in memory and on disk."""
+        # Arrange
+        import time
+        cache = TwoTierCache(memory_items=4, directory=str(tmp_path))
+        cache.set("abcdef", "texto", ttl=60)
+        cache.set("ghijkl", "permanente")
+        
+        # Act
+        with patch("app.core.cache.time.time", return_value=time.time() + 120):
+            memory_value = cache.get("abcdef")
+            cache.clear_memory()
+            disk_value = TwoTierCache(memory_items=4, directory=str(tmp_path)).get("abcdef")
+            permanent = cache.get("ghijkl")
+        
+        # Assert
+        assert memory_value is None
+        assert disk_value is None
+        assert permanent == "permanente"
+        assert cache.stats()["expired"] == 1
+        assert not (tmp_path / "ab" / "abcdef").exists()
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_expired_entries_leave_the_disk_total(self, tmp_path):
+        """Test removing an expired entry on read also subtracts its size from the disk accounting."""
+        # Arrange
+        import time
+        cache = TwoTierCache(memory_items=4, directory=str(tmp_path), max_disk_bytes=1024 * 1024)
+        cache.set("ghijkl", "permanente")
+        permanent_bytes = cache.stats()["disk_bytes"]
+        cache.set("abcdef", "x" * 1000, ttl=60)
+        cache.set("mnopqr", "y" * 1000, ttl=60)
+        
+        # Act
+        with patch("app.core.cache.time.time", return_value=time.time() + 120):
+            from_memory = cache.get("abcdef")
+            cache.clear_memory()
+            from_disk = cache.get("mnopqr")
+        
+        # Assert
+        assert from_memory is None
+        assert from_disk is None
+        assert cache.stats()["disk_bytes"] == permanent_bytes
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_memory_hits_dont_wait_for_disk_writes(self, tmp_path):
+        """Test a slow disk write doesn't block memory hits on the event loop."""
+        # Arrange
+        import asyncio
+        import threading
+        import time
+        cache = TwoTierCache(memory_items=4, directory=str(tmp_path))
+        await cache.aset("abcdef", "texto")
+        fsync_started, release = threading.Event(), threading.Event()
+        
+        def slow_fsync(fd):
+            fsync_started.set()
+            release.wait(2)
+        
+        # Act
+        with patch("app.core.cache.os.fsync", side_effect=slow_fsync):
+            writer = asyncio.create_task(cache.aset("ghijkl", "lento"))
+            await asyncio.to_thread(fsync_started.wait, 2)
+            start = time.perf_counter()
+            value = await cache.aget("abcdef")
+            elapsed = time.perf_counter() - start
+            release.set()
+            await writer
+        
+        # Assert
+        assert value == "texto"
+        assert elapsed < 0.5
+        assert cache.get("ghijkl") == "lento"
+
+
+class TestHybridPDFExtraction:
+    """Test cases for per-page PDF extraction."""
+    
+    @pytest.fixture
+    def mixed_pdf(self):
+        """PDF with a text page followed by an image-only page."""
+        doc = fitz.open()
+        page = doc.new_page()
+        page.insert_text((50, 50), "João Silva - Desenvolvedor Python com 5 anos de experiência")
+        scanned = doc.new_page()
+        image = Image.new("RGB", (200, 100), color="white")
+        buffer = BytesIO()
+        image.save(buffer, format="PNG")
+        scanned.insert_image(scanned.rect, stream=buffer.getvalue())
+        content = doc.tobytes()
+        doc.close()
+        return content
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_only_image_pages_are_ocrd(self, mixed_pdf):
+        """Test text-layer pages skip OCR and image-only pages use it."""
+        # Arrange
+        options = ocr_workers.OCROptions(pdf_dpi=72)
+        
+        # Act
+        with patch.object(ocr_workers, "_ocr_image", return_value=ocr_workers.OCRResult("Certificado escaneado")) as mock_ocr:
+            result = ocr_workers.extract_pdf_text(mixed_pdf, options)
+        
+        # Assert
+        assert [page.strategy for page in result.pages] == ["text_layer", "ocr"]
+        assert mock_ocr.call_count == 1
+        assert "João Silva" in result.text
+        assert "Certificado escaneado" in result.text
+        assert all(page.elapsed_ms >= 0 for page in result.pages)
+
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_scanned_pages_are_ocrd_in_parallel_and_in_order(self, mixed_pdf):
+        """Test each image-only page becomes its own task and text keeps page order."""
+        # Arrange
+        doc = fitz.open(stream=mixed_pdf, filetype="pdf")
+        doc.insert_pdf(fitz.open(stream=mixed_pdf, filetype="pdf"), from_page=1, to_page=1)
+        content = doc.tobytes()
+        doc.close()
+        service = TesseractOCRService(executor=OCRExecutor(), cache=TwoTierCache(memory_items=8))
+        calls = []
+        
+        def fake_ocr_page(source, page_index, options):
+            calls.append(page_index)
+            return ocr_workers.OCRResult(f"pagina {page_index}\n", elapsed_ms=1.0, language="por")
+        
+        # Act
+        with patch.object(ocr_workers, "ocr_pdf_page", side_effect=fake_ocr_page):
+            result = await service._extract_pdf(content)
+        
+        # Assert
+        assert sorted(calls) == [1, 2]
+        assert [page.strategy for page in result.pages] == ["text_layer", "ocr", "ocr"]
+        assert result.text.index("João Silva") < result.text.index("pagina 1") < result.text.index("pagina 2")
+        assert result.pending_ocr == []
+        assert result.pages[1].language == "por"
+
+    @staticmethod
+    def scanned_pdf(colors):
+        """Image-only PDF with one page per color."""
+        doc = fitz.open()
+        for color in colors:
+            page = doc.new_page()
+            buffer = BytesIO()
+            Image.new("RGB", (200, 100), color=color).save(buffer, format="PNG")
+            page.insert_image(page.rect, stream=buffer.getvalue())
+        content = doc.tobytes()
+        doc.close()
+        return content
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_reupload_only_ocrs_changed_pages(self):
+        """Test unchanged scanned pages come from the page cache on a re-upload."""
+        # Arrange
+        service = TesseractOCRService(executor=OCRExecutor(), cache=TwoTierCache(memory_items=16))
+        original = self.scanned_pdf(["white", "gray", "black"])
+        edited = self.scanned_pdf(["white", "red", "black"])
+        calls = []
+
+        def fake_ocr_page(source, page_index, options):
+            calls.append((source, page_index))
+            return ocr_workers.OCRResult(f"pagina {page_index}\n", elapsed_ms=1.0)
+
+        # Act
+        with patch.object(ocr_workers, "ocr_pdf_page", side_effect=fake_ocr_page):
+            await service._extract_pdf(original)
+            result = await service._extract_pdf(edited)
+
+        # Assert
+        assert [index for source, index in calls if source is edited] == [1]
+        assert [page.strategy for page in result.pages] == ["ocr_cached", "ocr", "ocr_cached"]
+        assert result.text == "pagina 0\npagina 1\npagina 2\n"
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_failed_page_cancels_the_other_pages(self):
+        """Test a page that fails cancels its sibling OCR tasks before the error propagates."""
+        # Arrange
+        import asyncio
+        from app.core.config import settings
+        service = TesseractOCRService(executor=OCRExecutor(max_workers=4), cache=TwoTierCache(memory_items=16))
+        content = self.scanned_pdf(["white", "gray", "black"])
+        cancelled = []
+
+        async def fake_run(fn, *args):
+            if fn is ocr_workers.read_pdf_text_layer:
+                return fn(*args)
+            page_index = args[1]
+            if page_index == 0:
+                await asyncio.sleep(0.01)
+                raise OCRQueueFullError("Fila de OCR cheia")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(page_index)
+                raise
+
+        # Act
+        with patch.object(settings, "ocr_page_cache_enabled", False), \
+                patch.object(service.executor, "run", side_effect=fake_run):
+            with pytest.raises(OCRQueueFullError):
+                await service._extract_pdf(content)
+
+        # Assert
+        assert sorted(cancelled) == [1, 2]
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_page_hash_ignores_other_pages(self):
+        """Test a page's content hash depends only on what that page renders."""
+        # Arrange
+        first = fitz.open(stream=self.scanned_pdf(["white", "gray"]), filetype="pdf")
+        second = fitz.open(stream=self.scanned_pdf(["black", "gray"]), filetype="pdf")
+
+        # Act
+        hashes = [ocr_workers.page_content_hash(doc, doc[index]) for doc in (first, second) for index in (0, 1)]
+        first.close()
+        second.close()
+
+        # Assert
+        assert hashes[0] != hashes[2]
+        assert hashes[1] == hashes[3]
+
+
+class TestImagePreprocessing:
+    """Test cases for the image preprocessing pipeline."""
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_downscale_to_target_dpi(self):
+        """Test high-resolution photos are reduced to the target effective DPI."""
+        # Arrange
+        from app.modules.curriculum.infrastructure.image_preprocessing import preprocess_image
+        image = Image.new("RGB", (2480, 3508), color="white")
+        image.info["dpi"] = (600, 600)
+        
+        # Act
+        result = preprocess_image(image, target_dpi=300, binarize=False)
+        
+        # Assert
+        assert result.mode == "L"
+        assert result.size == (1240, 1754)
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_jpeg_is_decoded_at_reduced_scale(self):
+        """Test JPEG photos use draft decoding and still reach the target size."""
+        # Arrange
+        from app.modules.curriculum.infrastructure.image_preprocessing import preprocess_image
+        buffer = BytesIO()
+        Image.new("RGB", (4000, 3000), color="white").save(buffer, format="JPEG", dpi=(1000, 1000))
+        image = Image.open(BytesIO(buffer.getvalue()))
+        
+        # Act
+        result = preprocess_image(image, target_dpi=250, binarize=False)
+        
+        # Assert
+        assert result.size == (1000, 750)
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_placeholder_dpi_does_not_skip_downscale(self):
+        """Test phone photos declaring 72 DPI are still reduced using the page geometry."""
+        # Arrange
+        from app.modules.curriculum.infrastructure.image_preprocessing import estimate_dpi, preprocess_image
+        image = Image.new("RGB", (4032, 3024), color="white")
+        image.info["dpi"] = (72, 72)
+        
+        # Act
+        result = preprocess_image(image, target_dpi=300, binarize=False)
+        
+        # Assert
+        assert estimate_dpi(image) == pytest.approx(3024 / 8.27)
+        assert result.size[1] < 3024
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_adaptive_binarize_separates_text_from_uneven_background(self):
+        """Test dark strokes stay black on a shaded background and the rest turns white."""
+        # Arrange
+        import numpy as np
+        from app.modules.curriculum.infrastructure.image_preprocessing import adaptive_binarize
+        gradient = np.tile(np.linspace(120, 250, 200, dtype=np.float32), (100, 1))
+        gradient[40:60, 20:180] -= 80
+        image = Image.fromarray(gradient.clip(0, 255).astype(np.uint8), mode="L")
+        
+        # Act
+        result = np.asarray(adaptive_binarize(image, window=31))
+        
+        # Assert
+        assert set(np.unique(result)) <= {0, 255}
+        assert (result[45:55, 30:170] == 0).mean() > 0.9
+        assert (result[:20, :] == 255).mean() > 0.9
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_transparent_background_becomes_white(self):
+        """Test transparent pixels are composited over white, not black."""
+        # Arrange
+        from app.modules.curriculum.infrastructure.image_preprocessing import preprocess_image
+        image = Image.new("RGBA", (100, 100), color=(0, 0, 0, 0))
+        
+        # Act
+        result = preprocess_image(image, target_dpi=300, binarize=False)
+        
+        # Assert
+        assert result.getextrema() == (255, 255)
+
+
+class TestTesseractEngine:
+    """Test cases for the Tesseract engine selection."""
+    
+    @pytest.fixture(autouse=True)
+    def reset_engines(self):
+        """Drop cached engine handles between tests."""
+        from app.modules.curriculum.infrastructure import tesseract_engine
+        tesseract_engine._local.apis = {}
+        yield
+        tesseract_engine._local.apis = {}
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_parse_config(self):
+        """Test CLI-style configuration parsing."""
+        # Arrange
+        from app.modules.curriculum.infrastructure.tesseract_engine import parse_config
+        
+        # Act
+        psm, oem, variables = parse_config("--oem 1 --psm 6 -c preserve_interword_spaces=1")
+        
+        # Assert
+        assert (psm, oem) == (6, 1)
+        assert variables == {"preserve_interword_spaces": "1"}
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_inprocess_engine_is_initialized_once_and_reused(self):
+        """Test the in-process handle is created once and reused across calls."""
+        # Arrange
+        import sys
+        from app.modules.curriculum.infrastructure import tesseract_engine
+        fake_api = MagicMock()
+        fake_api.GetUTF8Text.return_value = "Maria Santos"
+        fake_module = MagicMock()
+        fake_module.PyTessBaseAPI.return_value = fake_api
+        image = Image.new("L", (10, 10), color=255)
+        
+        # Act
+        with patch.dict(sys.modules, {"tesserocr": fake_module}):
+            first = tesseract_engine.image_to_string(image, "por", "--oem 3 --psm 6", engine="inprocess")
+            second = tesseract_engine.image_to_string(image, "por", "--oem 3 --psm 6", engine="inprocess")
+        
+        # Assert
+        assert first == second == "Maria Santos"
+        fake_module.PyTessBaseAPI.assert_called_once_with(lang="por", psm=6, oem=3)
+        assert fake_api.Clear.call_count == 2
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_inprocess_engine_falls_back_to_subprocess(self):
+        """Test the subprocess path is used when tesserocr is unavailable."""
+        # Arrange
+        import sys
+        from app.modules.curriculum.infrastructure import tesseract_engine
+        image = Image.new("L", (10, 10), color=255)
+        
+        # Act
+        with patch.dict(sys.modules, {"tesserocr": None}), \
+                patch("pytesseract.image_to_string", return_value="texto") as mock_subprocess:
+            result = tesseract_engine.image_to_string(image, "por", "--psm 6", engine="inprocess")
+        
+        # Assert
+        assert result == "texto"
+        mock_subprocess.assert_called_once()
+
+
+
+class TestAdaptiveOCR:
+    """Test cases for confidence-driven two-pass OCR."""
+    
+    HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"
+    
+    @classmethod
+    def tsv(cls, *words):
+        """Build Tesseract TSV output from (block, par, line, conf, text) tuples."""
+        rows = [cls.HEADER]
+        for index, (block, par, line, conf, text) in enumerate(words):
+            rows.append(f"5\t1\t{block}\t{par}\t{line}\t{index}\t{10 + index * 60}\t{20 * line}\t50\t15\t{conf}\t{text}")
+        return "\n".join(rows)
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_clean_image_finishes_in_first_pass(self):
+        """Test high-confidence pages are not OCR'd again."""
+        # Arrange
+        from app.modules.curriculum.infrastructure import adaptive_ocr, tesseract_engine
+        image = Image.new("L", (400, 200), color=255)
+        first = self.tsv((1, 1, 1, 95, "Maria"), (1, 1, 1, 92, "Santos"), (1, 2, 1, 90, "Python"))
+        
+        # Act
+        with patch.object(tesseract_engine, "image_to_data", return_value=first) as mock_data:
+            text, stats = adaptive_ocr.recognize(image, "por", "--oem 3 --psm 6", "subprocess", min_confidence=60)
+        
+        # Assert
+        assert mock_data.call_count == 1
+        assert text == "Maria Santos\n\nPython"
+        assert stats.passes == 1
+        assert stats.words == 3
+        assert stats.low_confidence_words == 0
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_only_low_confidence_lines_are_refined(self):
+        """Test a weak line is re-read upscaled as a single line and merged back."""
+        # Arrange
+        from app.modules.curriculum.infrastructure import adaptive_ocr, tesseract_engine
+        image = Image.new("L", (400, 200), color=255)
+        first = self.tsv((1, 1, 1, 95, "Maria"), (1, 1, 2, 30, "Pyth0n"), (1, 1, 2, 35, "Djang"))
+        line = self.tsv((1, 1, 1, 91, "Python"), (1, 1, 1, 89, "Django"))
+        
+        # Act
+        with patch.object(tesseract_engine, "image_to_data", side_effect=[first, line]) as mock_data:
+            text, stats = adaptive_ocr.recognize(image, "por", "--oem 3 --psm 6", "subprocess", min_confidence=60)
+        
+        # Assert
+        assert text == "Maria\nPython Django"
+        assert mock_data.call_args_list[1].args[2] == "--oem 3 --psm 7"
+        assert mock_data.call_args_list[1].args[0].size[0] > 0
+        assert stats.refined_lines == 1
+        assert stats.passes == 2
+        assert stats.mean_confidence > 90
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_low_confidence_page_tries_fallback_segmentation(self):
+        """Test a weak page is re-run with the fallback mode and the better pass is kept."""
+        # Arrange
+        from app.modules.curriculum.infrastructure import adaptive_ocr, tesseract_engine
+        image = Image.new("L", (400, 200), color=255)
+        first = self.tsv((1, 1, 1, 20, "M@ria"), (1, 1, 1, 25, "S4ntos"))
+        fallback = self.tsv((1, 1, 1, 88, "Maria"), (1, 1, 1, 90, "Santos"))
+        
+        # Act
+        with patch.object(tesseract_engine, "image_to_data", side_effect=[first, fallback]) as mock_data:
+            text, stats = adaptive_ocr.recognize(
+                image, "por", "--oem 3 --psm 6", "subprocess",
+                min_confidence=60, fallback_config="--oem 3 --psm 3"
+            )
+        
+        # Assert
+        assert mock_data.call_args_list[1].args[2] == "--oem 3 --psm 3"
+        assert text == "Maria Santos"
+        assert stats.fallback_pass is True
+        assert stats.refined_lines == 0
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_combine_weights_confidence_by_words(self):
+        """Test page statistics are aggregated per file."""
+        # Arrange
+        from app.modules.curriculum.infrastructure.adaptive_ocr import ConfidenceStats
+        pages = [ConfidenceStats(words=30, mean_confidence=90.0), None, ConfidenceStats(words=10, mean_confidence=50.0, passes=3)]
+        
+        # Act
+        result = ConfidenceStats.combine(pages)
+        
+        # Assert
+        assert result.words == 40
+        assert result.mean_confidence == 80.0
+        assert result.passes == 4
+
+
+class TestLanguageRouting:
+    """Test cases for single-language model routing."""
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    @pytest.mark.parametrize("text,expected", [
+        ("Experiência de 5 anos com desenvolvimento de sistemas para a empresa, formação em Ciência da Computação", "por"),
+        ("Five years of experience in software development with Python and the AWS stack for the company", "eng"),
+        ("Worked as lead developer and as architect at the company; no remote work, as I do prefer on-site. No travel, do not relocate, as agreed", "eng"),
+        ("Python Django AWS Docker Kubernetes", None),
+    ])
+    def test_detect_language(self, text, expected):
+        """Test the dominant language is detected or reported as ambiguous."""
+        # Arrange
+        from app.modules.curriculum.infrastructure.language_detection import detect_language
+        
+        # Act
+        result = detect_language(text, ["por", "eng"])
+        
+        # Assert
+        assert result == expected
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_full_pass_uses_detected_language(self):
+        """Test the sample pass picks the model used by the full pass."""
+        # Arrange
+        from app.modules.curriculum.infrastructure import tesseract_engine
+        image = Image.new("L", (400, 400), color=255)
+        options = ocr_workers.OCROptions(languages="por+eng", adaptive=False)
+        sample_text = "Experiência em desenvolvimento de sistemas para a empresa com formação em computação"
+        
+        # Act
+        with patch.object(tesseract_engine, "image_to_string", side_effect=[sample_text, "Texto completo"]) as mock_ocr:
+            result = ocr_workers._ocr_image(image, options)
+        
+        # Assert
+        sample_call, full_call = mock_ocr.call_args_list
+        assert sample_call.args[0].size == (200, 100)
+        assert sample_call.args[1] == "por+eng"
+        assert full_call.args[1] == "por"
+        assert result.language == "por"
+        assert result.text == "Texto completo"
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_ambiguous_sample_keeps_combined_model(self):
+        """Test ambiguous samples fall back to the combined languages."""
+        # Arrange
+        from app.modules.curriculum.infrastructure import tesseract_engine
+        image = Image.new("L", (400, 400), color=255)
+        options = ocr_workers.OCROptions(languages="por+eng", adaptive=False)
+        
+        # Act
+        with patch.object(tesseract_engine, "image_to_string", side_effect=["Python AWS", "Python AWS Docker"]) as mock_ocr:
+            result = ocr_workers._ocr_image(image, options)
+        
+        # Assert
+        assert mock_ocr.call_args_list[1].args[1] == "por+eng"
+        assert result.language == "por+eng"
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_estimated_savings(self):
+        """Test time saved is estimated from the combined-model average."""
+        # Arrange
+        from app.modules.curriculum.infrastructure.ocr_reports import OCRReportCollector
+        collector = OCRReportCollector()
+        
+        # Act
+        with patch("app.modules.curriculum.infrastructure.ocr_reports.log_ocr_report"):
+            collector.record_image("a.png", ocr_workers.OCRResult("a", elapsed_ms=1000.0, language="por+eng"))
+            collector.record_image("b.png", ocr_workers.OCRResult("b", elapsed_ms=700.0, language="por", language_detection_ms=100.0))
+        
+        # Assert
+        stats = collector.stats()
+        assert stats["ocr_language_pages"] == {"por+eng": 1, "por": 1}
+        assert stats["ocr_language_estimated_saved_ms"] == 300.0
+
+
+class TestAdmissionControl:
+    """Test cases for decoded-size admission control."""
+    
+    @staticmethod
+    def spooled(filename, content):
+        import hashlib
+        from app.modules.curriculum.infrastructure.uploads import SpooledUpload
+        return SpooledUpload(filename, len(content), hashlib.sha256(content).hexdigest(), data=content)
+    
+    @staticmethod
+    def png(width, height):
+        buffer = BytesIO()
+        Image.new("RGB", (width, height), color="white").save(buffer, format="PNG")
+        return buffer.getvalue()
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_image_within_budget_is_admitted_unchanged(self):
+        """Test small images keep the default options."""
+        # Arrange
+        from app.modules.curriculum.infrastructure.admission import plan_admission
+        options = ocr_workers.OCROptions()
+        
+        # Act
+        plan = plan_admission(self.spooled("cv.png", self.png(800, 600)), options, 512 * 1024 * 1024, 100_000_000)
+        
+        # Assert
+        assert plan.rejection is None
+        assert plan.downscaled is False
+        assert plan.options == options
+        assert plan.peak_bytes > 800 * 600 * 3
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_image_over_budget_is_downscaled(self):
+        """Test images that don't fit get a pixel cap instead of being decoded in full."""
+        # Arrange
+        from app.modules.curriculum.infrastructure.admission import plan_admission
+        
+        # Act
+        plan = plan_admission(self.spooled("foto.png", self.png(3000, 3000)), ocr_workers.OCROptions(), 150 * 1024 * 1024, 100_000_000)
+        
+        # Assert
+        assert plan.rejection is None
+        assert plan.downscaled is True
+        assert 0 < plan.options.max_pixels < 3000 * 3000
+        assert plan.peak_bytes <= 150 * 1024 * 1024
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_image_over_pixel_limit_is_rejected(self):
+        """Test pixel bombs are rejected from the header alone."""
+        # Arrange
+        from app.modules.curriculum.infrastructure.admission import plan_admission
+        
+        # Act
+        plan = plan_admission(self.spooled("bomba.png", self.png(3000, 3000)), ocr_workers.OCROptions(), 1024 ** 3, 1_000_000)
+        
+        # Assert
+        assert "bomba.png" in plan.rejection
+    
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_pdf_over_budget_lowers_dpi(self, sample_pdf_file):
+        """Test PDFs that don't fit are rasterized at a lower DPI."""
+        # Arrange
+        from app.modules.curriculum.infrastructure.admission import plan_admission
+        
+        # Act
+        plan = plan_admission(self.spooled("cv.pdf", sample_pdf_file), ocr_workers.OCROptions(pdf_dpi=300), 60 * 1024 * 1024, 100_000_000)
+        
+        # Assert
+        assert plan.pages == 1
+        assert plan.downscaled is True
+        assert 150 <= plan.options.pdf_dpi < 300
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_memory_budget_queues_until_released(self):
+        """Test reservations wait for room and time out when none appears."""
+        # Arrange
+        import asyncio
+        from app.core.concurrency import MemoryBudget
+        budget = MemoryBudget(100)
+        await budget.acquire(60)
+        
+        # Act
+        waiter = asyncio.create_task(budget.acquire(60))
+        await asyncio.sleep(0.05)
+        queued = budget.waiting
+        await budget.release(60)
+        await waiter
+        
+        # Assert
+        assert queued == 1
+        assert budget.in_use == 60
+        with pytest.raises(asyncio.TimeoutError):
+            await budget.acquire(60, timeout=0.05)
+        assert budget.stats()["queued"] == 2
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_rejection_aborts_the_request(self, mock_upload_file):
+        """Test a rejected file surfaces as AdmissionRejectedError instead of an error string."""
+        # Arrange
+        from app.core.concurrency import MemoryBudget
+        from app.modules.curriculum.infrastructure.admission import AdmissionController, AdmissionRejectedError
+        admission = AdmissionController(MemoryBudget(1024 ** 3), max_image_pixels=1_000_000)
+        service = TesseractOCRService(executor=OCRExecutor(), cache=TwoTierCache(memory_items=8), admission=admission)
+        files = [mock_upload_file("bomba.png", self.png(3000, 3000))]
+        
+        # Act / Assert
+        with pytest.raises(AdmissionRejectedError) as exc:
+            await service.extract_text_from_files(files)
+        assert exc.value.status_code == 413
+        assert admission.stats()["rejected"] == 1
+        assert admission.stats()["in_use"] == 0
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_digital_pdfs_reserve_only_the_text_layer_read(self, mock_upload_file):
+        """Test PDFs with a text layer don't reserve rasterization memory for pages that skip OCR."""
+        # Arrange
+        import fitz
+        from app.core.concurrency import MemoryBudget
+        from app.modules.curriculum.infrastructure.admission import AdmissionController, pdf_pages_peak, plan_admission
+        doc = fitz.open()
+        for number in range(10):
+            doc.new_page().insert_text((50, 50), f"Página {number} - experiência com Python, FastAPI e AWS")
+        content = doc.tobytes()
+        doc.close()
+        admission = AdmissionController(MemoryBudget(400 * 1024 * 1024), timeout=0.2, parallel_pages=4)
+        service = TesseractOCRService(executor=OCRExecutor(), cache=TwoTierCache(memory_items=8), admission=admission)
+        service.options = ocr_workers.OCROptions(pdf_dpi=300)
+        files = [mock_upload_file("cv1.pdf", content), mock_upload_file("cv2.pdf", content)]
+        
+        # Act
+        texts = await service.extract_text_from_files(files)
+        plan = plan_admission(self.spooled("cv1.pdf", content), service.options, admission.budget.limit, 100_000_000, 4)
+        
+        # Assert
+        assert all("Página 9" in text for text in texts.values())
+        assert "rejected_busy" not in admission.stats()
+        assert admission.stats()["in_use"] == 0
+        assert admission.stats()["peak"] < 64 * 1024 * 1024
+        assert plan.peak_bytes < 32 * 1024 * 1024
+        assert pdf_pages_peak(plan, [], admission.parallel_pages) == 0
+        assert pdf_pages_peak(plan, list(range(10)), admission.parallel_pages) > 300 * 1024 * 1024
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_cached_files_skip_admission(self, mock_upload_file):
+        """Test a file already in the OCR cache is served even when the memory budget is full."""
+        # Arrange
+        import hashlib
+        from app.core.concurrency import MemoryBudget
+        from app.modules.curriculum.infrastructure.admission import AdmissionController
+        from app.modules.curriculum.infrastructure.ocr_cache import build_ocr_cache_key
+        budget = MemoryBudget(1024)
+        await budget.acquire(1024)
+        admission = AdmissionController(budget, timeout=0.05)
+        service = TesseractOCRService(executor=OCRExecutor(), cache=TwoTierCache(memory_items=8), admission=admission)
+        content = self.png(800, 600)
+        key = build_ocr_cache_key(hashlib.sha256(content).hexdigest(), "image", service.options, service.providers.policy)
+        await service.cache.aset(key, "texto em cache")
+        
+        # Act
+        with patch("app.modules.curriculum.presentation.dependencies.settings.ocr_cache_enabled", True):
+            texts = await service.extract_text_from_files([mock_upload_file("cv.png", content)])
+        
+        # Assert
+        assert texts == {"cv.png": "texto em cache"}
+        assert "admitted" not in admission.stats()
+        assert "rejected_busy" not in admission.stats()
+        assert service.cache.stats()["misses"] == 0
+
+class TestOCRProviders:
+    """Test cases for cost-based OCR provider routing."""
+
+    @staticmethod
+    def registry(preferred="auto", min_quality=0.8):
+        from app.modules.curriculum.infrastructure.ocr_providers import build_registry
+        return build_registry(preferred, min_quality)
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_digital_pdf_uses_text_layer_only(self):
+        """Test PDFs without pending pages skip OCR and scanned ones don't."""
+        # Arrange
+        from app.modules.curriculum.infrastructure.ocr_providers import FileProfile
+        registry = self.registry()
+        options = ocr_workers.OCROptions()
+
+        # Act
+        digital = registry.route(FileProfile("pdf", pages=2, ocr_pages=0), options)
+        scanned = registry.route(FileProfile("pdf", pages=2, ocr_pages=1), options)
+
+        # Assert
+        assert digital.provider.name == "text_layer"
+        assert scanned.provider.name != "text_layer"
+        assert "text_layer" not in scanned.candidates
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_inprocess_is_preferred_when_available(self):
+        """Test the in-process engine wins on cost and subprocess is the fallback."""
+        # Arrange
+        from app.modules.curriculum.infrastructure import ocr_providers
+        from app.modules.curriculum.infrastructure.ocr_providers import FileProfile
+        registry = self.registry()
+        profile = FileProfile("image", ocr_pixels=4_000_000)
+
+        # Act
+        with patch.object(ocr_providers, "inprocess_enabled", return_value=True):
+            available = registry.route(profile, ocr_workers.OCROptions())
+        with patch.object(ocr_providers, "inprocess_enabled", return_value=False):
+            missing = registry.route(profile, ocr_workers.OCROptions())
+
+        # Assert
+        assert available.provider.name == "tesseract_inprocess"
+        assert available.candidates["tesseract_inprocess"] < available.candidates["tesseract_subprocess"]
+        assert missing.provider.name == "tesseract_subprocess"
+        assert registry.stats()["routed_tesseract_subprocess"] == 1
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_fast_mode_needs_lower_quality_floor_or_pinning(self):
+        """Test the low-resolution mode is only used when allowed and pinned providers are honored."""
+        # Arrange
+        from app.modules.curriculum.infrastructure.ocr_providers import FileProfile
+        profile = FileProfile("image", ocr_pixels=4_000_000)
+        options = ocr_workers.OCROptions()
+
+        # Act
+        default = self.registry().route(profile, options)
+        relaxed = self.registry(min_quality=0.5).route(profile, options)
+        pinned = self.registry(preferred="tesseract_fast").route(profile, options)
+        unusable = self.registry(preferred="text_layer").route(profile, options)
+
+        # Assert
+        assert default.provider.name != "tesseract_fast"
+        assert relaxed.provider.name == pinned.provider.name == "tesseract_fast"
+        assert unusable.provider.name != "text_layer"
+        with pytest.raises(ValueError):
+            self.registry(preferred="easyocr")
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_service_runs_the_routed_provider(self, sample_image_file):
+        """Test images are OCR'd with the options of the chosen provider and the choice is recorded."""
+        # Arrange
+        import hashlib
+        from app.modules.curriculum.infrastructure.uploads import SpooledUpload
+        registry = self.registry(preferred="tesseract_fast")
+        service = TesseractOCRService(executor=OCRExecutor(), cache=TwoTierCache(memory_items=8), providers=registry)
+        service.executor.run = AsyncMock(return_value=ocr_workers.OCRResult("Python AWS"))
+        upload = SpooledUpload("cv.png", len(sample_image_file), hashlib.sha256(sample_image_file).hexdigest(), data=sample_image_file)
+
+        # Act
+        text = await service._extract_upload(upload, ocr_pixels=2_000_000)
+
+        # Assert
+        worker, _, options = service.executor.run.await_args.args
+        assert text == "Python AWS"
+        assert worker is ocr_workers.extract_image_text
+        assert options.target_dpi == 150 and options.adaptive is False
+        assert registry.stats()["routed_tesseract_fast"] == 1
+
+class TestInstructorLLMService:
+    """Test cases for the async instructor LLM service."""
+
+    @pytest.fixture
+    def llm(self):
+        """Instructor service wired to a fake async client, one summary call per CV."""
+        from app.modules.curriculum.presentation.dependencies import InstructorLLMService
+        with patch("app.modules.curriculum.presentation.dependencies.settings.openai_api_key", ""):
+            service = InstructorLLMService(cache=TwoTierCache(memory_items=64), breaker=CircuitBreaker())
+        service.client = MagicMock()
+        service.use_instructor = True
+        with patch("app.modules.curriculum.presentation.dependencies.settings.llm_summary_batch_enabled", False):
+            yield service
+
+    @staticmethod
+    def summary(filename):
+        from app.modules.curriculum.domain.models import ResumeSummary
+        return ResumeSummary(filename=filename, summary="Dev Python", key_skills=["Python"], experience_highlights=[])
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_summaries_run_concurrently_within_limit(self, llm):
+        """Test per-file summaries overlap on the event loop, capped by LLM_REQUEST_CONCURRENCY."""
+        # Arrange
+        import asyncio
+        active = 0
+        peak = 0
+        file_texts = {f"cv{i}.pdf": "Desenvolvedor Python " * 10 for i in range(5)}
+
+        async def fake_create(**kwargs):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+            return self.summary("cv.pdf"), None
+
+        llm.client.chat.completions.create_with_completion = fake_create
+
+        # Act
+        with patch("app.modules.curriculum.presentation.dependencies.settings.llm_request_concurrency", 2):
+            result = await llm.generate_individual_summaries(file_texts)
+
+        # Assert
+        assert peak == 2
+        assert list(result["summaries"]) == list(file_texts)
+        assert result["summaries"]["cv0.pdf"]["key_skills"] == ["Python"]
+
+    @staticmethod
+    def candidate(name, score):
+        from app.modules.curriculum.domain.models import CandidateAnalysis
+        return CandidateAnalysis(
+            name=name, filename="inventado.pdf", skills=["Python"], relevant_experience="Backend",
+            strengths=[f"Forte em {name}"], weaknesses=[], match_score=score
+        )
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_query_analysis_maps_every_cv_and_ranks(self, llm):
+        """Test each CV is scored in its own concurrent call and the reduce call sees the ranking."""
+        # Arrange
+        import asyncio
+        from app.modules.curriculum.domain.models import CandidateAnalysis, QueryAnalysisSynthesis
+        file_texts = {f"cv{i}.pdf": f"Candidato {i} " + "x" * 5000 for i in range(6)}
+        scores = {f"cv{i}.pdf": 10 * i for i in range(6)}
+        active = 0
+        peak = 0
+        reduce_prompts = []
+
+        async def fake_create(**kwargs):
+            nonlocal active, peak
+            prompt = kwargs["messages"][0]["content"]
+            if kwargs["response_model"] is QueryAnalysisSynthesis:
+                reduce_prompts.append(prompt)
+                return QueryAnalysisSynthesis(summary="cv5 lidera", recommendations=["Entrevistar"], next_steps=["Contato"]), None
+            assert kwargs["response_model"] is CandidateAnalysis
+            filename = next(name for name in file_texts if f"ARQUIVO: {name}" in prompt)
+            if filename == "cv2.pdf":
+                raise RuntimeError("timeout")
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+            return self.candidate(filename.upper(), scores[filename]), None
+
+        llm.client.chat.completions.create_with_completion = fake_create
+
+        # Act
+        result = await llm.analyze_with_query(file_texts, "Quem é melhor para backend?")
+
+        # Assert
+        analysis = result["analysis"]
+        assert peak > 1
+        assert [c["filename"] for c in analysis["best_candidates"]] == ["cv5.pdf", "cv4.pdf", "cv3.pdf", "cv1.pdf", "cv0.pdf"]
+        assert analysis["total_candidates_analyzed"] == 5
+        assert analysis["summary"] == "cv5 lidera"
+        assert "CV5.PDF (cv5.pdf) - score 50" in reduce_prompts[0]
+        assert "x" * 100 not in reduce_prompts[0]
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_query_analysis_deterministic_merge(self, llm):
+        """Test LLM_QUERY_REDUCE=merge ranks locally without a reduce call."""
+        # Arrange
+        calls = []
+
+        async def fake_create(**kwargs):
+            calls.append(kwargs["response_model"].__name__)
+            prompt = kwargs["messages"][0]["content"]
+            return self.candidate("Ana" if "ARQUIVO: a.pdf" in prompt else "Bruno", 90 if "a.pdf" in prompt else 40), None
+
+        llm.client.chat.completions.create_with_completion = fake_create
+
+        # Act
+        with patch("app.modules.curriculum.presentation.dependencies.settings.llm_query_reduce", "merge"):
+            result = await llm.analyze_with_query({"b.pdf": "Bruno", "a.pdf": "Ana"}, "Quem sabe Python?")
+
+        # Assert
+        analysis = result["analysis"]
+        assert calls == ["CandidateAnalysis", "CandidateAnalysis"]
+        assert [c["name"] for c in analysis["best_candidates"]] == ["Ana", "Bruno"]
+        assert "Ana (a.pdf)" in analysis["summary"]
+        assert analysis["next_steps"] == ["Agendar entrevista com Ana"]
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_summaries_isolate_errors_and_settle_usage(self, llm):
+        """Test one failing summary doesn't affect the others and real usage refunds the token budget."""
+        # Arrange
+        from app.core.concurrency import RateLimiter
+        limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=100_000)
+        file_texts = {name: f"Currículo de {name} " * 10 for name in ("a.pdf", "b.pdf", "c.pdf")}
+
+        async def fake_create(**kwargs):
+            if "b.pdf" in kwargs["messages"][0]["content"]:
+                raise RuntimeError("timeout")
+            return self.summary("cv.pdf"), Mock(usage=Mock(total_tokens=10, prompt_tokens=8))
+
+        llm.client.chat.completions.create_with_completion = fake_create
+
+        # Act
+        with patch("app.modules.curriculum.presentation.dependencies.llm_rate_limiter", limiter):
+            result = await llm.generate_individual_summaries(file_texts)
+
+        # Assert
+        assert list(result["summaries"]) == ["a.pdf", "b.pdf", "c.pdf"]
+        assert "timeout" in result["summaries"]["b.pdf"]
+        assert result["summaries"]["c.pdf"]["summary"] == "Dev Python"
+        assert limiter.stats()["tokens_available"] > 100_000 - 3 * 500 - 20
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_rate_limiter_waits_for_refill(self):
+        """Test calls wait for the request and token buckets to refill."""
+        # Arrange
+        import asyncio
+        import time
+        from app.core.concurrency import RateLimiter
+        by_requests = RateLimiter(requests_per_minute=1200, tokens_per_minute=0)
+        by_tokens = RateLimiter(requests_per_minute=0, tokens_per_minute=60_000)
+        by_requests.requests = 0
+        by_tokens.tokens = 0
+
+        # Act
+        start = time.perf_counter()
+        await asyncio.gather(by_requests.acquire(1_000_000), by_tokens.acquire(50))
+        elapsed = time.perf_counter() - start
+
+        # Assert
+        assert elapsed >= 0.045
+        assert by_requests.stats()["waits"] == by_tokens.stats()["waits"] == 1
+        assert by_tokens.tokens < 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_cancellation_reaches_the_llm_call(self, llm):
+        """Test cancelling the caller cancels the in-flight async LLM request."""
+        # Arrange
+        import asyncio
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def fake_create(**kwargs):
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        llm.client.chat.completions.create_with_completion = fake_create
+        task = asyncio.create_task(llm.analyze_with_query({"cv.pdf": "Python"}, "Quem sabe Python?"))
+        await started.wait()
+
+        # Act
+        task.cancel()
+
+        # Assert
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert cancelled.is_set()
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_client_disconnect_cancels_the_work(self):
+        """Test cancel_on_disconnect stops the work once the client goes away."""
+        # Arrange
+        import asyncio
+        from app.core.concurrency import ClientDisconnectedError, cancel_on_disconnect
+        request = Mock()
+        request.is_disconnected = AsyncMock(side_effect=[False, True])
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        # Act / Assert
+        with pytest.raises(ClientDisconnectedError):
+            await cancel_on_disconnect(request, work(), poll_interval=0.01)
+        assert cancelled.is_set()
+        assert await cancel_on_disconnect(request, asyncio.sleep(0, result="ok"), poll_interval=0.01) == "ok"
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_shared_client_tracks_connection_reuse(self):
+        """Test the shared client is created once, reports reused connections and closes on shutdown."""
+        # Arrange
+        import httpx
+        from app.modules.curriculum.infrastructure.llm_client import LLMClientManager
+        connection = Mock()
+
+        def handler(request):
+            return httpx.Response(200, json={}, extensions={"network_stream": connection, "http_version": b"HTTP/1.1"})
+
+        manager = LLMClientManager()
+        with patch("app.modules.curriculum.infrastructure.llm_client.settings.openai_api_key", "sk-test"):
+            manager.start(transport=httpx.MockTransport(handler))
+            first_client = manager.client
+            manager.start()
+
+        # Act
+        for _ in range(3):
+            await manager.http_client.get("https://api.openai.com/v1/models")
+        stats = manager.stats()
+        await manager.shutdown()
+
+        # Assert
+        assert manager.client is None
+        assert first_client is not None
+        assert stats["new_connections"] == 1
+        assert stats["reused_connections"] == 2
+        assert stats["reuse_rate"] == round(2 / 3, 4)
+        assert stats["http_version_HTTP/1.1"] == 3
+
+class TestTokenBudget:
+    """Test cases for offline token estimation and CV packing."""
+
+    @pytest.fixture
+    def cv_text(self):
+        """CV with a header, a relevant section and filler sections."""
+        filler = "\n\n".join(
+            f"CURSO LIVRE {i}\n" + "Participação em oficina de artesanato e jardinagem comunitária. " * 6
+            for i in range(8)
+        )
+        return (
+            "Maria Santos\nmaria@email.com\n\n"
+            + filler
+            + "\n\nEXPERIÊNCIA PROFISSIONAL\nDesenvolvedora backend Python com Django e FastAPI em AWS.\n\n"
+            + filler
+        )
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_estimate_tokens_charges_accented_words_more(self):
+        """Test the estimator splits long and accented words into more tokens."""
+        # Arrange
+        from app.modules.curriculum.infrastructure.token_budget import estimate_tokens
+
+        # Act / Assert
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("Python AWS Docker") == 3
+        assert estimate_tokens("experiência profissional") > estimate_tokens("experience professional")
+        assert estimate_tokens("2024, 5 anos.") == 6
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_pack_keeps_header_and_relevant_sections_within_budget(self, cv_text):
+        """Test packing drops whole low-relevance sections instead of cutting at a fixed offset."""
+        # Arrange
+        from app.modules.curriculum.infrastructure.token_budget import OMITTED, estimate_tokens, pack_text
+
+        # Act
+        packed = pack_text(cv_text, 150, query="Quem tem experiência com Python e Django?")
+
+        # Assert
+        assert packed.original_tokens == estimate_tokens(cv_text) > 150
+        assert packed.tokens <= 150
+        assert packed.text.startswith("Maria Santos")
+        assert "Desenvolvedora backend Python com Django e FastAPI em AWS." in packed.text
+        assert OMITTED in packed.text
+        assert packed.dropped_sections > 0
+        assert packed.kept_sections == sorted(packed.kept_sections)
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_short_text_is_untouched_and_chunks_respect_limit(self, cv_text):
+        """Test texts within budget pass through and token chunks stay under the limit."""
+        # Arrange
+        from app.modules.curriculum.infrastructure.token_budget import chunk_by_tokens, estimate_tokens, pack_text
+
+        # Act
+        packed = pack_text("João Silva\nPython", 100)
+        chunks = chunk_by_tokens(cv_text, 50)
+
+        # Assert
+        assert packed.text == "João Silva\nPython"
+        assert packed.dropped_sections == 0
+        assert all(estimate_tokens(chunk) <= 50 for chunk in chunks)
+        assert " ".join(chunks) == " ".join(cv_text.split())
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_llm_calls_report_estimated_and_actual_tokens(self):
+        """Test the prompt is packed and estimated tokens are compared with the API usage."""
+        # Arrange
+        from app.modules.curriculum.domain.models import ResumeSummary
+        from app.modules.curriculum.infrastructure.token_budget import TokenUsageStats
+        from app.modules.curriculum.presentation.dependencies import InstructorLLMService
+        stats = TokenUsageStats()
+        prompts = []
+        with patch("app.modules.curriculum.presentation.dependencies.settings.openai_api_key", ""):
+            service = InstructorLLMService(cache=TwoTierCache(memory_items=64), breaker=CircuitBreaker())
+        service.client = MagicMock()
+        service.use_instructor = True
+
+        async def fake_create(**kwargs):
+            prompts.append(kwargs["messages"][0]["content"])
+            summary = ResumeSummary(filename="cv.pdf", summary="ok", key_skills=[], experience_highlights=[])
+            return summary, Mock(usage=Mock(prompt_tokens=400, total_tokens=500))
+
+        service.client.chat.completions.create_with_completion = fake_create
+
+        # Act
+        with patch("app.modules.curriculum.presentation.dependencies.token_usage_stats", stats), \
+                patch("app.modules.curriculum.presentation.dependencies.settings.llm_summary_token_budget", 200):
+            await service._generate_instructor_summary("Desenvolvedor Python. " * 400, "cv.pdf")
+
+        # Assert
+        result = stats.stats()
+        assert len(prompts[0]) < len("Desenvolvedor Python. " * 400)
+        assert prompts[0].count("Desenvolvedor Python.") >= 20
+        assert result["ResumeSummary_calls"] == 1
+        assert result["ResumeSummary_actual_prompt_tokens"] == 400
+        assert result["ResumeSummary_estimate_ratio"] == round(result["ResumeSummary_estimated_prompt_tokens"] / 400, 3)
+        assert result["dropped_sections"] > 0
+
+
+class TestLLMResponseCache:
+    """Test cases for the LLM response cache."""
+
+    @pytest.fixture
+    def llm(self, tmp_path):
+        """Instructor service with a fake client and a cache on a temporary directory."""
+        from app.modules.curriculum.presentation.dependencies import InstructorLLMService
+        with patch("app.modules.curriculum.presentation.dependencies.settings.openai_api_key", ""):
+            service = InstructorLLMService(cache=TwoTierCache(memory_items=8, directory=str(tmp_path)), breaker=CircuitBreaker())
+        service.client = MagicMock()
+        service.use_instructor = True
+        return service
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_key_depends_on_model_temperature_and_schema(self):
+        """Test indentation doesn't change the key but model, temperature and schema do."""
+        # Arrange
+        from app.modules.curriculum.domain.models import CandidateAnalysis, ResumeSummary
+        from app.modules.curriculum.infrastructure.llm_cache import build_llm_cache_key
+        prompt = "Resuma o currículo.\n    CURRÍCULO: Dev Python"
+
+        # Act
+        key = build_llm_cache_key("gpt-4o-mini", 0.7, prompt, ResumeSummary)
+
+        # Assert
+        assert key == build_llm_cache_key("gpt-4o-mini", 0.7, "  Resuma o   currículo.\nCURRÍCULO: Dev Python  ", ResumeSummary)
+        assert key != build_llm_cache_key("gpt-4o", 0.7, prompt, ResumeSummary)
+        assert key != build_llm_cache_key("gpt-4o-mini", 0.0, prompt, ResumeSummary)
+        assert key != build_llm_cache_key("gpt-4o-mini", 0.7, prompt, CandidateAnalysis)
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_repeated_summary_is_served_from_cache(self, llm):
+        """Test a repeated prompt skips the API and returns a validated ResumeSummary."""
+        # Arrange
+        from app.core.config import settings
+        from app.modules.curriculum.domain.models import ResumeSummary
+        calls = []
+
+        async def fake_create(**kwargs):
+            calls.append(kwargs)
+            summary = ResumeSummary(filename="cv.pdf", summary="Dev Python", key_skills=["Python"], experience_highlights=[])
+            return summary, Mock(usage=Mock(prompt_tokens=8, total_tokens=10))
+
+        llm.client.chat.completions.create_with_completion = fake_create
+        text = "Desenvolvedor Python com experiência em FastAPI " * 5
+
+        # Act
+        first = await llm._generate_instructor_summary(text, "cv.pdf")
+        llm.cache.clear_memory()
+        second = await llm._generate_instructor_summary(text, "cv.pdf")
+
+        # Assert
+        assert len(calls) == 1
+        assert calls[0]["temperature"] == settings.openai_temperature
+        assert second == first
+        assert llm.cache.stats()["disk_hits"] == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_invalid_cached_response_calls_the_model(self, llm):
+        """Test an entry that no longer validates against the response model is treated as a miss."""
+        # Arrange
+        import json
+        from app.core.config import settings
+        from app.modules.curriculum.domain.models import ResumeSummary
+        from app.modules.curriculum.infrastructure.llm_cache import build_llm_cache_key
+        prompt = "Resuma o currículo: Dev Python"
+        key = build_llm_cache_key(settings.openai_model, settings.openai_temperature, prompt, ResumeSummary)
+        llm.cache.set(key, json.dumps({"filename": "cv.pdf"}))
+        summary = ResumeSummary(filename="cv.pdf", summary="Dev Python", key_skills=[], experience_highlights=[])
+        llm.client.chat.completions.create_with_completion = AsyncMock(return_value=(summary, None))
+
+        # Act
+        result = await llm._create(prompt, ResumeSummary, timeout=30.0)
+
+        # Assert
+        assert result == summary
+        llm.client.chat.completions.create_with_completion.assert_awaited_once()
+        assert ResumeSummary.model_validate_json(llm.cache.get(key)) == summary
+
+
+class TestAnalysisStreaming:
+    """Test cases for progress events emitted during an analysis."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_synthesis_streams_partial_objects(self):
+        """Test candidates and partial syntheses are emitted while a listener is registered."""
+        # Arrange
+        from app.core.progress import progress_listener
+        from app.modules.curriculum.domain.models import CandidateAnalysis, QueryAnalysisSynthesis
+        from app.modules.curriculum.presentation.dependencies import InstructorLLMService
+        with patch("app.modules.curriculum.presentation.dependencies.settings.openai_api_key", ""):
+            llm = InstructorLLMService(cache=TwoTierCache(memory_items=8), breaker=CircuitBreaker())
+        llm.client = MagicMock()
+        llm.use_instructor = True
+        events = []
+
+        async def fake_create(**kwargs):
+            candidate = CandidateAnalysis(
+                name="João", filename="x", skills=["Python"], relevant_experience="APIs",
+                strengths=["Python"], weaknesses=[], match_score=80
+            )
+            return candidate, None
+
+        async def fake_partial(**kwargs):
+            yield QueryAnalysisSynthesis.model_construct(summary="João")
+            yield QueryAnalysisSynthesis.model_construct(summary="João")
+            yield QueryAnalysisSynthesis(summary="João é o melhor", recommendations=["Entrevistar"], next_steps=[])
+
+        llm.client.chat.completions.create_with_completion = fake_create
+        llm.client.chat.completions.create_partial = fake_partial
+
+        # Act
+        with patch("app.modules.curriculum.presentation.dependencies.settings.llm_query_mode", "map_reduce"), \
+                patch("app.modules.curriculum.presentation.dependencies.settings.llm_query_reduce", "llm"), \
+                progress_listener(lambda event, data: events.append((event, data))):
+            result = await llm.analyze_with_query({"cv1.pdf": "João - Desenvolvedor Python"}, "Quem sabe Python?")
+
+        # Assert
+        assert [name for name, _ in events] == ["candidate", "analysis_partial", "analysis_partial"]
+        assert events[0][1]["filename"] == "cv1.pdf"
+        assert events[1][1] == {"summary": "João"}
+        assert result["analysis"]["summary"] == "João é o melhor"
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_ocr_emits_event_per_file(self, mock_upload_file):
+        """Test each extracted file is reported as soon as its OCR finishes."""
+        # Arrange
+        from app.core.progress import progress_listener
+        service = TesseractOCRService(executor=OCRExecutor(), cache=TwoTierCache(memory_items=8))
+        events = []
+
+        async def fake_extract(upload, options=None, ocr_pixels=0, plan=None, cache_checked=False):
+            return "Texto extraído"
+
+        # Act
+        with patch.object(service, "_extract_upload", side_effect=fake_extract), \
+                progress_listener(lambda event, data: events.append((event, data))):
+            await service.extract_text_from_files([mock_upload_file("cv1.png", b"fake image content")])
+
+        # Assert
+        assert events == [("ocr", {"filename": "cv1.png", "status": "ok", "detail": None, "chars": 14})]
+
+
+class TestSummaryBatching:
+    """Test cases for batched summaries of short CVs."""
+
+    @pytest.fixture
+    def llm(self):
+        """Instructor service with a fake client and batching enabled."""
+        from app.modules.curriculum.presentation.dependencies import InstructorLLMService
+        with patch("app.modules.curriculum.presentation.dependencies.settings.openai_api_key", ""):
+            service = InstructorLLMService(cache=TwoTierCache(memory_items=64), breaker=CircuitBreaker())
+        service.client = MagicMock()
+        service.use_instructor = True
+        with patch("app.modules.curriculum.presentation.dependencies.settings.llm_summary_batch_enabled", True), \
+                patch("app.modules.curriculum.presentation.dependencies.settings.llm_summary_batch_cv_tokens", 400), \
+                patch("app.modules.curriculum.presentation.dependencies.settings.llm_summary_batch_tokens", 2400), \
+                patch("app.modules.curriculum.presentation.dependencies.settings.llm_summary_batch_max_items", 3):
+            yield service
+
+    @staticmethod
+    def summary(filename):
+        from app.modules.curriculum.domain.models import ResumeSummary
+        return ResumeSummary(filename=filename, summary=f"Resumo de {filename}", key_skills=["Python"], experience_highlights=[])
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_plan_groups_short_cvs_and_isolates_large_ones(self, llm):
+        """Test short CVs share batches capped by item count while large and tiny ones go alone."""
+        # Arrange
+        short = "Desenvolvedor Python com experiência em FastAPI e AWS. " * 3
+        file_texts = {f"cv{i}.png": short for i in range(4)}
+        file_texts["grande.pdf"] = "Experiência profissional em projetos de dados. " * 200
+        file_texts["vazio.png"] = "Sem texto"
+
+        # Act
+        batches = llm._plan_summary_batches(file_texts)
+
+        # Assert
+        assert batches == [["cv0.png", "cv1.png", "cv2.png"], ["grande.pdf"], ["vazio.png"], ["cv3.png"]]
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_batch_summaries_are_mapped_back_by_filename(self, llm):
+        """Test one batched call returns summaries in request order and a dropped CV is retried alone."""
+        # Arrange
+        from app.modules.curriculum.domain.models import ResumeSummaryBatch
+        calls = []
+        file_texts = {f"cv{i}.png": f"Candidato {i} - Desenvolvedor Python com experiência em FastAPI. " * 3 for i in range(3)}
+
+        async def fake_create(**kwargs):
+            calls.append(kwargs["response_model"].__name__)
+            if kwargs["response_model"] is ResumeSummaryBatch:
+                # O modelo devolve fora de ordem, esquece o cv1 e inventa um arquivo
+                return ResumeSummaryBatch(summaries=[self.summary("cv2.png"), self.summary("cv0.png"), self.summary("outro.png")]), None
+            return self.summary("cv1.png"), None
+
+        llm.client.chat.completions.create_with_completion = fake_create
+
+        # Act
+        result = await llm.generate_individual_summaries(file_texts)
+
+        # Assert
+        assert calls == ["ResumeSummaryBatch", "ResumeSummary"]
+        assert list(result["summaries"]) == ["cv0.png", "cv1.png", "cv2.png"]
+        assert result["summaries"]["cv2.png"]["summary"] == "Resumo de cv2.png"
+        assert result["summaries"]["cv1.png"]["filename"] == "cv1.png"
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_failed_batch_falls_back_to_individual_calls(self, llm):
+        """Test an error in the batched call doesn't lose any summary."""
+        # Arrange
+        from app.modules.curriculum.domain.models import ResumeSummaryBatch
+        file_texts = {f"cv{i}.png": f"Candidato {i} - Analista de dados com SQL e Python. " * 3 for i in range(2)}
+
+        async def fake_create(**kwargs):
+            if kwargs["response_model"] is ResumeSummaryBatch:
+                raise RuntimeError("timeout")
+            filename = "cv0.png" if "Candidato 0" in kwargs["messages"][0]["content"] else "cv1.png"
+            return self.summary(filename), None
+
+        llm.client.chat.completions.create_with_completion = fake_create
+
+        # Act
+        result = await llm.generate_individual_summaries(file_texts)
+
+        # Assert
+        assert result["summaries"]["cv0.png"]["summary"] == "Resumo de cv0.png"
+        assert result["summaries"]["cv1.png"]["summary"] == "Resumo de cv1.png"
+
+
+class TestLLMCircuitBreaker:
+    """Test cases for the LLM circuit breaker and the degraded fallback."""
+
+    @pytest.fixture
+    def llm(self):
+        """Instructor service with a fake client and its own breaker."""
+        from app.modules.curriculum.presentation.dependencies import InstructorLLMService
+        breaker = CircuitBreaker(window_size=10, min_calls=4, error_rate_threshold=0.5, latency_slo=1.0, open_seconds=30)
+        with patch("app.modules.curriculum.presentation.dependencies.settings.openai_api_key", ""):
+            service = InstructorLLMService(cache=TwoTierCache(memory_items=8), breaker=breaker)
+        service.client = MagicMock()
+        service.use_instructor = True
+        with patch("app.modules.curriculum.presentation.dependencies.settings.llm_circuit_enabled", True):
+            yield service
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_opens_on_error_rate_and_latency(self):
+        """Test the breaker opens on the window's error rate or p95 latency, but not on a single slow call."""
+        # Arrange
+        by_errors = CircuitBreaker(window_size=10, min_calls=4, error_rate_threshold=0.5, latency_slo=5.0)
+        by_latency = CircuitBreaker(window_size=20, min_calls=4, error_rate_threshold=0.5, latency_slo=5.0)
+
+        # Act
+        for seconds in (1.0, 1.0, 1.0):
+            by_errors.record_failure(seconds)
+        state_before_min_calls = by_errors.state
+        by_errors.record_success(1.0)
+        for seconds in [1.0] * 19 + [25.0]:
+            by_latency.record_success(seconds)
+        state_with_one_outlier = by_latency.state
+        by_latency.record_success(9.0)
+
+        # Assert
+        assert state_before_min_calls == CircuitBreaker.CLOSED
+        assert by_errors.state == CircuitBreaker.OPEN
+        assert state_with_one_outlier == CircuitBreaker.CLOSED
+        assert by_latency.state == CircuitBreaker.OPEN
+        assert by_latency.stats()["p95_seconds"] == 9.0
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_small_window_keeps_its_error_rate_size(self):
+        """Test a window below the latency sample minimum still judges errors over the configured size."""
+        # Arrange
+        breaker = CircuitBreaker(window_size=4, min_calls=4, error_rate_threshold=0.5, latency_slo=5.0)
+
+        # Act
+        for _ in range(10):
+            breaker.record_success(1.0)
+        for _ in range(2):
+            breaker.record_failure(1.0)
+
+        # Assert
+        assert breaker.error_rate() == 0.5
+        assert breaker.state == CircuitBreaker.OPEN
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_half_open_probe_restores_or_reopens(self):
+        """Test after the cool-down a single probe is let through and its outcome decides the state."""
+        # Arrange
+        from app.core.concurrency import CircuitOpenError
+        now = [0.0]
+        breaker = CircuitBreaker(min_calls=1, latency_slo=5.0, open_seconds=30, half_open_probes=1, clock=lambda: now[0])
+        breaker.record_failure(1.0)
+
+        # Act / Assert
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        now[0] = 31.0
+        breaker.before_call()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_failure(1.0)
+        assert breaker.state == CircuitBreaker.OPEN
+
+        now[0] = 62.0
+        breaker.before_call()
+        breaker.record_success(1.0)
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.stats()["rejected"] == 2
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_open_circuit_answers_locally_marked_degraded(self, llm):
+        """Test an open circuit skips the LLM for analyses and summaries and flags the response."""
+        # Arrange
+        for _ in range(4):
+            llm.breaker.record_failure(0.5)
+        llm.client.chat.completions.create_with_completion = AsyncMock()
+        file_texts = {"cv1.pdf": "João Silva - Desenvolvedor Python com Django e AWS. " * 4}
+
+        # Act
+        analysis = await llm.analyze_with_query(file_texts, "Quem sabe Python?")
+        summaries = await llm.generate_individual_summaries(file_texts)
+
+        # Assert
+        llm.client.chat.completions.create_with_completion.assert_not_awaited()
+        assert analysis["degraded"] is True
+        assert analysis["degraded_reason"] == "circuit_open"
+        assert "Python: " in analysis["analysis"]
+        assert summaries["degraded_files"] == ["cv1.pdf"]
+        assert summaries["summaries"]["cv1.pdf"].startswith("João Silva")
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_hedge_delay_bounds_slow_calls(self, llm):
+        """Test a call slower than LLM_HEDGE_DELAY is cancelled and the local answer returned in time."""
+        # Arrange
+        import asyncio
+        import time
+        cancelled = []
+
+        async def slow_create(**kwargs):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        llm.client.chat.completions.create_with_completion = slow_create
+        file_texts = {"cv1.pdf": "João Silva - Desenvolvedor Python com Django e AWS. " * 4}
+
+        # Act
+        start = time.perf_counter()
+        with patch("app.modules.curriculum.presentation.dependencies.settings.llm_hedge_delay", 0.05):
+            result = await llm.analyze_with_query(file_texts, "Quem sabe Python?")
+        elapsed = time.perf_counter() - start
+
+        # Assert
+        assert elapsed < 1
+        assert result["degraded_reason"] == "hedge_timeout"
+        assert cancelled == [True]
+        assert llm.breaker.state == CircuitBreaker.CLOSED
+
+
+class TestUploadSpooling:
+    """Test cases for streamed upload ingestion."""
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_small_upload_stays_in_memory(self, mock_upload_file):
+        """Test uploads under the threshold are kept as bytes."""
+        # Arrange
+        import hashlib
+        from app.modules.curriculum.infrastructure.uploads import spool_upload
+        content = b"%PDF-1.4 pequeno"
+        
+        # Act
+        upload = await spool_upload(mock_upload_file("cv.pdf", content), chunk_size=4, memory_threshold=1024)
+        
+        # Assert
+        assert upload.path is None
+        assert upload.source == content
+        assert upload.sha256 == hashlib.sha256(content).hexdigest()
+        upload.release()
+        assert upload.buffered_bytes == 0
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_large_upload_is_spooled_to_disk(self, mock_upload_file):
+        """Test uploads over the threshold go to a temp file that is removed on release."""
+        # Arrange
+        import hashlib
+        from app.modules.curriculum.infrastructure.uploads import spool_upload
+        content = b"x" * 5000
+        
+        # Act
+        upload = await spool_upload(mock_upload_file("foto.jpg", content), chunk_size=1000, memory_threshold=2048)
+        
+        # Assert
+        assert upload.buffered_bytes == 0
+        assert upload.path.endswith(".jpg")
+        with open(upload.path, "rb") as f:
+            assert f.read() == content
+        assert upload.sha256 == hashlib.sha256(content).hexdigest()
+        path = upload.path
+        upload.release()
+        assert not os.path.exists(path)
+
+
+class TestTesseractOCRService:
+    """Test cases for TesseractOCRService."""
+    
+    @pytest.fixture
+    def ocr_service(self):
+        """Create a Tesseract OCR service with an in-memory cache."""
+        return TesseractOCRService(executor=OCRExecutor(), cache=TwoTierCache(memory_items=8))
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_repeated_content_is_served_from_cache(self, ocr_service, sample_pdf_file):
+        """Test the same bytes are only extracted once."""
+        # Arrange
+        ocr_service.executor.run = AsyncMock(return_value=ocr_workers.PDFExtraction(page_texts=["João Silva"]))
+        
+        # Act
+        first = await ocr_service._extract_text_from_content(sample_pdf_file, "cv1.pdf")
+        second = await ocr_service._extract_text_from_content(sample_pdf_file, "copia.pdf")
+        
+        # Assert
+        assert first == second == "João Silva"
+        assert ocr_service.executor.run.await_count == 1
+        assert ocr_service.cache.stats()["memory_hits"] == 1
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_extract_text_from_files_streams_uploads(self, ocr_service, mock_upload_file, sample_pdf_file):
+        """Test end-to-end extraction from streamed uploads with memory reporting."""
+        # Arrange
+        files = [mock_upload_file("cv1.pdf", sample_pdf_file)]
+        
+        # Act
+        result = await ocr_service.extract_text_from_files(files)
+        
+        # Assert
+        assert "João Silva" in result["cv1.pdf"] or "Desenvolvedor Python" in result["cv1.pdf"]
+        assert ocr_service.peak_buffered_bytes == len(sample_pdf_file)
+        assert ocr_service._buffered_bytes == 0
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_slow_file_times_out_without_blocking_others(self, ocr_service, mock_upload_file):
+        """Test a file over its deadline is marked timed_out while the others finish."""
+        # Arrange
+        import asyncio
+        import time
+        from app.core.config import settings
+        async def fake_extract(upload, options=None, ocr_pixels=0, plan=None, cache_checked=False):
+            if upload.filename == "lento.png":
+                await asyncio.sleep(10)
+            return f"texto de {upload.filename}"
+        files = [mock_upload_file("lento.png", b"a"), mock_upload_file("rapido.png", b"b")]
+        
+        # Act
+        with patch.object(settings, "ocr_file_timeout", 0.2), \
+                patch.object(ocr_service, "_extract_upload", side_effect=fake_extract):
+            start = time.perf_counter()
+            result = await ocr_service.extract_text_from_files(files)
+            elapsed = time.perf_counter() - start
+        
+        # Assert
+        assert elapsed < 2
+        assert result == {"lento.png": "", "rapido.png": "texto de rapido.png"}
+        statuses = ocr_service.get_extraction_statuses()
+        assert statuses["lento.png"]["status"] == "timed_out"
+        assert statuses["rapido.png"] == {"status": "ok", "detail": None}
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_request_deadline_bounds_queued_files(self, ocr_service, mock_upload_file):
+        """Test files starting after the request deadline time out immediately."""
+        # Arrange
+        import asyncio
+        from app.core.config import settings
+        async def fake_extract(upload, options=None, ocr_pixels=0, plan=None, cache_checked=False):
+            await asyncio.sleep(0.3)
+            return "texto"
+        files = [mock_upload_file(f"cv{i}.png", b"a") for i in range(3)]
+        
+        # Act
+        with patch.object(settings, "ocr_request_concurrency", 1), \
+                patch.object(settings, "ocr_request_timeout", 0.5), \
+                patch.object(ocr_service, "_extract_upload", side_effect=fake_extract):
+            await ocr_service.extract_text_from_files(files)
+        
+        # Assert
+        statuses = ocr_service.get_extraction_statuses()
+        assert statuses["cv0.png"]["status"] == "ok"
+        assert statuses["cv1.png"]["status"] == "timed_out"
+        assert statuses["cv2.png"]["status"] == "timed_out"
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.services
+    async def test_errors_are_not_cached(self, ocr_service):
+        """Test failed extractions are retried on the next upload."""
+        # Arrange
+        ocr_service.executor.run = AsyncMock(side_effect=Exception("broken"))
+        
+        # Act
+        first = await ocr_service._extract_text_from_content(b"not an image", "cv.png")
+        second = await ocr_service._extract_text_from_content(b"not an image", "cv.png")
+        
+        # Assert
+        assert "Erro ao processar imagem" in first
+        assert "Erro ao processar imagem" in second
+        assert ocr_service.executor.run.await_count == 2
+
+
 # Mock global do pipeline do HuggingFace para todos os testes do LLMService
 @pytest.fixture(autouse=True)
 def mock_huggingface_pipeline(monkeypatch):
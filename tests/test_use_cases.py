@@ -139,6 +139,72 @@ class TestAnalyzeCurriculaUseCase:
         assert result["files_processed"] == 0
         mock_ocr_service.extract_text_from_files.assert_called_once_with(files)
 
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.use_cases
+    async def test_execute_skips_timed_out_files(self, use_case, mock_files, mock_ocr_service, mock_llm_service):
+        """Test files that hit the OCR deadline are reported and not sent to the LLM."""
+        # Arrange
+        statuses = {
+            "cv1.pdf": {"status": "ok", "detail": None},
+            "cv2.jpg": {"status": "timed_out", "detail": "Extração excedeu o prazo de 60.0s"}
+        }
+        mock_ocr_service.get_extraction_statuses.return_value = statuses
+        
+        # Act
+        result = await use_case.execute(mock_files, "Quem sabe Python?", "test-request-123", "test-user@example.com")
+        
+        # Assert
+        file_texts = mock_llm_service.analyze_with_query.call_args.args[0]
+        assert list(file_texts) == ["cv1.pdf"]
+        assert result["file_statuses"] == statuses
+        assert result["files_processed"] == 2
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.use_cases
+    async def test_stream_emits_progress_before_result(self, use_case, mock_files, mock_ocr_service, mock_llm_service):
+        """Test the stream yields each stage's events as they happen and ends with the full response."""
+        # Arrange
+        from app.core.progress import emit_progress
+        texts = mock_ocr_service.extract_text_from_files.return_value
+        
+        async def fake_extract(files):
+            for filename in texts:
+                emit_progress("ocr", {"filename": filename, "status": "ok"})
+            return texts
+        
+        async def fake_summaries(file_texts):
+            emit_progress("summary", {"filename": "cv1.pdf", "summary": "Dev Python"})
+            return {"type": "individual_summaries", "summaries": {"cv1.pdf": "Dev Python"}}
+        
+        mock_ocr_service.extract_text_from_files.side_effect = fake_extract
+        mock_llm_service.generate_individual_summaries.side_effect = fake_summaries
+        
+        # Act
+        events = [event async for event in use_case.stream(mock_files, None, "test-request-123", "test-user@example.com")]
+        
+        # Assert
+        assert [name for name, _ in events] == ["started", "ocr", "ocr", "ocr_complete", "summary", "result"]
+        assert events[1][1]["filename"] == "cv1.pdf"
+        assert events[-1][1]["result"]["summaries"] == {"cv1.pdf": "Dev Python"}
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    @pytest.mark.use_cases
+    async def test_stream_reports_errors_as_event(self, use_case, mock_files, mock_llm_service, mock_repository):
+        """Test a failing analysis ends the stream with an error event and is still recorded."""
+        # Arrange
+        mock_llm_service.analyze_with_query.side_effect = Exception("LLM Error")
+        
+        # Act
+        events = [event async for event in use_case.stream(mock_files, "Quem sabe Python?", "test-request-123", "test-user@example.com")]
+        
+        # Assert
+        assert events[-1] == ("error", {"code": 500, "detail": "LLM Error"})
+        mock_repository.save.assert_called_once()
+
 
 class TestGetAnalysisHistoryUseCase:
     """Test cases for GetAnalysisHistoryUseCase."""